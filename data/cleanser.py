@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 from scipy.stats import zscore
 
+from data.schema import apply_schema
+
 def process_market_data(data, mkt_day):
     """
     시장 데이터 프레임과 개별종목 데이터 프레임을 합치고 클린징 작업을 수행하는 함수입니다.
@@ -50,8 +52,8 @@ def process_market_data(data, mkt_day):
     kr_base = kr_base[['종목코드', '종목명', '시장구분', '종가', '시가총액', 
                             '기준일', 'EPS', '선행EPS', 'BPS', '주당배당금', '종목구분']]
     
-    # nan은 SQL에 저장하지 못하므로 None으로 변경
-    kr_base = kr_base.replace({np.nan: None})
+    # 컴팩트한 타입으로 변환 (nan은 저장 시 to_db_rows에서 None으로 변경)
+    kr_base = apply_schema(kr_base, 'kr_base')
 
     # 최종 클린징된 데이터 프레임 반환
     return kr_base
@@ -79,7 +81,7 @@ def process_sector_data(data, mkt_day):
     # 기준일 데이터타임 형태로 변경
     kr_sector['기준일'] = pd.to_datetime(kr_sector['기준일'], format='%Y%m%d')
 
-    return kr_sector
+    return apply_schema(kr_sector, 'kr_sector')
 
 def process_code_data(data):
     """
@@ -136,6 +138,46 @@ def process_price_data(data, CD_finder):
     
     return kr_price
 
+def process_price_batch(data_dict):
+    """
+    여러 종목의 주가 데이터(크롤링 원본)를 한 번에 받아 하나의 컬럼형 데이터 프레임으로 변환하고 클린징 처리하는 함수입니다.
+    종목별로 process_price_data를 반복 호출할 때 생기는 pandas 오버헤드를 없애기 위해,
+    모든 종목의 값을 하나의 배열로 이어 붙인 뒤 숫자와 날짜를 한 번씩만 벡터화하여 변환합니다.
+
+    매개변수:
+        data_dict (dict): {종목코드: crawl_price_data의 결과 리스트} 형태의 딕셔너리입니다.
+
+    반환:
+        kr_price (DataFrame): 날짜, 시가, 고가, 저가, 종가, 거래량, 종목코드 컬럼을 가진 데이터 프레임입니다.
+                              가격은 float32, 거래량은 int64, 종목코드는 category 타입입니다.
+    """
+    raw_columns = ['TRD_DD', 'TDD_OPNPRC', 'TDD_HGPRC', 'TDD_LWPRC', 'TDD_CLSPRC', 'ACC_TRDVOL']
+    price_columns = ['시가', '고가', '저가', '종가']
+
+    # 종목별 레코드 수와 원본 값을 컬럼 단위로 모으기
+    codes = [code for code, data in data_dict.items() if data]
+    counts = np.array([len(data_dict[code]) for code in codes], dtype=np.int64)
+    raw = {col: [row.get(col) for code in codes for row in data_dict[code]] for col in raw_columns}
+
+    # 날짜는 명시적인 형식으로 한 번에 변환 (예: '2024/03/29')
+    dates = pd.to_datetime(pd.Series(raw['TRD_DD'], dtype=object), format='%Y/%m/%d', errors='coerce')
+
+    # 쉼표 제거 후 숫자 변환도 컬럼별로 한 번만 수행
+    numbers = {}
+    for col, name in zip(raw_columns[1:], price_columns + ['거래량']):
+        values = pd.Series(raw[col], dtype=object).str.replace(',', '', regex=False)
+        numbers[name] = pd.to_numeric(values, errors='coerce')
+
+    # 종목코드는 반복 문자열 대신 category 코드 배열로 생성
+    code_cat = pd.Categorical.from_codes(np.repeat(np.arange(len(codes)), counts), categories=codes)
+
+    kr_price = pd.DataFrame({'날짜': dates, **numbers, '종목코드': code_cat})
+
+    # 결측치 제거 후 컴팩트한 타입으로 변환
+    kr_price = apply_schema(kr_price.dropna().reset_index(drop=True), 'kr_price')
+
+    return kr_price
+
 def process_financial_data(data, code, frequency):
 
     data = data[~data.loc[:, ~data.columns.isin(['계정'])].isna().all(axis=1)]
@@ -151,28 +193,128 @@ def process_financial_data(data, code, frequency):
     return data
 
 
-def calculate_value_indicators(fs_df, base_df):
+# TTM 계산 시 합계 대신 4분기 평균을 사용하는 재무상태표 계정
+TTM_AVERAGE_ACCOUNTS = ['자산', '자본']
+
+def _ttm_segments(fs_df):
+    """
+    재무 데이터를 (종목코드, 계정, 기준일) 순으로 정렬하고, TTM 계산에 필요한 NumPy 배열을 만드는 내부 함수입니다.
+
+    매개변수:
+        fs_df (DataFrame): 종목코드, 계정, 기준일, 값 컬럼을 가진 분기 재무 데이터 프레임입니다.
+
+    반환:
+        fs_df (DataFrame): 정렬된 데이터 프레임입니다.
+        seg_id (ndarray): 각 행이 속한 (종목코드, 계정) 구간 번호입니다.
+        quarter (ndarray): 연속된 분기 번호(연도 * 4 + 분기)입니다.
+        values (ndarray): float64 형태의 값 배열입니다.
+    """
+    fs_df = fs_df.sort_values(['종목코드', '계정', '기준일'], kind='mergesort', ignore_index=True)
+
+    # (종목코드, 계정) 조합이 바뀌는 지점을 구간 경계로 사용
+    code_id = pd.factorize(fs_df['종목코드'])[0].astype(np.int64)
+    acc_id, acc_uniques = pd.factorize(fs_df['계정'])
+    seg_id = code_id * max(len(acc_uniques), 1) + acc_id
+
+    # 분기 공백을 찾기 위한 분기 번호
+    dates = pd.to_datetime(fs_df['기준일'])
+    quarter = (dates.dt.year * 4 + (dates.dt.month - 1) // 3).to_numpy(np.int64)
+
+    values = fs_df['값'].to_numpy(np.float64)
+
+    return fs_df, seg_id, quarter, values
+
+def calculate_ttm(fs_df, latest_only=True):
+    """
+    분기 재무 데이터로부터 종목코드와 계정별 TTM(지난 4분기 합계)을 계산하는 함수입니다.
+    groupby().rolling() 대신 정렬된 NumPy 배열과 구간 경계를 이용해 한 번에 계산하며,
+    4개 분기가 연속되지 않는(중간 분기가 빠진) 경우에는 NaN으로 처리합니다.
+    TTM_AVERAGE_ACCOUNTS에 해당하는 계정은 합계 대신 4분기 평균을 사용합니다.
+
+    매개변수:
+        fs_df (DataFrame): 종목코드, 계정, 기준일, 값 컬럼을 가진 분기 재무 데이터 프레임입니다.
+        latest_only (bool): True일 경우 종목코드와 계정별 최신 분기만 반환합니다. 기본값은 True입니다.
+
+    반환:
+        ttm_df (DataFrame): 종목코드, 계정, 기준일, ttm 컬럼을 가진 데이터 프레임입니다.
+    """
+    fs_df, seg_id, quarter, values = _ttm_segments(fs_df)
+
+    # 3분기 전 행이 같은 구간이고 정확히 3분기 차이일 때만 연속된 4분기로 인정
+    ttm = np.full(len(values), np.nan)
+    if len(values) >= 4:
+        valid = (seg_id[3:] == seg_id[:-3]) & (quarter[3:] - quarter[:-3] == 3)
+        window_sum = values[3:] + values[2:-1] + values[1:-2] + values[:-3]
+        ttm[3:] = np.where(valid, window_sum, np.nan)
+
+    # 재무상태표 계정은 평균으로 변환
+    ttm = np.where(fs_df['계정'].isin(TTM_AVERAGE_ACCOUNTS).to_numpy(), ttm / 4, ttm)
+
+    ttm_df = fs_df[['종목코드', '계정', '기준일']].copy()
+    ttm_df['ttm'] = ttm
+
+    # 각 구간의 마지막 행(최신 분기)만 선택
+    if latest_only:
+        seg_end = np.append(seg_id[1:] != seg_id[:-1], True) if len(seg_id) else np.array([], dtype=bool)
+        ttm_df = ttm_df[seg_end].reset_index(drop=True)
+
+    return ttm_df
+
+def ttm_window(fs_df):
+    """
+    증분 TTM 계산을 위해 종목코드와 계정별 최근 4개 분기 원본 데이터만 남기는 함수입니다.
+
+    매개변수:
+        fs_df (DataFrame): 종목코드, 계정, 기준일, 값 컬럼을 가진 분기 재무 데이터 프레임입니다.
+
+    반환:
+        window_df (DataFrame): 종목코드와 계정별 최근 4개 분기만 담긴 데이터 프레임입니다.
+    """
+    fs_df, seg_id, _, _ = _ttm_segments(fs_df)
+
+    # 각 구간 끝에서부터 4번째 행까지만 유지
+    starts = np.flatnonzero(np.append(True, seg_id[1:] != seg_id[:-1])) if len(seg_id) else np.array([], dtype=np.int64)
+    ends = np.append(starts[1:], len(seg_id))
+    pos_from_end = np.repeat(ends, ends - starts) - np.arange(len(seg_id))
+
+    return fs_df[pos_from_end <= 4].reset_index(drop=True)
+
+def update_ttm(window_df, new_fs_df):
+    """
+    보관 중인 최근 4개 분기 데이터에 새로 들어온 분기를 더해 TTM을 증분 계산하는 함수입니다.
+    전체 분기 이력을 다시 읽지 않고, 종목코드와 계정별로 최대 5개 행만 다시 계산합니다.
+
+    매개변수:
+        window_df (DataFrame): ttm_window 혹은 이전 update_ttm이 반환한 최근 분기 데이터 프레임입니다.
+        new_fs_df (DataFrame): 새로 추가된 분기 재무 데이터 프레임입니다.
+
+    반환:
+        ttm_df (DataFrame): 종목코드와 계정별 최신 분기 TTM이 담긴 데이터 프레임입니다.
+        window_df (DataFrame): 다음 갱신에 사용할 최근 4개 분기 데이터 프레임입니다.
+    """
+    # 같은 분기가 다시 들어온 경우 새 값으로 대체
+    fs_df = pd.concat([window_df, new_fs_df[window_df.columns]], ignore_index=True)
+    fs_df = fs_df.drop_duplicates(['종목코드', '계정', '기준일'], keep='last')
+
+    window_df = ttm_window(fs_df)
+    ttm_df = calculate_ttm(window_df)
+
+    return ttm_df, window_df
+
+def calculate_value_indicators(fs_df, base_df, ttm_df=None):
     """
     재무 데이터와 기본 정보를 기반으로 다양한 가치지표를 계산하는 함수입니다.
 
     매개변수:
         fs_df (DataFrame): 정렬된 재무 데이터가 담긴 데이터 프레임입니다.
         base_df (DataFrame): 시가총액 및 기타 정보가 담긴 기본 정보 데이터 프레임입니다.
+        ttm_df (DataFrame): update_ttm으로 미리 계산한 최신 분기 TTM입니다. None일 경우 fs_df로 계산합니다.
 
     반환:
         kr_value (DataFrame): 계산된 가치지표가 담긴 데이터 프레임입니다.
     """
-    # 재무 데이터 정렬
-    fs_df = fs_df.sort_values(['종목코드', '계정', '기준일'])
-    
-    # TTM(지난 4분기 합계) 계산
-    fs_df['ttm'] = fs_df.groupby(['종목코드', '계정'], as_index=False)['값'].rolling(window=4, min_periods=4).sum()['값']
-    
-    # 자본의 경우 TTM을 평균으로 계산
-    fs_df['ttm'] = np.where(fs_df['계정'] == '자본', fs_df['ttm'] / 4, fs_df['ttm'])
-    
-    # 최신 분기만 선택
-    fs_df = fs_df.groupby(['계정', '종목코드']).tail(1)
+    # 종목/계정별 최신 분기의 TTM(지난 4분기 합계, 자본은 평균) 계산
+    fs_df = calculate_ttm(fs_df) if ttm_df is None else ttm_df
     
     # 가치지표 계산
     fs_df_merge = fs_df[['계정', '종목코드', 'ttm']].merge(base_df[['종목코드', '시가총액', '기준일']], on='종목코드')
@@ -195,18 +337,18 @@ def calculate_value_indicators(fs_df, base_df):
     # 컬럼명 변경 및 필요한 컬럼 선택
     fs_df_merge.rename(columns={'value': '값'}, inplace=True)
     fs_df_merge = fs_df_merge[['종목코드', '기준일', '지표', '값']]
-    fs_df_merge = fs_df_merge.replace([np.inf, -np.inf, np.nan], None)  # 무한대 및 NaN 처리
+    fs_df_merge = fs_df_merge.replace([np.inf, -np.inf], np.nan)  # 무한대 처리 (NaN은 저장 시 None으로 변경)
     
-    # 배당수익률 계산 및 클린징
-    base_df['값'] = base_df['주당배당금'] / base_df['종가']
+    # 배당수익률 계산 및 클린징 (float32 가격은 float64로 나누어 반올림 결과를 유지)
+    base_df['값'] = base_df['주당배당금'].astype(np.float64) / base_df['종가'].astype(np.float64)
     base_df['값'] = base_df['값'].round(4)
     base_df['지표'] = 'DY'
     value_dy = base_df[['종목코드', '기준일', '지표', '값']]
-    value_dy = value_dy.replace([np.inf, -np.inf, np.nan], None)
+    value_dy = value_dy.replace([np.inf, -np.inf], np.nan)
     value_dy = value_dy[value_dy['값'] != 0]
     
     # 재무지표와 배당수익률 데이터 합치기
-    kr_value = pd.concat([fs_df_merge, value_dy]).reset_index(drop=True)
+    kr_value = apply_schema(pd.concat([fs_df_merge, value_dy]).reset_index(drop=True), 'kr_value')
     
     return kr_value
 
@@ -242,3 +384,90 @@ def to_zscore(df, cutoff=0.01, asc=False):
             zscore, nan_policy='omit')
 
     return df_z_score
+
+
+def to_zscore_grouped(df, group_col, asc_dict, cutoff=0.01):
+    """
+    그룹(섹터)별로 to_zscore와 동일한 정규화(양 끝 cutoff 제외 → 순위 → Z-score)를 여러 컬럼에 한 번에 적용합니다.
+    groupby().apply() 대신 그룹 코드와 정렬된 NumPy 배열을 이용해 모든 그룹을 동시에 계산하며,
+    결과는 입력 데이터 프레임과 같은 인덱스로 반환되므로 별도의 병합이 필요 없습니다.
+
+    매개변수:
+        df (DataFrame): 그룹 컬럼과 정규화할 컬럼들이 담긴 데이터 프레임입니다.
+        group_col (str): 그룹을 나타내는 컬럼명입니다. (예: 'SEC_NM_KOR')
+        asc_dict (dict): {컬럼명: asc} 형태의 딕셔너리입니다. asc는 to_zscore의 asc와 같은 의미입니다.
+        cutoff (float): 양 끝에서 제외할 데이터의 비율입니다. 기본값은 0.01 입니다.
+
+    반환:
+        df_z_score (DataFrame): df와 같은 인덱스를 가진, 컬럼별 Z-score 데이터 프레임입니다. (그룹이 결측인 행은 NaN)
+    """
+    group_id, group_uniques = pd.factorize(df[group_col])
+    n_group = len(group_uniques)
+
+    # 그룹이 결측인 행(factorize 결과 -1)은 groupby와 같이 계산에서 제외
+    rows = np.flatnonzero(group_id >= 0)
+    group_id = group_id[rows].astype(np.int64)
+    n = len(rows)
+
+    df_z_score = pd.DataFrame(index=df.index)
+
+    for col, asc in asc_dict.items():
+        v = df[col].to_numpy(np.float64)[rows]
+        valid = ~np.isnan(v)
+        z = np.full(n, np.nan)
+
+        # (그룹, 값) 순으로 정렬 (NaN은 그룹 내 마지막에 위치)
+        order = np.lexsort((v, group_id))
+        g_sorted = group_id[order]
+        v_sorted = v[order]
+
+        # 그룹별 시작 위치와 유효값 개수
+        start = np.concatenate([[0], np.cumsum(np.bincount(group_id, minlength=n_group))[:-1]])
+        cnt = np.bincount(group_id[valid], minlength=n_group)
+
+        # 그룹별 분위수 (pandas quantile과 동일한 선형 보간)
+        def group_quantile(p):
+            h = (cnt - 1) * p
+            lo = np.floor(h).astype(np.int64)
+            hi = np.ceil(h).astype(np.int64)
+            safe = cnt > 0
+            v_lo = np.where(safe, v_sorted[np.where(safe, start + lo, 0)], np.nan)
+            v_hi = np.where(safe, v_sorted[np.where(safe, start + hi, 0)], np.nan)
+            return v_lo + (h - lo) * (v_hi - v_lo)
+
+        q_low = group_quantile(cutoff)
+        q_hi = group_quantile(1 - cutoff)
+
+        # cutoff 기준으로 양 끝을 제외 (정렬된 순서 그대로 유지)
+        keep = (v_sorted > q_low[g_sorted]) & (v_sorted < q_hi[g_sorted])
+        idx = order[keep]
+        g_k = g_sorted[keep]
+        v_k = v_sorted[keep]
+        m = len(idx)
+
+        if m > 0:
+            # 그룹 내 순위 (오름차순, 동순위는 평균 순위)
+            k_cnt = np.bincount(g_k, minlength=n_group)
+            k_start = np.concatenate([[0], np.cumsum(k_cnt)[:-1]])
+            pos = np.arange(m) - k_start[g_k] + 1
+            new_run = np.concatenate([[True], (g_k[1:] != g_k[:-1]) | (v_k[1:] != v_k[:-1])])
+            run_id = np.cumsum(new_run) - 1
+            run_first = pos[new_run]
+            run_last = np.append(pos[np.flatnonzero(new_run)[1:] - 1], pos[-1])
+            rank = ((run_first + run_last) / 2)[run_id]
+
+            # 그룹별 Z-score (모표준편차 기준, scipy.stats.zscore와 동일)
+            mean = (k_cnt + 1) / 2
+            dev = rank - mean[g_k]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                std = np.sqrt(np.bincount(g_k, weights=dev ** 2, minlength=n_group) / k_cnt)
+                z_k = dev / std[g_k]
+
+            # 내림차순 순위의 Z-score는 오름차순 Z-score의 부호를 바꾼 것과 같음
+            z[idx] = z_k if asc else -z_k
+
+        z_all = np.full(len(df), np.nan)
+        z_all[rows] = z
+        df_z_score[col] = z_all
+
+    return df_z_score
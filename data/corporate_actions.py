@@ -0,0 +1,75 @@
+import pandas as pd
+import numpy as np
+
+# 저장된 주가와 새로 받은 주가를 비교할 최근 기간 (달력 기준 일수)
+OVERLAP_DAYS = 14
+
+# 수정주가 변경으로 판단할 종가 차이 비율
+PRICE_TOLERANCE = 0.005
+
+# 상장주식수(시가총액 / 종가) 변경으로 판단할 비율
+SHARE_TOLERANCE = 0.001
+
+def detect_share_changes(base_df, tol=SHARE_TOLERANCE):
+    """
+    kr_base의 최근 두 기준일 사이에 상장주식수(시가총액 / 종가)가 바뀐 종목을 찾는 함수입니다.
+    액면분할, 유무상증자, 병합 등은 상장주식수를 바꾸고 과거 수정주가 전체를 다시 계산하게 만듭니다.
+    (전환사채 전환처럼 수정주가와 무관한 변경도 포함되지만, 해당 종목을 한 번 더 전체 조회할 뿐이므로 문제가 없습니다)
+
+    매개변수:
+        base_df (DataFrame): fetch_recent_base가 반환한 종목코드, 종가, 시가총액, 기준일 데이터 프레임입니다.
+        tol (float): 변경으로 판단할 상장주식수 변화 비율입니다. 기본값은 SHARE_TOLERANCE입니다.
+
+    반환:
+        codes (set): 상장주식수가 바뀐 종목코드 집합입니다. 기준일이 하나뿐이면 빈 집합입니다.
+    """
+    dates = np.sort(base_df['기준일'].unique())
+    if len(dates) < 2:
+        return set()
+
+    shares = (base_df['시가총액'] / base_df['종가']).replace([np.inf, -np.inf], np.nan)
+    shares = pd.DataFrame({'종목코드': base_df['종목코드'], '기준일': base_df['기준일'], 'shares': shares}) \
+        .pivot_table(index='종목코드', columns='기준일', values='shares')
+    prev, last = shares[dates[-2]], shares[dates[-1]]
+
+    changed = ((last / prev - 1).abs() > tol) & prev.notna() & last.notna()
+
+    return set(changed.index[changed])
+
+def detect_price_revisions(new_df, stored_df, tol=PRICE_TOLERANCE):
+    """
+    새로 받은 수정주가와 DB에 저장된 주가가 겹치는 날짜의 종가를 비교하여, 과거 가격이 바뀐 종목을 찾는 함수입니다.
+    수정주가가 바뀐 종목은 최근 구간만 덧붙이면 과거 가격과 이어지지 않으므로 전체 기간을 다시 받아야 합니다.
+
+    매개변수:
+        new_df (DataFrame): process_price_batch가 반환한 새 주가 데이터 프레임입니다. (날짜, 종가, 종목코드)
+        stored_df (DataFrame): fetch_recent_price가 반환한 저장된 주가 데이터 프레임입니다. (날짜, 종가, 종목코드)
+        tol (float): 변경으로 판단할 종가 차이 비율입니다. 기본값은 PRICE_TOLERANCE입니다.
+
+    반환:
+        codes (set): 겹치는 날짜의 종가가 하나라도 tol 이상 다른 종목코드 집합입니다.
+    """
+    new = new_df[['날짜', '종목코드', '종가']].astype({'종목코드': str, '종가': float})
+    stored = stored_df[['날짜', '종목코드', '종가']].astype({'종목코드': str, '종가': float})
+    merged = new.merge(stored.assign(날짜=pd.to_datetime(stored['날짜'])), on=['날짜', '종목코드'], suffixes=('', '_db'))
+
+    revised = (merged['종가'] / merged['종가_db'] - 1).abs() > tol
+
+    return set(merged.loc[revised, '종목코드'])
+
+def incremental_start_dates(stored_df, codes):
+    """
+    종목별 증분 조회 시작일을 정하는 함수입니다. 저장된 최근 구간의 첫 날짜부터 다시 받아 겹치는 구간으로 수정주가 변경을 확인합니다.
+
+    매개변수:
+        stored_df (DataFrame): fetch_recent_price가 반환한 저장된 주가 데이터 프레임입니다.
+        codes (iterable): 조회할 종목코드입니다.
+
+    반환:
+        start_dates (dict): {종목코드: 'YYYYMMDD' 혹은 None} 딕셔너리입니다. 최근 구간에 저장된 주가가 없는 종목(신규 상장,
+                            오래 갱신되지 않은 종목)은 None이며, 전체 기간을 조회해야 합니다.
+    """
+    first = pd.to_datetime(stored_df['날짜']).groupby(stored_df['종목코드'].astype(str)).min()
+    first = first.dt.strftime('%Y%m%d').to_dict()
+
+    return {code: first.get(code) for code in codes}
@@ -126,7 +126,7 @@ def crawl_code_data():
 
     return output_code
 
-def crawl_price_data(CD_finder, STCD_finder, NM_finder):
+def crawl_price_data(CD_finder, STCD_finder, NM_finder, fr=None):
     """
     특정 종목에 대한 주가 데이터를 가져옵니다.
 
@@ -134,12 +134,13 @@ def crawl_price_data(CD_finder, STCD_finder, NM_finder):
         CD_finder (str): 종목코드입니다.
         STCD_finder (str): 표준코드입니다.
         NM_finder (str): 종목명입니다.
+        fr (str): 'YYYYMMDD' 형식의 조회 시작일입니다. None일 경우 5년 전부터 조회합니다.
 
     반환:
         output_data (list): 가져온 주가 데이터가 담긴 리스트입니다.
     """
     # 시작일과 종료일 계산
-    fr = (date.today() + relativedelta(years=-5)).strftime("%Y%m%d")
+    fr = fr or (date.today() + relativedelta(years=-5)).strftime("%Y%m%d")
     to = date.today().strftime("%Y%m%d")
 
     # 주가 데이터 가져오기 위한 URL 및 파라미터 설정
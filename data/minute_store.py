@@ -0,0 +1,234 @@
+import os
+import datetime
+import numpy as np
+import pandas as pd
+
+# 분봉을 저장하는 기본 폴더 (거래일별 하위 폴더에 종목별 파일)
+MINUTE_DIR = 'minute_bars'
+
+# 저장하는 분봉 항목
+PRICE_FIELDS = ['시가', '고가', '저가', '종가']
+FIELDS = ['시각'] + PRICE_FIELDS + ['거래량']
+
+def _smallest_int(values, signed=True):
+    # 값 범위에 맞는 가장 작은 정수 타입
+    candidates = [np.int8, np.int16, np.int32, np.int64] if signed else [np.uint8, np.uint16, np.uint32, np.uint64]
+    lo, hi = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return candidates[-1]
+
+def encode_chunk(minutes, prices, volume):
+    """
+    한 종목 하루치 분봉을 압축하기 좋은 배열로 변환하는 함수입니다.
+        - 시각: 첫 분(자정 기준 분)과 분 간격(delta)으로 저장합니다. 간격은 대부분 1이므로 uint8로 충분합니다.
+        - 가격: 하루 동안 나온 가격 수준을 사전(dictionary)으로 만들고, 사전은 차분(delta)으로, 각 가격은 사전 번호로 저장합니다.
+          장중 가격 수준은 보통 수백 개 이하이므로 가격 하나가 1~2바이트가 됩니다.
+        - 거래량: 값 범위에 맞는 가장 작은 부호 없는 정수로 저장합니다.
+
+    매개변수:
+        minutes (ndarray): 자정 기준 분(0~1439) 배열입니다. 오름차순이어야 합니다.
+        prices (ndarray): (4, n) 형태의 시가, 고가, 저가, 종가 정수 배열입니다.
+        volume (ndarray): 거래량 배열입니다.
+
+    반환:
+        chunk (dict): np.savez_compressed로 저장할 배열 딕셔너리입니다.
+    """
+    minutes = np.asarray(minutes, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.int64)
+    volume = np.asarray(volume, dtype=np.int64)
+
+    minute_delta = np.diff(minutes, prepend=minutes[:1])
+    levels, index = np.unique(prices, return_inverse=True)
+    level_delta = np.diff(levels, prepend=0)
+
+    chunk = {
+        'first_minute': minutes[:1].astype(np.int16),
+        'minute_delta': minute_delta.astype(_smallest_int(minute_delta, signed=False)),
+        'level_delta': level_delta.astype(_smallest_int(level_delta)),
+        'price_index': index.reshape(prices.shape).astype(_smallest_int(index, signed=False)),
+        'volume': volume.astype(_smallest_int(volume, signed=False)),
+    }
+
+    return chunk
+
+def decode_chunk(chunk):
+    """
+    encode_chunk로 저장한 배열을 (분, 가격, 거래량) 배열로 되돌리는 함수입니다.
+
+    반환:
+        minutes (ndarray): 자정 기준 분 배열입니다.
+        prices (ndarray): (4, n) 형태의 시가, 고가, 저가, 종가 배열입니다.
+        volume (ndarray): 거래량 배열입니다.
+    """
+    minute_delta = chunk['minute_delta'].astype(np.int64)
+    if len(minute_delta):
+        minute_delta[0] = chunk['first_minute'][0]
+    minutes = np.cumsum(minute_delta)
+    levels = np.cumsum(chunk['level_delta'].astype(np.int64))
+    prices = levels[chunk['price_index'].astype(np.int64)] if len(levels) else np.zeros((4, 0), dtype=np.int64)
+
+    return minutes, prices, chunk['volume'].astype(np.int64)
+
+class MinuteBarStore:
+    """
+    장중 분봉을 거래일별 폴더의 종목별 컬럼형 파일(npz)로 저장하고 기간 단위로 읽는 저장소입니다.
+    파일 하나가 한 종목의 하루치(최대 381개 분봉)이므로, 추가와 조회는 해당 거래일 파일만 읽고 쓰며
+    이력이 길어져도 비용이 늘어나지 않습니다. 각 파일은 encode_chunk의 차분/사전 인코딩 후 zlib으로 압축합니다.
+
+    매개변수:
+        path (str): 저장 폴더입니다. 기본값은 MINUTE_DIR입니다.
+    """
+    def __init__(self, path=MINUTE_DIR):
+        self.path = path
+
+    def _file(self, date, code):
+        return os.path.join(self.path, pd.Timestamp(date).strftime('%Y%m%d'), f'{code}.npz')
+
+    def _load(self, date, code):
+        # 저장된 하루치 분봉 (없으면 None)
+        file = self._file(date, code)
+        if not os.path.exists(file):
+            return None
+        with np.load(file) as chunk:
+            return decode_chunk(chunk)
+
+    def append(self, code, bars):
+        """
+        분봉을 저장소에 추가합니다. 같은 시각의 분봉이 이미 있으면 새 값으로 바꿉니다.
+        거래일별로 기존 파일과 합친 뒤 임시 파일에 쓰고 교체하므로 저장 중 중단되어도 기존 파일이 깨지지 않습니다.
+
+        매개변수:
+            code (str): 종목코드입니다.
+            bars (DataFrame): 시각(datetime), 시가, 고가, 저가, 종가, 거래량 컬럼을 가진 분봉 데이터 프레임입니다.
+
+        반환:
+            count (int): 추가 후 해당 거래일들에 저장된 분봉 수의 합입니다.
+        """
+        if bars.empty:
+            return 0
+        times = pd.to_datetime(bars['시각'])
+        days = times.dt.normalize()
+        count = 0
+
+        for day, idx in bars.groupby(days).groups.items():
+            new_minutes = (times[idx].dt.hour * 60 + times[idx].dt.minute).to_numpy(np.int64)
+            new_prices = bars.loc[idx, PRICE_FIELDS].to_numpy(np.int64).T
+            new_volume = bars.loc[idx, '거래량'].to_numpy(np.int64)
+
+            # 기존 분봉과 합친 뒤 시각별로 마지막 값만 유지
+            old = self._load(day, code)
+            if old is not None:
+                new_minutes = np.concatenate([old[0], new_minutes])
+                new_prices = np.concatenate([old[1], new_prices], axis=1)
+                new_volume = np.concatenate([old[2], new_volume])
+            _, last = np.unique(new_minutes[::-1], return_index=True)
+            keep = len(new_minutes) - 1 - last
+
+            file = self._file(day, code)
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            tmp_file = file[:-4] + '.tmp.npz'
+            np.savez_compressed(tmp_file, **encode_chunk(new_minutes[keep], new_prices[:, keep], new_volume[keep]))
+            os.replace(tmp_file, file)
+            count += len(keep)
+
+        return count
+
+    def days(self):
+        """
+        분봉이 저장된 거래일 목록(Timestamp)을 오름차순으로 반환합니다.
+        """
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(pd.Timestamp(name) for name in os.listdir(self.path) if name.isdigit())
+
+    def codes(self, date):
+        """
+        해당 거래일에 분봉이 저장된 종목코드 목록을 반환합니다.
+        """
+        folder = os.path.dirname(self._file(date, '_'))
+        if not os.path.isdir(folder):
+            return []
+        return sorted(name[:-4] for name in os.listdir(folder) if name.endswith('.npz') and '.tmp' not in name)
+
+    def read(self, code, start, end, fields=None):
+        """
+        한 종목의 start ~ end 시각 분봉을 NumPy 배열로 읽습니다. 기간에 속한 거래일 파일만 읽습니다.
+
+        매개변수:
+            code (str): 종목코드입니다.
+            start (datetime): 시작 시각입니다. (포함)
+            end (datetime): 종료 시각입니다. (포함)
+            fields (list): 반환할 항목입니다. None일 경우 FIELDS 전체입니다.
+
+        반환:
+            bars (dict): {항목: ndarray} 딕셔너리입니다. 시각은 datetime64[m], 가격과 거래량은 int64입니다.
+        """
+        fields = FIELDS if fields is None else fields
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+
+        times, prices, volumes = [], [], []
+        for day in pd.date_range(start.normalize(), end.normalize(), freq='D'):
+            chunk = self._load(day, code)
+            if chunk is None:
+                continue
+            minutes, price, volume = chunk
+            times.append(np.datetime64(day.date(), 'm') + minutes.astype('timedelta64[m]'))
+            prices.append(price)
+            volumes.append(volume)
+
+        if times:
+            time_arr, price_arr, volume_arr = np.concatenate(times), np.concatenate(prices, axis=1), np.concatenate(volumes)
+        else:
+            time_arr, price_arr, volume_arr = np.array([], 'datetime64[m]'), np.zeros((4, 0), np.int64), np.array([], np.int64)
+
+        mask = (time_arr >= start.to_datetime64()) & (time_arr <= end.to_datetime64())
+        columns = {'시각': time_arr, **dict(zip(PRICE_FIELDS, price_arr)), '거래량': volume_arr}
+
+        return {field: columns[field][mask] for field in fields}
+
+def volume_profile(store, codes, start_date, end_date, bucket='30min', session_start='09:00'):
+    """
+    저장된 분봉으로 장중 구간별 거래량 비중을 계산하는 함수입니다. 종목별 하루 거래량으로 나눈 비중을 평균하므로
+    거래량이 많은 종목에 치우치지 않습니다. 결과는 DEFAULT_VOLUME_PROFILE과 같은 형태로 VWAP 주문 계획(plan_orders)의 profile에 사용합니다.
+
+    매개변수:
+        store (MinuteBarStore): 분봉 저장소입니다.
+        codes (list): 종목코드 리스트입니다.
+        start_date (date): 시작 거래일입니다.
+        end_date (date): 종료 거래일입니다.
+        bucket (str): 구간 길이입니다. 기본값은 '30min'입니다.
+        session_start (str): 장 시작 시각(HH:MM)입니다.
+
+    반환:
+        profile (Series): 'HH:MM' 구간 시작 시각을 인덱스로 하는 거래량 비중(합계 1)입니다. 분봉이 없으면 None입니다.
+    """
+    bucket_min = int(pd.Timedelta(bucket).total_seconds() // 60)
+    open_min = int(pd.Timedelta(session_start + ':00').total_seconds() // 60)
+    end = pd.Timestamp(end_date) + pd.Timedelta(days=1) - pd.Timedelta(minutes=1)
+
+    shares = []
+    for code in codes:
+        bars = store.read(code, start_date, end, fields=['시각', '거래량'])
+        if not len(bars['시각']) or bars['거래량'].sum() == 0:
+            continue
+        day = bars['시각'].astype('datetime64[D]')
+        minute = (bars['시각'] - day).astype(np.int64)
+        slot = np.maximum(minute - open_min, 0) // bucket_min
+
+        # 종목-일자별 구간 거래량을 하루 거래량으로 나눈 비중
+        frame = pd.DataFrame({'day': day, 'slot': slot, 'volume': bars['거래량']})
+        daily = frame.pivot_table(index='day', columns='slot', values='volume', aggfunc='sum', fill_value=0)
+        daily = daily[daily.sum(axis=1) > 0]
+        shares.append(daily.div(daily.sum(axis=1), axis=0))
+
+    if not shares:
+        return None
+
+    profile = pd.concat(shares).fillna(0).mean().sort_index()
+    profile.index = [(datetime.datetime(2000, 1, 1) + datetime.timedelta(minutes=open_min + int(s) * bucket_min)).strftime('%H:%M')
+                     for s in profile.index]
+
+    return profile / profile.sum()
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+# 테이블별 컬럼 타입
+# 반복되는 문자열(시장구분, 계정, 지표, 여러 행에 반복되는 종목코드 등)은 category로, 원 단위 정수 값(가격, EPS 등)은 float32로 보관합니다.
+# 종목별로 한 행뿐인 kr_base의 종목코드, 종목명은 category로 바꿔도 줄어들지 않으므로 그대로 둡니다.
+# 시가총액과 재무제표 값, 소수 넷째 자리까지 저장하는 가치지표는 float32의 유효숫자(7자리)를 넘을 수 있어 float64를 유지합니다.
+SCHEMAS = {
+    'kr_base': {
+        '시장구분': 'category', '종목구분': 'category', '종가': 'float32', '시가총액': 'float64',
+        'EPS': 'float32', '선행EPS': 'float32', 'BPS': 'float32', '주당배당금': 'float32',
+    },
+    'kr_sector': {
+        'IDX_CD': 'category', '기준일': 'datetime64[ns]',
+    },
+    'kr_price': {
+        '날짜': 'datetime64[ns]', '시가': 'float32', '고가': 'float32', '저가': 'float32', '종가': 'float32',
+        '거래량': 'int64', '종목코드': 'category',
+    },
+    'kr_fs': {
+        '계정': 'category', '기준일': 'datetime64[ns]', '값': 'float64', '종목코드': 'category', '공시구분': 'category',
+    },
+    'kr_value': {
+        '종목코드': 'category', '기준일': 'datetime64[ns]', '지표': 'category', '값': 'float64',
+    },
+}
+
+def apply_schema(df, table):
+    """
+    데이터 프레임의 컬럼을 SCHEMAS에 정의된 컴팩트한 타입으로 변환하는 함수입니다. 스키마에 없는 컬럼은 그대로 둡니다.
+    클린징 결과와 데이터베이스에서 읽은 데이터 모두 이 타입으로 맞추며, 데이터베이스에 쓸 때만 to_db_rows로 파이썬 값으로 바꿉니다.
+
+    매개변수:
+        df (DataFrame): 변환할 데이터 프레임입니다.
+        table (str): SCHEMAS의 테이블 이름입니다. (예: 'kr_price')
+
+    반환:
+        df (DataFrame): 타입이 변환된 데이터 프레임입니다.
+    """
+    df = df.copy(deep=False)
+    for col, dtype in SCHEMAS[table].items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if dtype == 'category':
+            df[col] = df[col].astype('category')
+        elif dtype.startswith('datetime'):
+            df[col] = pd.to_datetime(df[col])
+        else:
+            # 숫자는 변환할 수 없는 값(None, 빈 문자열 등)을 NaN으로 처리한 뒤 변환
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+
+    return df
+
+def concat_typed(chunks, table):
+    """
+    여러 조각으로 나누어 읽은 데이터를 조각마다 스키마 타입으로 변환한 뒤 하나로 합치는 함수입니다.
+    원본(object) 형태의 데이터는 한 조각만 메모리에 남으므로, 큰 테이블을 읽을 때 최대 메모리 사용량이 줄어듭니다.
+    조각마다 다른 category 값은 합치기 전에 하나의 범주 목록으로 맞추어 category 타입을 유지합니다.
+
+    매개변수:
+        chunks (iterable): DataFrame 조각들입니다. (예: pd.read_sql(..., chunksize=n)의 결과)
+        table (str): SCHEMAS의 테이블 이름입니다.
+
+    반환:
+        df (DataFrame): 합쳐진 데이터 프레임입니다.
+    """
+    typed = [apply_schema(chunk, table) for chunk in chunks]
+    if not typed:
+        return pd.DataFrame(columns=list(SCHEMAS[table]))
+    if len(typed) == 1:
+        return typed[0]
+
+    for col in typed[0].columns:
+        if isinstance(typed[0][col].dtype, pd.CategoricalDtype):
+            categories = pd.Index(pd.unique(np.concatenate([t[col].cat.categories.to_numpy(object) for t in typed])))
+            for t in typed:
+                t[col] = t[col].cat.set_categories(categories)
+
+    return pd.concat(typed, ignore_index=True)
+
+def to_db_rows(df):
+    """
+    데이터 프레임을 pymysql executemany에 넘길 행 리스트로 변환하는 함수입니다.
+    category는 문자열로, 날짜는 datetime.date로, 숫자는 파이썬 float/int로 바꾸며 NaN, 무한대, NaT는 None(NULL)으로 바꿉니다.
+
+    매개변수:
+        df (DataFrame): 저장할 데이터 프레임입니다. 컬럼 순서는 INSERT 쿼리의 컬럼 순서와 같아야 합니다.
+
+    반환:
+        rows (list): 행별 값 리스트의 리스트입니다.
+    """
+    columns = []
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            values = pd.Series(values.dt.date, index=values.index, dtype=object)
+        elif pd.api.types.is_float_dtype(values):
+            values = values.astype(np.float64).replace([np.inf, -np.inf], np.nan)
+        values = values.astype(object)
+        columns.append(values.where(values.notna(), None).tolist())
+
+    return [list(row) for row in zip(*columns)]
@@ -0,0 +1,117 @@
+import os
+import json
+import numpy as np
+
+# 유니버스 목록을 저장하는 기본 파일
+UNIVERSE_FILE = 'universe.json'
+
+# 유니버스 선정 기본 조건
+UNIVERSE_CONFIG = {
+    'markets': ['KOSPI', 'KOSDAQ', 'KOSDAQ GLOBAL'],   # 시장구분 (KRX는 코스닥 글로벌 세그먼트를 따로 표시)
+    'stock_types': ['보통주'],        # 종목구분
+    'min_market_cap': 5e10,           # 최소 시가총액 (원)
+    'min_price': 1000,                # 최소 종가 (원)
+    'min_traded_value': 1e8,          # 최소 평균 거래대금 (원)
+    'max_count': None,                # 시가총액 상위 종목 수 제한 (None일 경우 제한 없음)
+}
+
+def screen_candidates(base_df, config=None):
+    """
+    거래대금을 제외한 조건(시장구분, 종목구분, 시가총액, 종가)으로 유니버스 후보 종목을 선정하는 함수입니다.
+    후보 종목은 유니버스에서 빠지더라도 주가를 계속 수집하여 거래대금을 최신으로 유지합니다.
+
+    매개변수:
+        base_df (DataFrame): fetch_latest_base가 반환한 기본 정보 데이터 프레임입니다.
+        config (dict): UNIVERSE_CONFIG와 같은 형태의 선정 조건입니다. 주어진 항목만 기본값을 덮어씁니다.
+
+    반환:
+        candidates_df (DataFrame): 조건을 통과한 종목의 종목코드, 종목명, 시장구분, 종가, 시가총액 데이터 프레임입니다.
+    """
+    config = {**UNIVERSE_CONFIG, **(config or {})}
+
+    # 각 조건은 한 번의 벡터 연산으로 평가 (결측 시가총액/종가는 탈락)
+    keep = (base_df['시장구분'].isin(config['markets'])
+            & base_df['종목구분'].isin(config['stock_types'])
+            & (base_df['시가총액'] >= config['min_market_cap'])
+            & (base_df['종가'] >= config['min_price']))
+
+    return base_df.loc[keep, ['종목코드', '종목명', '시장구분', '종가', '시가총액']].reset_index(drop=True)
+
+def screen_universe(base_df, traded_df=None, config=None):
+    """
+    kr_base의 시장구분, 종목구분, 시가총액, 종가와 평균 거래대금으로 투자 유니버스를 선정하는 함수입니다.
+    가격 이력이 전혀 없는 종목(신규 상장)은 거래대금 조건을 통과한 것으로 보지만,
+    가격 이력이 있는데 최근 거래대금이 없는 종목(거래정지, 수집 중단 등)은 탈락시킵니다.
+
+    매개변수:
+        base_df (DataFrame): fetch_latest_base가 반환한 기본 정보 데이터 프레임입니다.
+        traded_df (DataFrame): fetch_traded_value가 반환한 종목별 평균 거래대금입니다. None일 경우 거래대금 조건을 적용하지 않습니다.
+        config (dict): UNIVERSE_CONFIG와 같은 형태의 선정 조건입니다. 주어진 항목만 기본값을 덮어씁니다.
+
+    반환:
+        universe_df (DataFrame): 조건을 통과한 종목의 종목코드, 종목명, 시장구분, 시가총액, 거래대금 데이터 프레임입니다. (시가총액 내림차순)
+    """
+    config = {**UNIVERSE_CONFIG, **(config or {})}
+
+    universe_df = screen_candidates(base_df, config)
+    if traded_df is not None:
+        universe_df = universe_df.merge(traded_df[['종목코드', '거래대금']], on='종목코드', how='left')
+        listed = universe_df['종목코드'].isin(traded_df['종목코드'])
+        universe_df = universe_df[~listed | (universe_df['거래대금'] >= config['min_traded_value'])]
+    else:
+        universe_df['거래대금'] = np.nan
+
+    universe_df = universe_df.sort_values('시가총액', ascending=False)
+    if config['max_count'] is not None:
+        universe_df = universe_df.head(config['max_count'])
+
+    return universe_df[['종목코드', '종목명', '시장구분', '시가총액', '거래대금']].reset_index(drop=True)
+
+def save_universe(universe_df, base_date, config=None, path=UNIVERSE_FILE, candidates_df=None):
+    """
+    선정된 유니버스와 후보 종목의 종목코드 목록을 선정 조건과 함께 JSON 파일로 저장하는 함수입니다.
+    임시 파일에 쓴 뒤 교체하므로 저장 중 중단되어도 기존 목록이 깨지지 않습니다.
+
+    매개변수:
+        universe_df (DataFrame): screen_universe가 반환한 데이터 프레임입니다.
+        base_date (str): 유니버스 선정에 사용한 kr_base 기준일입니다.
+        config (dict): 선정에 사용한 조건입니다.
+        path (str): 저장할 파일 경로입니다. 기본값은 UNIVERSE_FILE입니다.
+        candidates_df (DataFrame): screen_candidates가 반환한 후보 종목입니다. None일 경우 유니버스와 같습니다.
+    """
+    candidates_df = universe_df if candidates_df is None else candidates_df
+    universe = {
+        'date': str(base_date),
+        'config': {**UNIVERSE_CONFIG, **(config or {})},
+        'codes': universe_df['종목코드'].tolist(),
+        'candidates': sorted(set(candidates_df['종목코드']) | set(universe_df['종목코드'])),
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(universe, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+def load_universe(path=UNIVERSE_FILE, candidates=False):
+    """
+    저장된 유니버스의 종목코드 목록을 불러오는 함수입니다.
+
+    매개변수:
+        path (str): 유니버스 파일 경로입니다. None일 경우 유니버스를 사용하지 않습니다.
+        candidates (bool): True일 경우 후보 종목 전체(주가 수집 대상)를 불러옵니다. 후보 목록이 없는 이전 파일은 유니버스를 반환합니다.
+
+    반환:
+        codes (list): 종목코드 리스트입니다. 경로가 None이거나 파일이 없으면 None을 반환하며, 이 경우 전 종목을 대상으로 합니다.
+    """
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        universe = json.load(f)
+    return universe.get('candidates', universe['codes']) if candidates else universe['codes']
+
+def filter_universe(df, codes, code_col='종목코드'):
+    """
+    데이터 프레임에서 유니버스에 속한 종목만 남기는 함수입니다. codes가 None이면 그대로 반환합니다.
+    """
+    if codes is None:
+        return df
+    return df[df[code_col].isin(codes)].reset_index(drop=True)
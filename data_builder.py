@@ -1,16 +1,34 @@
 import sys
 from data.crawler import crawl_latest_trading_day
-from database.mysql_adapter import upsert_kr_base, upsert_kr_sector, upsert_kr_code, upsert_kr_price, upsert_kr_fs, upsert_kr_value
+from database.mysql_adapter import upsert_kr_base, upsert_kr_sector, upsert_kr_code, update_universe, upsert_kr_price, upsert_kr_fs, upsert_kr_value
 
-def main():
-    try:        
-        mkt_day = crawl_latest_trading_day()
-        upsert_kr_base(mkt_day)
-        upsert_kr_sector(mkt_day)
-        upsert_kr_code()
-        upsert_kr_price()
-        upsert_kr_fs()
-        upsert_kr_value()
+# 실행 순서대로 정리한 데이터 업데이트 단계
+STAGES = ['base', 'sector', 'code', 'universe', 'price', 'fs', 'value']
+
+def main(stages=None):
+    stages = STAGES if stages is None else stages
+    # 재무 단계에서 수집한 분기 데이터 (가치지표 단계의 증분 TTM 계산에 사용)
+    new_fs_df = None
+    try:
+        # 영업일은 거래소 데이터를 받는 단계에서만 조회
+        mkt_day = crawl_latest_trading_day() if {'base', 'sector'} & set(stages) else None
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            if stage == 'base':
+                upsert_kr_base(mkt_day)
+            elif stage == 'sector':
+                upsert_kr_sector(mkt_day)
+            elif stage == 'code':
+                upsert_kr_code()
+            elif stage == 'universe':
+                update_universe()
+            elif stage == 'price':
+                upsert_kr_price()
+            elif stage == 'fs':
+                _, new_fs_df = upsert_kr_fs()
+            elif stage == 'value':
+                upsert_kr_value(new_fs_df)
         print("Database update complete.")
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -3,9 +3,12 @@ import os
 import pandas as pd
 import time
 from tqdm import tqdm
-from mysql_reader import create_db_engine, fetch_kr_code, fetch_latest_base, fetch_quarterly_financials
-from data.cleanser import process_market_data, process_code_data, process_sector_data, process_price_data, process_financial_data, calculate_value_indicators
+from database.mysql_reader import create_db_engine, fetch_kr_code, fetch_latest_base, fetch_quarterly_financials, VALUE_ACCOUNTS, fetch_traded_value, fetch_recent_price, fetch_recent_base
+from data.cleanser import process_market_data, process_code_data, process_sector_data, process_price_batch, process_financial_data, calculate_value_indicators, update_ttm
 from data.crawler import crawl_mkt_data, crawl_sector_data, crawl_code_data, crawl_price_data, crawl_financial_data
+from data.schema import apply_schema, to_db_rows
+from data.universe import UNIVERSE_FILE, screen_candidates, screen_universe, save_universe, load_universe, filter_universe
+from data.corporate_actions import OVERLAP_DAYS, detect_share_changes, detect_price_revisions, incremental_start_dates
 
 def create_db_connection(db):
     """
@@ -58,7 +61,7 @@ def upsert_kr_base(mkt_day):
     """
 
     # 처리된 데이터 프레임에서 SQL 쿼리 실행을 위한 인자 리스트 추출
-    args = kr_base.values.tolist()
+    args = to_db_rows(kr_base)
 
     # SQL 쿼리 실행: 데이터베이스에 데이터 삽입 또는 업데이트
     mycursor.executemany(query, args)
@@ -96,7 +99,7 @@ def upsert_kr_sector(mkt_day):
     """
 
     # 처리된 데이터 프레임에서 SQL 쿼리 실행을 위한 인자 리스트 추출
-    args = kr_sector.values.tolist()
+    args = to_db_rows(kr_sector)
 
     # SQL 쿼리 실행
     mycursor.executemany(query, args)
@@ -132,7 +135,7 @@ def upsert_kr_code():
     """
 
     # 처리된 데이터 프레임에서 SQL 쿼리 실행을 위한 인자 리스트 추출
-    args = kr_code.values.tolist()
+    args = to_db_rows(kr_code)
 
     # SQL 쿼리 실행
     mycursor.executemany(query, args)
@@ -145,12 +148,53 @@ def upsert_kr_code():
 
 
 
-def upsert_kr_price():
+def update_universe(config=None, path=UNIVERSE_FILE):
     """
-    주가 데이터를 MySQL 데이터베이스에 있는 kr_price 테이블에 정보를 삽입하거나 업데이트합니다
-    
+    최신 kr_base와 kr_price의 최근 거래대금으로 투자 유니버스를 선정하여 파일로 저장합니다.
+    이후 종목별 크롤링(upsert_kr_price, upsert_kr_fs)과 model_portfolio는 이 목록의 종목만 처리합니다.
+
+    매개변수:
+        config (dict): 유니버스 선정 조건입니다. None일 경우 UNIVERSE_CONFIG를 사용합니다.
+        path (str): 유니버스 파일 경로입니다. 기본값은 UNIVERSE_FILE입니다.
+
+    반환:
+        universe_df (DataFrame): 선정된 유니버스 데이터 프레임입니다.
+    """
+    # 최신 기본정보 + 최근 평균 거래대금 불러오기
+    engine = create_db_engine(db='stock')
+    base_df = fetch_latest_base(engine)
+    traded_df = fetch_traded_value(engine)
+    engine.dispose()
+
+    # 조건에 맞는 종목 선정 후 저장 (거래대금 조건만 탈락한 후보 종목도 주가 수집 대상으로 함께 저장)
+    candidates_df = screen_candidates(base_df, config)
+    universe_df = screen_universe(base_df, traded_df, config)
+    save_universe(universe_df, base_df['기준일'].max(), config, path, candidates_df)
+    print(f"Universe: {len(universe_df)} / {len(candidates_df)} candidates / {len(base_df)} tickers")
+
+    return universe_df
+
+
+
+def upsert_kr_price(batch_size=100, universe_path=UNIVERSE_FILE, full=False):
+    """
+    주가 데이터를 MySQL 데이터베이스에 있는 kr_price 테이블에 정보를 삽입하거나 업데이트합니다.
+    크롤링 결과는 batch_size 종목씩 모아 process_price_batch로 한 번에 클린징한 뒤 저장합니다.
+
+    수정주가는 액면분할, 증자 등이 있으면 과거 전체가 바뀌므로, 다음 종목만 5년 전체를 다시 받고(기존 행 삭제 후 저장)
+    나머지 종목은 최근 OVERLAP_DAYS일 구간부터 증분으로 받습니다.
+        - 최근 두 기준일 사이에 상장주식수(시가총액 / 종가)가 바뀐 종목
+        - 증분으로 받은 주가와 저장된 주가의 겹치는 구간 종가가 다른 종목 (수정주가 변경)
+        - 최근 구간에 저장된 주가가 없는 종목 (신규 상장 등)
+
+    매개변수:
+        batch_size (int): 한 번에 클린징 및 저장할 종목 수입니다. 기본값은 100입니다.
+        universe_path (str): 유니버스 파일 경로입니다. 후보 종목 전체를 크롤링하며, 파일이 없거나 None일 경우 전 종목을 크롤링합니다.
+        full (bool): True일 경우 모든 종목을 전체 기간으로 다시 받습니다. 기본값은 False입니다.
+
     반환: 
         error_list (list): 오류난 지점의 종목코드를 저장한 리스트입니다.
+        fs_q_df (DataFrame): 이번에 수집한 분기 재무 데이터입니다. upsert_kr_value의 증분 TTM 계산에 사용합니다.
     """
     
     # 연결 객체와 커서 객체 생성하기
@@ -160,6 +204,10 @@ def upsert_kr_price():
     # 최신 기본정보 + 코드정보 불러오기
     base_df = fetch_latest_base(engine)
     code_list = fetch_kr_code(engine)
+
+    # 수정주가 변경 확인용 최근 주가와 상장주식수 변경 종목
+    stored_df = fetch_recent_price(engine, OVERLAP_DAYS)
+    share_changed = detect_share_changes(fetch_recent_base(engine))
     
     # DB 저장 쿼리 
     query = """
@@ -168,12 +216,63 @@ def upsert_kr_price():
         ON DUPLICATE KEY UPDATE
         시가 = new.시가, 고가 = new.고가, 저가 = new.저가, 종가 = new.종가, 거래량 = new.거래량;
     """
+    delete_query = "DELETE FROM kr_price WHERE 종목코드 = %s;"
     
     # 오류 발생시 저장할 리스트 생성
     error_list = []
+
+    # 전체 기간을 다시 받은 종목
+    reloaded = []
+
+    # 클린징 전 크롤링 원본을 모아둘 딕셔너리와 종목별 전체 조회 여부
+    batch = {}
+    full_codes = set()
+
+    def flush(batch, full_codes):
+        # 모아둔 종목을 한 번에 클린징 및 DB 저장
+        try:
+            kr_price = process_price_batch(batch)
+
+            # 증분으로 받은 종목 중 겹치는 구간의 수정주가가 바뀐 종목은 전체 기간을 다시 받음
+            revised = detect_price_revisions(kr_price[~kr_price['종목코드'].isin(list(full_codes))], stored_df)
+            if revised:
+                refetch = {}
+                for code in revised:
+                    refetch[code] = crawl_price_data(*finders[code])
+                    time.sleep(2)
+                kr_price = pd.concat([kr_price[~kr_price['종목코드'].isin(list(revised))].astype({'종목코드': str}),
+                                      process_price_batch(refetch).astype({'종목코드': str})], ignore_index=True)
+                full_codes = full_codes | revised
+
+            # 전체 기간을 받은 종목 중 저장된 주가가 하나라도 있는 종목은 이전 수정주가가 남지 않도록 삭제 후 저장
+            # (최근 구간에 주가가 없더라도 거래정지, 유니버스 재편입 등으로 과거 주가가 남아 있을 수 있음)
+            stale = []
+            if full_codes:
+                codes = sorted(full_codes)
+                cursor.execute(f"SELECT DISTINCT 종목코드 FROM kr_price WHERE 종목코드 IN ({', '.join(['%s'] * len(codes))});", codes)
+                stale = [[row[0]] for row in cursor.fetchall()]
+            if stale:
+                cursor.executemany(delete_query, stale)
+            args = to_db_rows(kr_price)
+            cursor.executemany(query, args)
+            con.commit()
+            reloaded.extend(stale)
+        except Exception as e:
+            con.rollback()
+            print(f"Error with batch {list(batch)[0]}~{list(batch)[-1]}: {e}")
+            error_list.extend(batch)
     
-    # 종목 정보 병합
+    # 종목 정보 병합 (유니버스 후보 종목만, 거래대금이 최신으로 유지되도록 유동성 조건만 탈락한 종목도 수집)
     merged_df = pd.merge(code_list, base_df, on='종목코드')
+    merged_df = filter_universe(merged_df, load_universe(universe_path, candidates=True))
+    finders = {row[0]: row for row in merged_df[['종목코드', '표준코드', '종목명']].itertuples(index=False, name=None)}
+
+    # 종목별 조회 시작일 (None이면 전체 기간)
+    start_dates = incremental_start_dates(stored_df, merged_df['종목코드'])
+    if full:
+        start_dates = dict.fromkeys(start_dates)
+    for code in share_changed:
+        start_dates[code] = None
     
     # 전종목 주가 다운로드 및 저장
     for i in tqdm(range(len(merged_df))):
@@ -183,43 +282,55 @@ def upsert_kr_price():
             STCD_finder = merged_df.loc[i, '표준코드']
             NM_finder = merged_df.loc[i, '종목명']
 
-            output_data = crawl_price_data(CD_finder, STCD_finder, NM_finder)
-            
-            # 데이터 처리 및 DB 저장
-            kr_price = process_price_data(output_data, CD_finder)
-            args = kr_price.values.tolist()
-            cursor.executemany(query, args)
-            con.commit()
+            batch[CD_finder] = crawl_price_data(CD_finder, STCD_finder, NM_finder, start_dates.get(CD_finder))
+            if start_dates.get(CD_finder) is None:
+                full_codes.add(CD_finder)
             
         except Exception as e:
             print(f"Error with {CD_finder}: {e}")
             error_list.append(CD_finder)
+
+        # 배치가 가득 차면 클린징 및 DB 저장
+        if len(batch) >= batch_size:
+            flush(batch, full_codes)
+            batch, full_codes = {}, set()
         
         time.sleep(2)  # Avoid rate limiting
 
+    # 남은 종목 저장
+    if batch:
+        flush(batch, full_codes)
+
     # Cleanup
     cursor.close()
     con.close()
+
+    print(f"Adjusted price history reloaded: {[code for code, in reloaded]}")
     
     return error_list
 
 
 
 
-def upsert_kr_fs():
+def upsert_kr_fs(universe_path=UNIVERSE_FILE):
     """
     재무 데이터를 MySQL 데이터베이스에 있는 kr_fs 테이블에 정보를 삽입하거나 업데이트합니다
 
+    매개변수:
+        universe_path (str): 유니버스 파일 경로입니다. 파일이 없거나 None일 경우 전 종목을 크롤링합니다.
+
     반환: 
         error_list (list): 오류난 지점의 종목코드를 저장한 리스트입니다.
+        fs_q_df (DataFrame): 이번에 수집한 분기 재무 데이터입니다. upsert_kr_value의 증분 TTM 계산에 사용합니다.
     """
 
     # 연결 객체와 커서 객체 생성하기
     engine = create_db_engine(db='stock')
     con, cursor = create_db_connection(db = 'stock')
 
-    # 기본정보 불러오기
+    # 기본정보 불러오기 (유니버스 종목만)
     base_df = fetch_latest_base(engine)
+    base_df = filter_universe(base_df, load_universe(universe_path))
 
     # DB 저장 쿼리
     query = """
@@ -231,6 +342,7 @@ def upsert_kr_fs():
 
     # 오류 발생시 저장할 리스트 생성
     error_list = []
+    fs_q_list = []
 
     # 종목 리스트를 반복하며 재무 데이터 처리
     for i in tqdm(range(len(base_df))):
@@ -249,9 +361,10 @@ def upsert_kr_fs():
             data_fs_bind = pd.concat([data_fs_y_clean, data_fs_q_clean])
 
             # 재무제표 데이터를 DB에 저장
-            args = data_fs_bind.values.tolist()
+            args = to_db_rows(data_fs_bind)
             cursor.executemany(query, args)
             con.commit()
+            fs_q_list.append(data_fs_q_clean[data_fs_q_clean['계정'].isin(VALUE_ACCOUNTS)])
 
         except Exception:
             # 오류 발생시 해당 종목코드 저장 후 다음 루프로 이동
@@ -264,14 +377,20 @@ def upsert_kr_fs():
     engine.dispose()
     con.close()
     
-    return error_list  # 오류가 발생한 종목코드 리스트 반환
+    fs_q_df = apply_schema(pd.concat(fs_q_list, ignore_index=True), 'kr_fs') if fs_q_list else None
 
+    return error_list, fs_q_df  # 오류가 발생한 종목코드 리스트와 수집한 분기 재무 데이터 반환
 
 
-def upsert_kr_value():
+
+def upsert_kr_value(new_fs_df=None):
     """
     분기별 재무제표와 기본 정보를 데이터베이스에서 불러와 가치지표를 계산한 뒤, 
     이를 데이터베이스의 kr_value 테이블에 저장하는 함수입니다.
+    새로 수집한 분기 데이터가 주어지면 전체 분기 이력 대신 해당 종목의 최근 4개 분기만 읽어 TTM을 증분 계산합니다.
+
+    매개변수:
+        new_fs_df (DataFrame): upsert_kr_fs가 반환한 분기 재무 데이터입니다. None일 경우 전체 분기 이력으로 계산합니다.
 
     반환:
         없음
@@ -280,14 +399,19 @@ def upsert_kr_value():
     engine = create_db_engine(db='stock')
     con, cursor = create_db_connection(db='stock')
 
-    # 분기 재무제표 불러오기
-    fs_df = fetch_quarterly_financials(engine)
-
     # 기본 정보 불러오기
     base_df = fetch_latest_base(engine)
 
-    # 가치지표 계산
-    kr_value = calculate_value_indicators(fs_df, base_df)
+    if new_fs_df is None:
+        # 분기 재무제표 전체 불러오기 후 가치지표 계산
+        fs_df = fetch_quarterly_financials(engine)
+        kr_value = calculate_value_indicators(fs_df, base_df)
+    else:
+        # 새 분기가 들어온 종목만 최근 4개 분기를 불러와 TTM을 증분 계산
+        codes = new_fs_df['종목코드'].astype(str).unique().tolist()
+        window_df = fetch_quarterly_financials(engine, codes=codes, recent=4)
+        ttm_df, _ = update_ttm(window_df, new_fs_df)
+        kr_value = calculate_value_indicators(window_df, base_df, ttm_df=ttm_df)
 
     # 계산된 가치지표를 데이터베이스에 저장
     query = """
@@ -297,7 +421,7 @@ def upsert_kr_value():
         값 = new.값;
     """
 
-    args_value = kr_value.values.tolist()
+    args_value = to_db_rows(kr_value)
     cursor.executemany(query, args_value)
     con.commit()
 
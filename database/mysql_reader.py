@@ -1,6 +1,11 @@
 import os
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text, bindparam
+
+from data.schema import apply_schema, concat_typed
+
+# 큰 테이블을 나누어 읽을 때 한 번에 읽을 행 수
+CHUNK_SIZE = 100_000
 
 def create_db_engine(db):
     """
@@ -20,6 +25,24 @@ def create_db_engine(db):
     return engine
 
 
+def read_sql_typed(query, engine, table, params=None, chunksize=CHUNK_SIZE):
+    """
+    쿼리 결과를 chunksize 행씩 나누어 읽으면서 바로 스키마 타입으로 변환하는 함수입니다.
+    서버 측 커서(stream_results)를 사용하므로 전체 결과를 object 형태로 한꺼번에 메모리에 올리지 않습니다.
+
+    매개변수:
+        query: 실행할 SQL 쿼리입니다.
+        engine: 데이터베이스 연결을 위한 SQLAlchemy 엔진 객체입니다.
+        table (str): 적용할 스키마의 테이블 이름입니다. (예: 'kr_price')
+        params (dict): 쿼리 파라미터입니다.
+        chunksize (int): 한 번에 읽을 행 수입니다. 기본값은 CHUNK_SIZE입니다.
+
+    반환:
+        df (DataFrame): 스키마 타입으로 변환된 데이터 프레임입니다.
+    """
+    with engine.connect().execution_options(stream_results=True) as con:
+        return concat_typed(pd.read_sql(query, con=con, params=params, chunksize=chunksize), table)
+
 def fetch_latest_base(engine):
     """
     데이터베이스에서 가장 최근일에 해당하는 보통주의 기본 정보를 가져옵니다.
@@ -37,7 +60,7 @@ def fetch_latest_base(engine):
         AND 종목구분 = '보통주';
     """, con=engine)
 
-    return base_df
+    return apply_schema(base_df, 'kr_base')
 
 def fetch_kr_code(engine):
     """
@@ -54,26 +77,44 @@ def fetch_kr_code(engine):
 
     return code_df
 
-def fetch_quarterly_financials(engine):
+# 가치지표(PER, PBR, PCR, PSR) 계산에 사용하는 분기 재무 계정
+VALUE_ACCOUNTS = ['당기순이익', '자본', '영업활동으로인한현금흐름', '매출액']
+
+def fetch_quarterly_financials(engine, codes=None, recent=None):
     """
     데이터베이스에서 '당기순이익', '자본', '영업활동으로인한현금흐름', '매출액'에 해당하는 분기별 재무 데이터를 가져옵니다.
 
     매개변수:
         engine: SQLAlchemy 엔진 객체입니다. 데이터베이스와의 연결을 위해 사용됩니다.
+        codes (list): 조회할 종목코드 목록입니다. None일 경우 전 종목입니다.
+        recent (int): 종목코드와 계정별로 최근 몇 개 분기만 가져올지 지정합니다. None일 경우 전체 분기입니다.
 
     반환:
         fs_df (DataFrame): 분기별 재무 데이터를 포함하는 데이터 프레임입니다.
     """
-    # 분기별 재무 데이터 조회 쿼리 실행
-    fs_df = pd.read_sql("""
-    SELECT * FROM kr_fs
-    WHERE 공시구분 = 'q'
-    AND 계정 IN ('당기순이익', '자본', '영업활동으로인한현금흐름', '매출액');
-    """, con=engine)
+    params = {'accounts': VALUE_ACCOUNTS}
+    where = "공시구분 = 'q' AND 계정 IN :accounts"
+    if codes is not None:
+        where += " AND 종목코드 IN :codes"
+        params['codes'] = list(codes)
+
+    # 분기별 재무 데이터 조회 쿼리 실행 (recent가 있으면 종목/계정별 최근 분기만)
+    if recent is None:
+        query = text(f"SELECT * FROM kr_fs WHERE {where};")
+    else:
+        query = text(f"""
+        SELECT 계정, 기준일, 값, 종목코드, 공시구분 FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY 종목코드, 계정 ORDER BY 기준일 DESC) AS rn
+            FROM kr_fs WHERE {where}
+        ) AS t
+        WHERE rn <= :recent;
+        """)
+        params['recent'] = recent
+    query = query.bindparams(*[bindparam(name, expanding=True) for name in ['accounts', 'codes'] if name in params])
+    fs_df = read_sql_typed(query, engine, 'kr_fs', params=params)
 
     return fs_df
 
-
 import pandas as pd
 
 def fetch_quarterly_financials_ver2(engine):
@@ -125,11 +166,11 @@ def fetch_recent_year_price(engine):
         price_df (DataFrame): 최근 1년 간의 날짜, 종가, 종목코드를 포함하는 데이터 프레임입니다.
     """
     # 최근 1년 간의 주가 정보 조회 쿼리 실행
-    price_df = pd.read_sql("""
+    price_df = read_sql_typed(text("""
     SELECT 날짜, 종가, 종목코드
     FROM kr_price
     WHERE 날짜 >= (SELECT MAX(날짜) FROM kr_price) - INTERVAL 1 YEAR;
-    """, con=engine)
+    """), engine, 'kr_price')
 
     return price_df
 
@@ -149,4 +190,146 @@ def fetch_latest_sector(engine):
     WHERE 기준일 = (SELECT MAX(기준일) FROM kr_sector);
     """, con=engine)
 
-    return sector_df
\ No newline at end of file
+    return apply_schema(sector_df, 'kr_sector')
+
+def fetch_price_history(engine, start_date=None):
+    """
+    데이터베이스에서 전체 기간(또는 start_date 이후)의 주가 정보를 가져오는 함수입니다. 백테스트에 사용됩니다.
+
+    매개변수:
+        engine: 데이터베이스 연결을 위한 SQLAlchemy 엔진 객체입니다.
+        start_date (str): 'YYYY-MM-DD' 형식의 조회 시작일입니다. None일 경우 전체 기간을 조회합니다.
+
+    반환:
+        price_df (DataFrame): 날짜, 종가, 종목코드를 포함하는 데이터 프레임입니다.
+    """
+    # 기간 조건이 있는 경우에만 WHERE 절 추가
+    query = "SELECT 날짜, 종가, 종목코드 FROM kr_price"
+    params = {}
+    if start_date is not None:
+        query += " WHERE 날짜 >= :start_date"
+        params['start_date'] = start_date
+
+    price_df = pd.read_sql(text(query), con=engine, params=params)
+
+    return price_df
+
+def fetch_value_history(engine):
+    """
+    데이터베이스에서 모든 기준일의 kr_value 정보를 가져오는 함수입니다. 백테스트에서 기준일 시점의 가치지표를 찾는 데 사용됩니다.
+
+    매개변수:
+        engine: 데이터베이스 연결을 위한 SQLAlchemy 엔진 객체입니다.
+
+    반환:
+        value_df (DataFrame): 종목코드, 기준일, 지표, 값을 포함하는 데이터 프레임입니다.
+    """
+    value_df = pd.read_sql("SELECT * FROM kr_value;", con=engine)
+
+    return value_df
+
+def fetch_quarterly_accounts(engine, accounts):
+    """
+    데이터베이스에서 지정한 계정들의 분기별 재무 데이터만 가져오는 함수입니다.
+
+    매개변수:
+        engine: 데이터베이스 연결 엔진입니다.
+        accounts (list): 조회할 계정명 리스트입니다. (예: ['당기순이익', '자본'])
+
+    반환:
+        fs_df (DataFrame): 종목코드, 계정, 기준일, 값을 포함하는 데이터 프레임입니다.
+    """
+    query = text("""
+        SELECT 종목코드, 계정, 기준일, 값 FROM kr_fs
+        WHERE 계정 IN :accounts
+        AND 공시구분 = 'q';
+    """).bindparams(bindparam('accounts', expanding=True))
+    fs_df = read_sql_typed(query, engine, 'kr_fs', params={'accounts': list(accounts)})
+
+    return fs_df
+
+def fetch_latest_indicators(engine, indicators):
+    """
+    데이터베이스에서 가장 최근 기준일의 kr_value 정보 중 지정한 지표만 가져오는 함수입니다.
+
+    매개변수:
+        engine: 데이터베이스 연결을 위한 SQLAlchemy 엔진 객체입니다.
+        indicators (list): 조회할 지표명 리스트입니다. (예: ['PBR', 'PER'])
+
+    반환:
+        value_df (DataFrame): 종목코드, 지표, 값을 포함하는 데이터 프레임입니다.
+    """
+    query = text("""
+        SELECT 종목코드, 지표, 값 FROM kr_value
+        WHERE 기준일 = (SELECT MAX(기준일) FROM kr_value)
+        AND 지표 IN :indicators;
+    """).bindparams(bindparam('indicators', expanding=True))
+    value_df = pd.read_sql(query, con=engine, params={'indicators': list(indicators)})
+
+    return apply_schema(value_df, 'kr_value')
+
+def fetch_traded_value(engine, days=30):
+    """
+    데이터베이스에서 최근 days일(달력 기준) 동안의 종목별 평균 거래대금(종가 × 거래량)을 가져오는 함수입니다.
+    유동성 기준으로 투자 유니버스를 정할 때 사용됩니다. 가격 이력이 있는 모든 종목을 반환하며,
+    최근 days일 동안 주가가 없는 종목의 거래대금은 NaN입니다. (이력이 없는 신규 상장 종목은 포함되지 않음)
+
+    매개변수:
+        engine: 데이터베이스 연결을 위한 SQLAlchemy 엔진 객체입니다.
+        days (int): 평균을 계산할 기간(일)입니다. 기본값은 30입니다.
+
+    반환:
+        traded_df (DataFrame): 종목코드, 거래대금 컬럼을 가진 데이터 프레임입니다.
+    """
+    query = text("""
+        SELECT 종목코드,
+               AVG(CASE WHEN 날짜 > (SELECT MAX(날짜) FROM kr_price) - INTERVAL :days DAY THEN 종가 * 거래량 END) AS 거래대금
+        FROM kr_price
+        GROUP BY 종목코드;
+    """)
+    traded_df = pd.read_sql(query, con=engine, params={'days': days})
+
+    return traded_df
+
+def fetch_recent_price(engine, days=14):
+    """
+    데이터베이스에서 최근 days일(달력 기준) 동안의 종목별 종가를 가져오는 함수입니다.
+    새로 받은 수정주가와 겹치는 구간을 비교하여 수정주가 변경(액면분할, 증자 등)을 찾는 데 사용됩니다.
+
+    매개변수:
+        engine: 데이터베이스 연결을 위한 SQLAlchemy 엔진 객체입니다.
+        days (int): 조회할 기간(일)입니다. 기본값은 14입니다.
+
+    반환:
+        price_df (DataFrame): 날짜, 종가, 종목코드를 포함하는 데이터 프레임입니다.
+    """
+    query = text("""
+        SELECT 날짜, 종가, 종목코드
+        FROM kr_price
+        WHERE 날짜 > (SELECT MAX(날짜) FROM kr_price) - INTERVAL :days DAY;
+    """)
+    price_df = pd.read_sql(query, con=engine, params={'days': days})
+
+    return apply_schema(price_df, 'kr_price')
+
+def fetch_recent_base(engine, n=2):
+    """
+    데이터베이스에서 최근 n개 기준일의 종목별 종가와 시가총액을 가져오는 함수입니다.
+    기준일 사이의 상장주식수(시가총액 / 종가) 변화를 확인하는 데 사용됩니다.
+
+    매개변수:
+        engine: 데이터베이스 연결을 위한 SQLAlchemy 엔진 객체입니다.
+        n (int): 조회할 기준일 수입니다. 기본값은 2입니다.
+
+    반환:
+        base_df (DataFrame): 종목코드, 종가, 시가총액, 기준일을 포함하는 데이터 프레임입니다.
+    """
+    query = text("""
+        SELECT b.종목코드, b.종가, b.시가총액, b.기준일
+        FROM kr_base b
+        JOIN (SELECT DISTINCT 기준일 FROM kr_base ORDER BY 기준일 DESC LIMIT :n) d
+        ON b.기준일 = d.기준일;
+    """)
+    base_df = pd.read_sql(query, con=engine, params={'n': n})
+
+    return base_df
@@ -0,0 +1,60 @@
+import sys
+import datetime
+import pandas as pd
+from trading.auth import load_app_keys
+from trading.account import AccountState
+from trading.trading import url_base
+from trading.plan import INVEST_RATIO, size_orders, build_plan, save_plan
+from data.minute_store import MinuteBarStore, volume_profile
+from portfolio.snapshot import load_snapshot
+from database.mysql_reader import create_db_engine, fetch_recent_price
+
+# VWAP 거래량 비중 계산에 사용할 최근 분봉 기간(달력 기준 일수)
+PROFILE_DAYS = 30
+
+def next_trade_date(now=None):
+    """
+    계획을 실행할 거래일을 반환합니다. 장 시작(09:00) 전이면 오늘(평일인 경우), 이후면 다음 평일입니다.
+    """
+    now = pd.Timestamp(now if now is not None else datetime.datetime.now())
+    today = now.normalize()
+    if now.hour < 9 and today.dayofweek < 5:
+        return today
+    return today + pd.offsets.BDay(1)
+
+def main(method='twap', trade_date=None, n_slices=10):
+    # 최신 포트폴리오 스냅샷의 투자 종목과 목표 비중
+    mp = load_snapshot(columns=['종목코드', 'invest', 'weight'])
+    mp = mp[mp['invest'] == 'Y'][['종목코드', 'weight']]
+
+    # 현재 잔고 (장 마감 후에도 조회 가능)
+    app_key, app_secret = load_app_keys()
+    account = AccountState(url_base, app_key, app_secret)
+    account.sync()
+    holdings = account.holdings()
+
+    # 가격은 데이터베이스의 종목별 최근 종가 (장 시작 시 현재가로 다시 맞춤)
+    engine = create_db_engine(db='stock')
+    price_df = fetch_recent_price(engine)
+    engine.dispose()
+    prices = price_df.sort_values('날짜').groupby('종목코드', observed=True)['종가'].last().astype(float)
+    prices.index = prices.index.astype(str)
+
+    target = size_orders(mp, holdings, prices, account.total_value * INVEST_RATIO)
+
+    day = pd.Timestamp(trade_date) if trade_date is not None else next_trade_date()
+    start_dt, end_dt = day + pd.Timedelta(hours=9), day + pd.Timedelta(hours=15, minutes=30)
+
+    # VWAP은 저장된 최근 분봉의 장중 거래량 비중을 사용 (분봉이 없으면 기본 비중)
+    profile = None
+    if method == 'vwap':
+        store = MinuteBarStore()
+        profile = volume_profile(store, target['종목코드'], day - pd.Timedelta(days=PROFILE_DAYS), day - pd.Timedelta(days=1))
+
+    plan = build_plan(target, start_dt, end_dt, method, n_slices, profile, account.total_value * INVEST_RATIO)
+    save_plan(plan)
+    print(f"Execution plan for {plan['trade_date']}: {len(plan['orders'])} child orders "
+          f"for {(target['투자수량'] != 0).sum()} tickers")
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else 'twap')
@@ -0,0 +1,375 @@
+import warnings
+
+import pandas as pd
+import numpy as np
+
+from database.mysql_reader import create_db_engine, fetch_price_history, fetch_quarterly_financials_ver2, fetch_value_history, fetch_latest_sector
+from data.cleanser import calculate_ttm, to_zscore_grouped
+from portfolio.portfolio_management import FACTOR_GROUPS, FACTOR_ASC
+
+def get_rebalance_index(dates):
+    """
+    거래일 목록에서 매월 마지막 거래일의 위치(행 번호)를 구하는 함수입니다.
+
+    매개변수:
+        dates (DatetimeIndex): 정렬된 거래일 인덱스입니다.
+
+    반환:
+        rebal_idx (ndarray): 월말 리밸런싱일의 행 번호 배열입니다.
+    """
+    dates = pd.DatetimeIndex(dates)
+    month = dates.year * 12 + dates.month
+    rebal_idx = np.flatnonzero(np.append(month[1:] != month[:-1], True))
+
+    return rebal_idx
+
+def calculate_momentum_panel(price_pivot, rebal_idx, lookback=252):
+    """
+    모든 리밸런싱일에 대해 12개월 수익률과 K-Ratio를 날짜 × 종목 행렬로 한 번에 계산하는 함수입니다.
+    누적 로그 수익률의 누적합(prefix sum)을 이용해, 각 리밸런싱일의 lookback 구간 회귀식을
+    calculate_k_ratio와 같은 닫힌 형태로 계산합니다. lookback 구간 내에 가격이 없는 날이 있거나
+    리밸런싱일에 실제 거래가 없는 종목은 NaN으로 처리합니다.
+
+    매개변수:
+        price_pivot (DataFrame): 날짜 × 종목코드 형태의 종가 데이터 프레임입니다.
+        rebal_idx (ndarray): 리밸런싱일의 행 번호 배열입니다.
+        lookback (int): 모멘텀 계산에 사용할 수익률 개수(거래일 수)입니다. 기본값은 252입니다.
+
+    반환:
+        momentum (dict): {'12M': DataFrame, 'K_ratio': DataFrame} 형태의 리밸런싱일 × 종목코드 행렬입니다.
+    """
+    raw = price_pivot.to_numpy(np.float64)
+    price = price_pivot.ffill().to_numpy(np.float64)
+    n_cols = raw.shape[1]
+
+    # 일별 로그 수익률과 누적 로그 수익률 (C[0] = 0)
+    log_ret = np.diff(np.log(price), axis=0, prepend=np.nan)
+    missing = np.isnan(log_ret)
+    log_ret[missing] = 0.0
+    missing[0] = False
+    cum = np.cumsum(log_ret, axis=0)
+
+    # 구간 합을 위한 누적합: ΣC, Σt·C, ΣC², 결측 개수
+    t = np.arange(len(cum), dtype=np.float64)[:, None]
+    zero = np.zeros((1, n_cols))
+    sum_c = np.vstack([zero, np.cumsum(cum, axis=0)])
+    sum_tc = np.vstack([zero, np.cumsum(t * cum, axis=0)])
+    sum_cc = np.vstack([zero, np.cumsum(cum * cum, axis=0)])
+    sum_miss = np.vstack([zero, np.cumsum(missing, axis=0)])
+
+    # 구간 (s, e] 의 합은 prefix[e + 1] - prefix[s + 1]
+    e = np.asarray(rebal_idx)
+    s = e - lookback
+    ok_row = s >= 0
+    e, s = e[ok_row], s[ok_row]
+    w = lookback
+
+    def window(prefix):
+        return prefix[e + 1] - prefix[s + 1]
+
+    c_s = cum[s]
+    sum_x = w * (w - 1) / 2
+    sxx = (w - 1) * w * (2 * w - 1) / 6
+    sxy = window(sum_tc) - (s + 1)[:, None] * window(sum_c) - c_s * sum_x
+    syy = window(sum_cc) - 2 * c_s * window(sum_c) + w * c_s ** 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = sxy / sxx
+        rss = np.maximum(syy - beta * sxy, 0)
+        k_ratio = beta / np.sqrt(rss / (w - 1) / sxx)
+        ret_12m = price[e] / price[s] - 1
+
+    # 구간 내 결측, 시작일 가격 없음, 리밸런싱일 미거래 종목 제외
+    valid = (window(sum_miss) == 0) & ~np.isnan(price[s]) & ~np.isnan(raw[e]) & np.isfinite(k_ratio)
+
+    index = price_pivot.index[np.asarray(rebal_idx)]
+    momentum = {}
+    for name, values in [('12M', ret_12m), ('K_ratio', k_ratio)]:
+        full = np.full((len(rebal_idx), n_cols), np.nan)
+        full[ok_row] = np.where(valid, values, np.nan)
+        momentum[name] = pd.DataFrame(full, index=index, columns=price_pivot.columns)
+
+    return momentum
+
+def _asof_panel(grid, long_df, date_col, tolerance_days):
+    """
+    (날짜, 종목코드) 격자의 각 행에 대해, 해당 날짜 이전에 이용 가능했던 가장 최근 값을 붙이는 내부 함수입니다.
+
+    매개변수:
+        grid (DataFrame): 날짜, 종목코드 컬럼을 가진 데이터 프레임입니다.
+        long_df (DataFrame): 종목코드, date_col 및 값 컬럼들을 가진 데이터 프레임입니다.
+        date_col (str): 값을 이용할 수 있게 되는 날짜 컬럼명입니다.
+        tolerance_days (int): 이 일수보다 오래된 값은 사용하지 않습니다.
+
+    반환:
+        panel (DataFrame): grid와 같은 순서로 값 컬럼이 추가된 데이터 프레임입니다.
+    """
+    left = grid.reset_index().sort_values('날짜', kind='mergesort')
+    right = long_df.rename(columns={date_col: '날짜'}).sort_values('날짜', kind='mergesort')
+    right['날짜'] = pd.to_datetime(right['날짜'])
+    panel = pd.merge_asof(left, right, on='날짜', by='종목코드',
+                          tolerance=pd.Timedelta(days=tolerance_days))
+
+    return panel.set_index('index').sort_index().drop(columns=['날짜', '종목코드'])
+
+def build_factor_panel(price_pivot, fs_df, value_df, sector_df, rebal_idx=None, lookback=252,
+                       report_lag_days=90, tolerance_days=400):
+    """
+    리밸런싱일마다 그 시점에 이용 가능한 데이터만으로 퀄리티, 밸류, 모멘텀 세부 지표를 계산하는 함수입니다.
+    model_portfolio를 날짜별로 반복 호출하지 않고, 모든 리밸런싱일의 지표를 한 번에 계산합니다.
+
+    매개변수:
+        price_pivot (DataFrame): 날짜 × 종목코드 형태의 종가 데이터 프레임입니다.
+        fs_df (DataFrame): 분기 재무 데이터(fetch_quarterly_financials_ver2)입니다.
+        value_df (DataFrame): 전체 기준일의 가치지표 데이터(fetch_value_history)입니다.
+        sector_df (DataFrame): 섹터 정보입니다. 섹터 이력이 없으므로 최신 분류를 전체 기간에 사용합니다.
+        rebal_idx (ndarray): 리밸런싱일의 행 번호 배열입니다. None일 경우 매월 마지막 거래일을 사용합니다.
+        lookback (int): 모멘텀 계산에 사용할 거래일 수입니다. 기본값은 252입니다.
+        report_lag_days (int): 분기 말부터 재무 데이터가 공시되어 이용 가능해지기까지의 일수입니다. 기본값은 90입니다.
+        tolerance_days (int): 이보다 오래된 재무/가치 데이터는 사용하지 않습니다. 기본값은 400입니다.
+
+    반환:
+        panel (DataFrame): 날짜, 종목코드, SEC_NM_KOR 및 FACTOR_ASC의 각 지표 컬럼을 가진 데이터 프레임입니다.
+    """
+    if rebal_idx is None:
+        rebal_idx = get_rebalance_index(price_pivot.index)
+    dates = price_pivot.index[rebal_idx]
+    codes = price_pivot.columns
+
+    # 리밸런싱일 × 종목코드 격자
+    grid = pd.DataFrame({'날짜': np.repeat(dates.values, len(codes)),
+                         '종목코드': np.tile(codes.values, len(dates))})
+
+    # 퀄리티: 분기별 TTM으로 ROE, GPA, CFO 계산 후 공시 지연을 반영한 이용 가능일 기준으로 연결
+    ttm_df = calculate_ttm(fs_df, latest_only=False)
+    fs_pivot = ttm_df.pivot_table(index=['종목코드', '기준일'], columns='계정', values='ttm', dropna=False)
+    fs_pivot = fs_pivot.reindex(columns=['당기순이익', '매출총이익', '영업활동으로인한현금흐름', '자산', '자본'])
+    quality = pd.DataFrame({
+        'ROE': fs_pivot['당기순이익'] / fs_pivot['자본'],
+        'GPA': fs_pivot['매출총이익'] / fs_pivot['자산'],
+        'CFO': fs_pivot['영업활동으로인한현금흐름'] / fs_pivot['자산'],
+    }).reset_index()
+    quality['기준일'] = pd.to_datetime(quality['기준일']) + pd.Timedelta(days=report_lag_days)
+    quality_panel = _asof_panel(grid, quality, '기준일', tolerance_days)
+
+    # 밸류: 각 기준일의 가치지표 중 리밸런싱일 이전의 가장 최근 값 (음수는 NaN)
+    value_df = value_df.copy()
+    value_df.loc[value_df['값'] <= 0, '값'] = np.nan
+    value_pivot = value_df.pivot_table(index=['종목코드', '기준일'], columns='지표', values='값', dropna=False)
+    value_pivot = value_pivot.reindex(columns=list(FACTOR_GROUPS['value'])).reset_index()
+    value_panel = _asof_panel(grid, value_pivot, '기준일', tolerance_days)
+
+    # 모멘텀: 리밸런싱일 × 종목 행렬을 한 번에 계산
+    momentum = calculate_momentum_panel(price_pivot, rebal_idx, lookback)
+
+    panel = pd.concat([grid, quality_panel, value_panel], axis=1)
+    for name, matrix in momentum.items():
+        panel[name] = matrix.to_numpy().ravel()
+
+    # 섹터 정보 (없는 경우 '기타')
+    sector_map = sector_df.drop_duplicates('CMP_CD').set_index('CMP_CD')['SEC_NM_KOR']
+    panel['SEC_NM_KOR'] = panel['종목코드'].map(sector_map).fillna('기타')
+
+    return panel[['날짜', '종목코드', 'SEC_NM_KOR'] + list(FACTOR_ASC)]
+
+def normalize_factor_panel(panel, cutoff=0.01):
+    """
+    팩터 패널을 날짜와 섹터별로 z-score 정규화하고, 팩터 그룹별로 합산한 뒤 날짜별로 다시 z-score를 구하는 함수입니다.
+    model_portfolio의 정규화 과정을 모든 리밸런싱일에 대해 한 번에 수행합니다.
+
+    매개변수:
+        panel (DataFrame): build_factor_panel이 반환한 데이터 프레임입니다.
+        cutoff (float): 양 끝에서 제외할 데이터의 비율입니다. 기본값은 0.01 입니다.
+
+    반환:
+        score_df (DataFrame): 날짜, 종목코드, SEC_NM_KOR 및 FACTOR_GROUPS의 각 그룹(quality, value, momentum) 컬럼을 가진 데이터 프레임입니다.
+                              모든 그룹의 점수가 계산되기 전의 리밸런싱일은 제외됩니다.
+    """
+    # (날짜, 섹터) 조합을 하나의 그룹으로 사용
+    date_id = pd.factorize(panel['날짜'])[0].astype(np.int64)
+    sector_id, sector_uniques = pd.factorize(panel['SEC_NM_KOR'])
+    group = pd.Series(date_id * len(sector_uniques) + sector_id, index=panel.index)
+
+    z_df = to_zscore_grouped(panel.assign(_group=group), '_group', FACTOR_ASC, cutoff=cutoff)
+
+    score_df = panel[['날짜', '종목코드', 'SEC_NM_KOR']].copy()
+    for name, factors in FACTOR_GROUPS.items():
+        score = z_df[list(factors)].sum(axis=1, skipna=False)
+
+        # 날짜별 z-score (scipy.stats.zscore의 nan_policy='omit'과 동일)
+        by_date = score.groupby(panel['날짜'])
+        score_df[name] = (score - by_date.transform('mean')) / by_date.transform('std', ddof=0)
+
+    # 팩터 그룹 중 하나라도 점수가 전혀 없는 초기 리밸런싱일(가치지표 이력 시작 전, 모멘텀 lookback 미달)은
+    # 모든 종목의 합산 점수가 NaN이 되어 전액 현금 기간으로 계산되므로, 모든 그룹이 계산되는 첫 날부터 사용
+    covered = score_df[list(FACTOR_GROUPS)].notna().groupby(score_df['날짜']).any().all(axis=1)
+    if not covered.any():
+        raise ValueError("모든 팩터 그룹의 점수가 계산되는 리밸런싱일이 없습니다.")
+    first_date = covered.idxmax()
+    if first_date > covered.index[0]:
+        warnings.warn(f"팩터 점수가 없는 리밸런싱일 {(covered.index < first_date).sum()}개를 제외하고 "
+                      f"{first_date:%Y-%m-%d}부터 사용합니다.")
+        score_df = score_df[score_df['날짜'] >= first_date].reset_index(drop=True)
+
+    return score_df
+
+def select_portfolio(score_df, wts=(0.3, 0.3, 0.3), top_n=20):
+    """
+    팩터 그룹별 점수에 비중을 곱해 합산하고, 날짜별로 합산 점수 상위 top_n 종목을 동일가중으로 선택하는 함수입니다.
+
+    매개변수:
+        score_df (DataFrame): normalize_factor_panel이 반환한 데이터 프레임입니다.
+        wts (list): FACTOR_GROUPS 순서(quality, value, momentum)의 팩터별 비중입니다.
+        top_n (int): 날짜별로 선택할 종목 수입니다. 기본값은 20입니다.
+
+    반환:
+        weight_df (DataFrame): 리밸런싱일 × 종목코드 형태의 목표 비중 데이터 프레임입니다.
+    """
+    qvm = (score_df[list(FACTOR_GROUPS)] * list(wts)).sum(axis=1, skipna=False)
+
+    # 합산 점수의 순위가 top_n 이내인 종목을 선택 (동점은 종목코드 순서로 정해 날짜별로 정확히 top_n개, select_weights와 동일)
+    selected = qvm.groupby(score_df['날짜']).rank(method='first') <= top_n
+    weight = selected.astype(np.float64) / selected.groupby(score_df['날짜']).transform('sum')
+
+    weight_df = pd.DataFrame({'날짜': score_df['날짜'], '종목코드': score_df['종목코드'], 'weight': weight.fillna(0)})
+    weight_df = weight_df.pivot(index='날짜', columns='종목코드', values='weight').fillna(0)
+
+    return weight_df
+
+def calculate_period_growth(price_pivot, dates, codes):
+    """
+    리밸런싱일부터 다음 리밸런싱일까지 종목별 가격 변화율(종료 가격 / 시작 가격)을 계산하는 함수입니다.
+
+    매개변수:
+        price_pivot (DataFrame): 날짜 × 종목코드 형태의 종가 데이터 프레임입니다.
+        dates (DatetimeIndex): 리밸런싱일 인덱스입니다.
+        codes (Index): 종목코드 순서입니다.
+
+    반환:
+        start (DatetimeIndex): 보유 기간 시작일(리밸런싱일)입니다. 보유 기간이 없는 마지막 날은 제외됩니다.
+        growth (ndarray): 보유 기간 × 종목 형태의 가격 변화율 배열입니다. 가격이 없으면 NaN입니다.
+    """
+    # 보유 기간 종료일: 다음 리밸런싱일, 마지막은 가격 데이터의 마지막 날
+    price = price_pivot.ffill().reindex(columns=codes)
+    start = pd.DatetimeIndex(dates)
+    end = start[1:].append(pd.DatetimeIndex([price.index[-1]]))
+    keep = end > start
+    start, end = start[keep], end[keep]
+
+    growth = price.loc[end].to_numpy(np.float64) / price.loc[start].to_numpy(np.float64)
+
+    return start, growth
+
+def simulate_weights(w, growth, cost_bps=30):
+    """
+    보유 기간별 목표 비중 배열과 가격 변화율 배열로 수익률, 회전율, 거래비용을 계산하는 함수입니다.
+
+    매개변수:
+        w (ndarray): 보유 기간 × 종목 형태의 목표 비중 배열입니다. 비중 합이 1보다 작으면 나머지는 현금입니다.
+        growth (ndarray): calculate_period_growth가 반환한 가격 변화율 배열입니다.
+        cost_bps (float): 매매금액 대비 편도 거래비용(bp)입니다. 기본값은 30입니다.
+
+    반환:
+        result (dict): 보유 종목 수(n), 수익률(gross), 회전율(turnover), 거래비용(cost), 비용 차감 수익률(net) 배열입니다.
+    """
+    growth = np.where(w > 0, np.nan_to_num(growth, nan=1.0), 1.0)
+
+    # 기간 수익률과 기간 말 비중 변화 (drift), 투자하지 않은 비중은 현금으로 보유
+    gross = (w * growth).sum(axis=1) + (1 - w.sum(axis=1))
+    drifted = w * growth / np.where(gross > 0, gross, 1.0)[:, None]
+
+    # 회전율: 리밸런싱 직전 비중(이전 기간 말 비중)과 목표 비중의 차이
+    before = np.vstack([np.zeros((1, w.shape[1])), drifted[:-1]])
+    turnover = np.abs(w - before).sum(axis=1)
+    cost = turnover * cost_bps / 10000
+
+    result = {
+        'n': (w > 0).sum(axis=1),
+        'gross': gross - 1,
+        'turnover': turnover,
+        'cost': cost,
+        'net': gross * (1 - cost) - 1,
+    }
+
+    return result
+
+def run_backtest(weight_df, price_pivot, cost_bps=30):
+    """
+    리밸런싱일별 목표 비중으로 다음 리밸런싱일까지 보유했을 때의 수익률, 회전율, 거래비용을 계산하는 함수입니다.
+
+    매개변수:
+        weight_df (DataFrame): 리밸런싱일 × 종목코드 형태의 목표 비중 데이터 프레임입니다.
+        price_pivot (DataFrame): 날짜 × 종목코드 형태의 종가 데이터 프레임입니다.
+        cost_bps (float): 매매금액 대비 편도 거래비용(bp)입니다. 기본값은 30입니다.
+
+    반환:
+        result_df (DataFrame): 리밸런싱일별 보유 종목 수(n), 수익률(gross), 회전율(turnover),
+                               거래비용(cost), 비용 차감 수익률(net), 누적 수익률(cum) 데이터 프레임입니다.
+    """
+    start, growth = calculate_period_growth(price_pivot, weight_df.index, weight_df.columns)
+    w = weight_df.loc[start].to_numpy(np.float64)
+
+    result_df = pd.DataFrame(simulate_weights(w, growth, cost_bps), index=start)
+    result_df['cum'] = (1 + result_df['net']).cumprod() - 1
+
+    return result_df
+
+def summarize_backtest(result_df, periods_per_year=12):
+    """
+    백테스트 결과로부터 주요 성과 지표를 계산하는 함수입니다.
+
+    매개변수:
+        result_df (DataFrame): run_backtest가 반환한 데이터 프레임입니다.
+        periods_per_year (int): 연간 리밸런싱 횟수입니다. 기본값은 12(월별)입니다.
+
+    반환:
+        summary (dict): CAGR, 연변동성(vol), 샤프지수(sharpe), 최대낙폭(mdd), 평균 회전율(turnover)입니다.
+    """
+    net = result_df['net']
+    wealth = (1 + net).cumprod()
+    years = len(net) / periods_per_year
+    vol = net.std() * np.sqrt(periods_per_year)
+
+    summary = {
+        'cagr': wealth.iloc[-1] ** (1 / years) - 1 if len(net) else np.nan,
+        'vol': vol,
+        'sharpe': net.mean() * periods_per_year / vol if vol > 0 else np.nan,
+        'mdd': (wealth / wealth.cummax() - 1).min(),
+        'turnover': result_df['turnover'].mean(),
+    }
+
+    return summary
+
+def backtest_qvm(wts=(0.3, 0.3, 0.3), top_n=20, cost_bps=30, start_date=None, lookback=252):
+    """
+    데이터베이스의 kr_price, kr_fs, kr_value로 QVM 모델의 월별 리밸런싱 백테스트를 수행하는 함수입니다.
+
+    매개변수:
+        wts (list): quality, value, momentum 팩터별 비중입니다. 기본값은 model_portfolio와 같은 [0.3, 0.3, 0.3]입니다.
+        top_n (int): 리밸런싱일마다 선택할 종목 수입니다. 기본값은 20입니다.
+        cost_bps (float): 편도 거래비용(bp)입니다. 기본값은 30입니다.
+        start_date (str): 'YYYY-MM-DD' 형식의 주가 조회 시작일입니다. None일 경우 전체 기간입니다.
+        lookback (int): 모멘텀 계산에 사용할 거래일 수입니다. 기본값은 252입니다.
+
+    반환:
+        result_df (DataFrame): run_backtest가 반환한 리밸런싱일별 결과입니다.
+        summary (dict): summarize_backtest가 반환한 성과 지표입니다.
+    """
+    # 데이터베이스에서 필요한 데이터 불러오기
+    engine = create_db_engine(db='stock')
+    price_df = fetch_price_history(engine, start_date)
+    fs_df = fetch_quarterly_financials_ver2(engine)
+    value_df = fetch_value_history(engine)
+    sector_df = fetch_latest_sector(engine)
+    engine.dispose()
+
+    price_pivot = price_df.pivot(index='날짜', columns='종목코드', values='종가')
+    price_pivot.index = pd.to_datetime(price_pivot.index)
+
+    # 팩터 계산 → 정규화 → 종목 선택 → 수익률 계산
+    panel = build_factor_panel(price_pivot, fs_df, value_df, sector_df, lookback=lookback)
+    score_df = normalize_factor_panel(panel)
+    weight_df = select_portfolio(score_df, wts, top_n)
+    result_df = run_backtest(weight_df, price_pivot, cost_bps)
+
+    return result_df, summarize_backtest(result_df)
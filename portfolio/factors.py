@@ -0,0 +1,224 @@
+import pandas as pd
+import numpy as np
+
+from database.mysql_reader import fetch_quarterly_accounts, fetch_latest_indicators, fetch_recent_year_price
+from data.cleanser import calculate_ttm
+from portfolio.panel import PricePanel
+
+# 팩터 계산에 공유되는 중간 결과와 팩터 정의
+# 각 항목은 입력 테이블별 필요 항목(inputs), 의존하는 중간 결과(depends), 계산 함수(func)를 가집니다.
+INTERMEDIATES = {}
+FACTORS = {}
+
+# 입력 테이블별 로더: (engine, 필요한 항목 리스트) -> DataFrame
+TABLE_LOADERS = {
+    'fs': fetch_quarterly_accounts,
+    'value': fetch_latest_indicators,
+    'price': lambda engine, items: fetch_recent_year_price(engine),
+}
+
+def register_intermediate(name, inputs=None, depends=()):
+    """
+    여러 팩터가 공유하는 중간 결과(예: 가격 피벗, TTM 피벗)를 등록하는 데코레이터입니다.
+
+    매개변수:
+        name (str): 중간 결과 이름입니다.
+        inputs (dict): {테이블명: [필요 항목]} 형태의 입력 요구사항입니다.
+        depends (tuple): 먼저 계산되어야 하는 다른 중간 결과 이름입니다.
+    """
+    def decorator(func):
+        INTERMEDIATES[name] = {'inputs': inputs or {}, 'depends': tuple(depends), 'func': func}
+        return func
+    return decorator
+
+def register_factor(name, group, asc, inputs=None, depends=()):
+    """
+    팩터를 등록하는 데코레이터입니다. 계산 함수는 FactorContext를 받아 종목코드 인덱스의 Series를 반환해야 합니다.
+
+    매개변수:
+        name (str): 팩터 이름입니다. (예: 'ROE')
+        group (str): 팩터 그룹입니다. (예: 'quality')
+        asc (bool): z-score 계산 시 순위 방향입니다. to_zscore의 asc와 같은 의미입니다.
+        inputs (dict): {테이블명: [필요 항목]} 형태의 입력 요구사항입니다. (예: {'fs': ['당기순이익', '자본']})
+        depends (tuple): 계산에 사용하는 중간 결과 이름입니다.
+    """
+    def decorator(func):
+        FACTORS[name] = {'group': group, 'asc': asc, 'inputs': inputs or {},
+                         'depends': tuple(depends), 'func': func}
+        return func
+    return decorator
+
+def factor_groups():
+    """
+    등록된 팩터를 그룹별로 묶어 {그룹: {팩터: asc}} 형태로 반환합니다. 그룹과 팩터는 등록 순서를 따릅니다.
+    """
+    groups = {}
+    for name, factor in FACTORS.items():
+        groups.setdefault(factor['group'], {})[name] = factor['asc']
+
+    return groups
+
+def resolve_inputs(names):
+    """
+    계산할 팩터 목록에 필요한 테이블별 항목을 의존 관계를 따라 모두 모으는 함수입니다.
+
+    매개변수:
+        names (list): 계산할 팩터 이름 리스트입니다.
+
+    반환:
+        inputs (dict): {테이블명: 필요 항목 리스트} 형태의 딕셔너리입니다.
+    """
+    inputs = {}
+    stack = [FACTORS[name] for name in names]
+    seen = set()
+    while stack:
+        spec = stack.pop()
+        for table, items in spec['inputs'].items():
+            inputs.setdefault(table, [])
+            inputs[table] += [item for item in items if item not in inputs[table]]
+        for dep in spec['depends']:
+            if dep not in seen:
+                seen.add(dep)
+                stack.append(INTERMEDIATES[dep])
+
+    return inputs
+
+def load_factor_tables(engine, names):
+    """
+    계산할 팩터에 필요한 테이블만, 필요한 항목만 데이터베이스에서 불러오는 함수입니다.
+
+    매개변수:
+        engine: 데이터베이스 연결 엔진입니다.
+        names (list): 계산할 팩터 이름 리스트입니다.
+
+    반환:
+        tables (dict): {테이블명: DataFrame} 형태의 딕셔너리입니다.
+    """
+    tables = {table: TABLE_LOADERS[table](engine, items) for table, items in resolve_inputs(names).items()}
+
+    return tables
+
+class FactorContext:
+    """
+    팩터 계산 시 테이블과 중간 결과를 제공하는 객체입니다.
+    중간 결과는 처음 요청될 때 한 번만 계산되고, 이후에는 여러 팩터가 같은 결과를 공유합니다.
+
+    매개변수:
+        tables (dict): load_factor_tables가 반환한 {테이블명: DataFrame} 딕셔너리입니다.
+    """
+    def __init__(self, tables):
+        self.tables = tables
+        self._cache = {}
+
+    def __getitem__(self, name):
+        if name in self.tables:
+            return self.tables[name]
+        if name not in self._cache:
+            self._cache[name] = INTERMEDIATES[name]['func'](self)
+        return self._cache[name]
+
+def compute_factors(names, tables):
+    """
+    지정한 팩터만 계산하여 종목코드 인덱스의 데이터 프레임으로 반환하는 함수입니다.
+
+    매개변수:
+        names (list): 계산할 팩터 이름 리스트입니다.
+        tables (dict): load_factor_tables가 반환한 {테이블명: DataFrame} 딕셔너리입니다.
+
+    반환:
+        factor_df (DataFrame): 종목코드를 인덱스로, 팩터를 컬럼으로 하는 데이터 프레임입니다.
+    """
+    ctx = FactorContext(tables)
+    factor_df = pd.DataFrame({name: FACTORS[name]['func'](ctx) for name in names})
+    factor_df.index.name = '종목코드'
+
+    return factor_df
+
+def calculate_k_ratio(ret_cum):
+    """
+    누적 로그 수익률 행렬의 모든 종목(열)에 대해 K-Ratio(절편 없는 회귀의 기울기 / 표준오차)를 한 번에 계산합니다.
+    종목별로 sm.OLS를 반복하는 대신 닫힌 형태의 회귀식을 NumPy로 계산하며,
+    상장/상장폐지 등으로 값이 없는 구간은 제외하고 종목별 유효 관측치 수를 사용합니다.
+
+    매개변수:
+        ret_cum (DataFrame): 날짜 × 종목코드 형태의 누적 로그 수익률 데이터 프레임입니다.
+
+    반환:
+        k_ratio (Series): 종목코드를 인덱스로 하는 K-Ratio 시리즈입니다. 관측치가 2개 미만이면 NaN입니다.
+    """
+    y = ret_cum.to_numpy(np.float64)
+    valid = ~np.isnan(y)
+    n = valid.sum(axis=0)
+
+    # 종목별 첫 유효일을 x=0으로 두는 시간축 (늦게 상장된 종목도 처음부터 회귀)
+    first = np.where(n > 0, valid.argmax(axis=0), 0)
+    x = np.where(valid, np.arange(len(y))[:, None] - first, 0.0)
+    y = np.where(valid, y, 0.0)
+
+    # 절편 없는 회귀: b = Σxy / Σx², se = sqrt(RSS / (n - 1) / Σx²)
+    sxx = (x * x).sum(axis=0)
+    sxy = (x * y).sum(axis=0)
+    syy = (y * y).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = sxy / sxx
+        rss = np.maximum(syy - beta * sxy, 0)
+        se = np.sqrt(rss / (n - 1) / sxx)
+        k_ratio = beta / se
+
+    k_ratio[(n < 2) | ~np.isfinite(k_ratio)] = np.nan
+
+    return pd.Series(k_ratio, index=ret_cum.columns, name='K_ratio')
+
+
+# 공유 중간 결과
+@register_intermediate('ttm_pivot', inputs={'fs': []})
+def _ttm_pivot(ctx):
+    # 종목코드 × 계정 형태의 최신 분기 TTM
+    return calculate_ttm(ctx['fs']).pivot(index='종목코드', columns='계정', values='ttm')
+
+@register_intermediate('value_pivot', inputs={'value': []})
+def _value_pivot(ctx):
+    # 음수인 가치지표는 NaN으로 처리한 종목코드 × 지표 피벗
+    value_df = ctx['value'].copy()
+    value_df.loc[value_df['값'] <= 0, '값'] = np.nan
+    return value_df.pivot(index='종목코드', columns='지표', values='값')
+
+@register_intermediate('price_panel', inputs={'price': []})
+def _price_panel(ctx):
+    # 날짜 × 종목 float32 가격 패널 (수익률 등 파생 배열은 패널 안에 캐시되어 팩터 간 공유)
+    return PricePanel.from_long(ctx['price'])
+
+
+# 퀄리티 지표
+@register_factor('ROE', 'quality', False, inputs={'fs': ['당기순이익', '자본']}, depends=('ttm_pivot',))
+def _roe(ctx):
+    return ctx['ttm_pivot']['당기순이익'] / ctx['ttm_pivot']['자본']
+
+@register_factor('GPA', 'quality', False, inputs={'fs': ['매출총이익', '자산']}, depends=('ttm_pivot',))
+def _gpa(ctx):
+    return ctx['ttm_pivot']['매출총이익'] / ctx['ttm_pivot']['자산']
+
+@register_factor('CFO', 'quality', False, inputs={'fs': ['영업활동으로인한현금흐름', '자산']}, depends=('ttm_pivot',))
+def _cfo(ctx):
+    return ctx['ttm_pivot']['영업활동으로인한현금흐름'] / ctx['ttm_pivot']['자산']
+
+
+# 밸류 지표 (kr_value에 저장된 지표를 그대로 사용)
+def _register_value_factor(name, asc):
+    @register_factor(name, 'value', asc, inputs={'value': [name]}, depends=('value_pivot',))
+    def _value(ctx):
+        return ctx['value_pivot'].reindex(columns=[name])[name]
+
+for _name, _asc in [('PBR', True), ('PCR', True), ('PER', True), ('PSR', True), ('DY', False)]:
+    _register_value_factor(_name, _asc)
+
+
+# 모멘텀 지표
+@register_factor('12M', 'momentum', False, depends=('price_panel',))
+def _ret_12m(ctx):
+    return ctx['price_panel'].lookback_return()
+
+@register_factor('K_ratio', 'momentum', False, depends=('price_panel',))
+def _k_ratio(ctx):
+    panel = ctx['price_panel']
+    return calculate_k_ratio(panel.to_frame(panel.cum_log_returns()))
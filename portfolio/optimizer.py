@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+
+def _demeaned_returns(panel):
+    """
+    가격 패널의 일별 수익률을 종목별로 평균을 뺀 배열로 만드는 내부 함수입니다. 결측 수익률은 0(평균)으로 채웁니다.
+    """
+    ret = np.asarray(panel.returns(), dtype=np.float64)
+    valid = ~np.isnan(ret)
+    ret = np.where(valid, ret, 0.0)
+    mean = ret.sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    x = np.where(valid, ret - mean, 0.0)
+
+    return x
+
+def ledoit_wolf_covariance(x):
+    """
+    Ledoit-Wolf(2004) 방식으로 표본 공분산을 상수 분산(μI) 목표로 축소한 공분산을 계산하는 함수입니다.
+    N × N 행렬을 만들지 않고 T × T 그람 행렬로 축소 강도를 계산하며, 결과는 대각 + 저차원 형태로 반환합니다.
+
+    매개변수:
+        x (ndarray): 날짜(T) × 종목(N) 형태의 평균이 제거된 수익률 배열입니다.
+
+    반환:
+        cov (dict): {'diag': (N,), 'loadings': (N, T), 'factor_cov': (T, T)} 형태의 공분산입니다.
+                    공분산 = diag(diag) + loadings @ factor_cov @ loadings.T
+    """
+    t, n = x.shape
+    gram = x @ x.T  # T × T
+
+    # 표본 공분산 S = XᵀX / T 의 대각합과 프로베니우스 노름 (||XᵀX||_F = ||XXᵀ||_F)
+    trace_s = np.trace(gram) / t
+    norm_s2 = (gram ** 2).sum() / t ** 2
+    mu = trace_s / n
+
+    # 축소 강도: b² / d²
+    d2 = norm_s2 - 2 * mu * trace_s + n * mu ** 2
+    b2_bar = ((np.diag(gram) ** 2).sum() - t * norm_s2) / t ** 2
+    b2 = min(b2_bar, d2)
+    shrink = b2 / d2 if d2 > 0 else 1.0
+
+    cov = {
+        'diag': np.full(n, shrink * mu),
+        'loadings': x.T,
+        'factor_cov': np.eye(t) * (1 - shrink) / t,
+    }
+
+    return cov
+
+def factor_model_covariance(x, n_factors=5):
+    """
+    수익률의 주성분(통계적 팩터)으로 팩터 모델 공분산(B F Bᵀ + D)을 추정하는 함수입니다.
+    종목 수 N에 대해 O(N) 메모리만 사용하며, N × N 행렬을 만들지 않습니다.
+
+    매개변수:
+        x (ndarray): 날짜(T) × 종목(N) 형태의 평균이 제거된 수익률 배열입니다.
+        n_factors (int): 사용할 팩터 수입니다. 기본값은 5입니다.
+
+    반환:
+        cov (dict): {'diag': 고유 분산 (N,), 'loadings': B (N, k), 'factor_cov': F (k, k)} 형태의 공분산입니다.
+    """
+    t, n = x.shape
+    k = min(n_factors, t, n)
+
+    # 절단 SVD: X ≈ U_k S_k V_kᵀ, 팩터 수익률 f = U_k S_k, 로딩 B = V_k
+    u, s, vt = np.linalg.svd(x, full_matrices=False)
+    loadings = vt[:k].T
+    factor_ret = u[:, :k] * s[:k]
+
+    # 팩터로 설명되지 않는 고유 분산
+    resid = x - factor_ret @ loadings.T
+    cov = {
+        'diag': (resid ** 2).mean(axis=0),
+        'loadings': loadings,
+        'factor_cov': factor_ret.T @ factor_ret / t,
+    }
+
+    return cov
+
+def covariance_subset(cov, idx):
+    """
+    대각 + 저차원 형태의 공분산에서 선택한 종목들만의 (작은) 공분산 행렬을 만드는 함수입니다.
+
+    매개변수:
+        cov (dict): ledoit_wolf_covariance 혹은 factor_model_covariance가 반환한 공분산입니다.
+        idx (ndarray): 선택할 종목의 위치 배열입니다.
+
+    반환:
+        sigma (ndarray): len(idx) × len(idx) 형태의 공분산 행렬입니다.
+    """
+    b = cov['loadings'][idx]
+    sigma = b @ cov['factor_cov'] @ b.T + np.diag(cov['diag'][idx])
+
+    return sigma
+
+def _project_capped_simplex(v, cap):
+    """
+    벡터를 {0 <= w <= cap, Σw = 1} 집합으로 사영하는 내부 함수입니다. (이분법으로 이동량 τ를 찾음)
+    """
+    lo, hi = v.min() - cap, v.max()
+    for _ in range(100):
+        tau = (lo + hi) / 2
+        if np.clip(v - tau, 0, cap).sum() > 1:
+            lo = tau
+        else:
+            hi = tau
+
+    return np.clip(v - (lo + hi) / 2, 0, cap)
+
+def min_variance_weights(sigma, max_weight=1.0, n_iter=1000):
+    """
+    롱온리 및 종목별 최대 비중 제약 하에서 최소분산 비중을 사영 경사하강법으로 계산하는 함수입니다.
+
+    매개변수:
+        sigma (ndarray): n × n 공분산 행렬입니다.
+        max_weight (float): 종목별 최대 비중입니다. 1/n보다 작으면 1/n을 사용합니다.
+        n_iter (int): 반복 횟수입니다. 기본값은 1000입니다.
+
+    반환:
+        w (ndarray): 합이 1인 비중 배열입니다.
+    """
+    n = len(sigma)
+    cap = max(max_weight, 1 / n)
+    step = 1 / np.linalg.eigvalsh(sigma)[-1]
+
+    w = np.full(n, 1 / n)
+    for _ in range(n_iter):
+        w_new = _project_capped_simplex(w - step * (sigma @ w), cap)
+        if np.abs(w_new - w).max() < 1e-10:
+            break
+        w = w_new
+
+    return w_new
+
+def risk_parity_weights(sigma, max_weight=1.0, n_iter=500):
+    """
+    종목별 위험 기여도가 같아지는 리스크 패리티 비중을 최대 비중 제약 안에서 계산하는 함수입니다.
+    최대 비중에 걸린 종목은 그 비중으로 고정하고, 나머지 종목끼리 위험 기여도가 같아지도록 다시 계산합니다.
+
+    매개변수:
+        sigma (ndarray): n × n 공분산 행렬입니다.
+        max_weight (float): 종목별 최대 비중입니다. 1/n보다 작으면 1/n을 사용합니다.
+        n_iter (int): 반복 횟수입니다. 기본값은 500입니다.
+
+    반환:
+        w (ndarray): 합이 1인 비중 배열입니다.
+    """
+    n = len(sigma)
+    cap = max(max_weight, 1 / n)
+    capped = np.zeros(n, dtype=bool)
+
+    # 위험 기여도 w_i (Σw)_i 가 같아지도록 곱셈 갱신
+    w = 1 / np.sqrt(np.diag(sigma))
+    w /= w.sum()
+    for _ in range(n_iter):
+        # 한계 위험 (Σw)_i 가 0 이하이면 갱신값이 NaN이 되므로 작은 양수로 제한
+        w_new = np.sqrt(w / np.maximum(sigma @ w, 1e-12))
+
+        # 고정되지 않은 종목에 남은 비중을 나누고, 최대 비중을 넘는 종목은 고정한 뒤 다시 나눔
+        while True:
+            w_new[capped] = cap
+            free = ~capped
+            w_new[free] *= (1 - cap * capped.sum()) / w_new[free].sum()
+            over = free & (w_new > cap)
+            if not over.any():
+                break
+            capped |= over
+
+        if np.abs(w_new - w).max() < 1e-12:
+            break
+        w = w_new
+
+    return w_new
+
+def optimize_portfolio(final_df, panel, method='min_variance', cov_model='factor', max_weight=0.1, n_factors=5):
+    """
+    model_portfolio에서 선택된 종목(invest == 'Y')의 목표 비중을 공분산을 고려하여 계산하는 함수입니다.
+    공분산은 1년 가격 패널의 전체 종목으로 추정한 뒤 선택 종목만 잘라 사용합니다.
+
+    매개변수:
+        final_df (DataFrame): model_portfolio가 반환한 데이터 프레임입니다.
+        panel (PricePanel): 최근 1년 가격 패널입니다.
+        method (str): 'min_variance', 'risk_parity', 'equal' 중 하나입니다. 기본값은 'min_variance'입니다.
+        cov_model (str): 'factor'(통계적 팩터 모델) 혹은 'ledoit_wolf'입니다. 기본값은 'factor'입니다.
+        max_weight (float): 종목별 최대 비중입니다. 기본값은 0.1입니다.
+        n_factors (int): 팩터 모델의 팩터 수입니다. 기본값은 5입니다.
+
+    반환:
+        final_df (DataFrame): 목표 비중(weight) 컬럼이 추가된 데이터 프레임입니다. 선택되지 않은 종목은 0입니다.
+    """
+    final_df = final_df.copy()
+    codes = final_df.loc[final_df['invest'] == 'Y', '종목코드']
+
+    # 가격 이력이 있는 선택 종목만 최적화 대상
+    pos = panel.codes.get_indexer(codes)
+    codes, pos = codes[pos >= 0], pos[pos >= 0]
+
+    if method == 'equal' or len(codes) < 2:
+        w = np.full(len(codes), 1 / max(len(codes), 1))
+    else:
+        x = _demeaned_returns(panel)
+        if cov_model == 'ledoit_wolf':
+            cov = ledoit_wolf_covariance(x)
+        else:
+            cov = factor_model_covariance(x, n_factors)
+        sigma = covariance_subset(cov, pos)
+
+        if method == 'risk_parity':
+            w = risk_parity_weights(sigma, max_weight)
+        else:
+            w = min_variance_weights(sigma, max_weight)
+
+    weight = pd.Series(w, index=codes.values)
+    final_df['weight'] = final_df['종목코드'].map(weight).fillna(0.0)
+
+    return final_df
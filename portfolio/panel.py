@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+class PricePanel:
+    """
+    날짜 × 종목 형태의 가격 행렬을 연속된 NumPy 배열로 보관하고, 수익률/로그수익률/롤링/기간수익률 계산을 제공하는 객체입니다.
+    계산 결과는 한 번만 만들어 캐시하므로 여러 팩터가 같은 수익률을 다시 계산하지 않으며,
+    열(종목) 단위로 chunk_size씩 나누어 계산하여 중간 임시 배열의 메모리 사용량을 제한합니다.
+    memmap_path를 지정하면 가격과 파생 배열을 디스크의 메모리 맵 파일에 저장합니다.
+
+    매개변수:
+        values (ndarray): 날짜 × 종목 형태의 가격 배열입니다.
+        dates (DatetimeIndex): 날짜 인덱스입니다.
+        codes (Index): 종목코드 인덱스입니다.
+        dtype: 저장할 데이터 타입입니다. 기본값은 np.float32입니다.
+        memmap_path (str): 메모리 맵 파일 경로(접두어)입니다. None일 경우 메모리에 보관합니다.
+        chunk_size (int): 한 번에 계산할 종목 수입니다. 기본값은 512입니다.
+    """
+    def __init__(self, values, dates, codes, dtype=np.float32, memmap_path=None, chunk_size=512):
+        self.dates = pd.DatetimeIndex(dates)
+        self.codes = pd.Index(codes, name='종목코드')
+        self.dtype = np.dtype(dtype)
+        self.memmap_path = memmap_path
+        self.chunk_size = chunk_size
+        self._cache = {}
+
+        self.values = self._alloc('price', (len(self.dates), len(self.codes)))
+        self.values[:] = values
+
+    @classmethod
+    def from_long(cls, df, date_col='날짜', code_col='종목코드', value_col='종가', **kwargs):
+        """
+        (날짜, 종목코드, 종가) 형태의 긴 데이터 프레임에서 pivot 없이 바로 패널을 생성합니다.
+        """
+        date_id, dates = pd.factorize(pd.to_datetime(df[date_col]), sort=True)
+        code_id, codes = pd.factorize(df[code_col], sort=True)
+
+        values = np.full((len(dates), len(codes)), np.nan, dtype=kwargs.get('dtype', np.float32))
+        values[date_id, code_id] = df[value_col].to_numpy()
+
+        return cls(values, dates, codes, **kwargs)
+
+    @classmethod
+    def from_frame(cls, price_pivot, **kwargs):
+        """
+        날짜 × 종목코드 형태의 데이터 프레임(price_pivot)으로 패널을 생성합니다.
+        """
+        return cls(price_pivot.to_numpy(), price_pivot.index, price_pivot.columns, **kwargs)
+
+    def _alloc(self, name, shape):
+        # 메모리 맵 사용 시 이름별 파일에, 아니면 메모리에 배열 생성
+        if self.memmap_path is None:
+            return np.empty(shape, dtype=self.dtype)
+        return np.memmap(f'{self.memmap_path}.{name}', dtype=self.dtype, mode='w+', shape=shape)
+
+    def _chunks(self):
+        # 종목 방향으로 chunk_size씩 나눈 슬라이스
+        for start in range(0, len(self.codes), self.chunk_size):
+            yield slice(start, start + self.chunk_size)
+
+    def to_frame(self, values=None, dates=None):
+        """
+        패널(또는 같은 종목 순서의 파생 배열)을 날짜 × 종목코드 데이터 프레임으로 반환합니다. 배열은 복사하지 않습니다.
+        """
+        values = self.values if values is None else values
+        dates = self.dates[-len(values):] if dates is None else dates
+        return pd.DataFrame(values, index=dates, columns=self.codes, copy=False)
+
+    def ffill(self):
+        """
+        종목별로 결측 가격을 직전 가격으로 채운 배열을 반환합니다. (상장 전 결측은 유지)
+        """
+        if 'ffill' not in self._cache:
+            out = self._alloc('ffill', self.values.shape)
+            rows = np.arange(len(self.dates))[:, None]
+            for cols in self._chunks():
+                block = self.values[:, cols]
+                idx = np.maximum.accumulate(np.where(np.isnan(block), 0, rows), axis=0)
+                out[:, cols] = np.take_along_axis(block, idx, axis=0)
+            self._cache['ffill'] = out
+        return self._cache['ffill']
+
+    def returns(self):
+        """
+        일별 단순 수익률 배열((날짜 - 1) × 종목)을 반환합니다. 결측 가격은 직전 가격으로 채운 뒤 계산합니다.
+        (pandas pct_change의 기본 동작과 같음)
+        """
+        if 'returns' not in self._cache:
+            price = self.ffill()
+            out = self._alloc('returns', (len(self.dates) - 1, len(self.codes)))
+            for cols in self._chunks():
+                block = price[:, cols].astype(np.float64)
+                out[:, cols] = block[1:] / block[:-1] - 1
+            self._cache['returns'] = out
+        return self._cache['returns']
+
+    def log_returns(self):
+        """
+        일별 로그 수익률 배열((날짜 - 1) × 종목)을 반환합니다.
+        """
+        if 'log_returns' not in self._cache:
+            ret = self.returns()
+            out = self._alloc('log_returns', ret.shape)
+            for cols in self._chunks():
+                out[:, cols] = np.log1p(ret[:, cols].astype(np.float64))
+            self._cache['log_returns'] = out
+        return self._cache['log_returns']
+
+    def cum_log_returns(self):
+        """
+        누적 로그 수익률 배열((날짜 - 1) × 종목)을 반환합니다. 결측은 건너뛰고 누적합니다. (pandas cumsum과 같음)
+        """
+        if 'cum_log_returns' not in self._cache:
+            log_ret = self.log_returns()
+            out = self._alloc('cum_log_returns', log_ret.shape)
+            for cols in self._chunks():
+                block = log_ret[:, cols].astype(np.float64)
+                missing = np.isnan(block)
+                cum = np.cumsum(np.where(missing, 0, block), axis=0)
+                cum[missing] = np.nan
+                out[:, cols] = cum
+            self._cache['cum_log_returns'] = out
+        return self._cache['cum_log_returns']
+
+    def lookback_return(self, periods=None):
+        """
+        마지막 날 가격과 periods 거래일 전 가격으로 기간 수익률을 계산합니다. periods가 None이면 패널 전체 기간을 사용하며,
+        패널 기간보다 긴 periods도 패널 첫날부터의 수익률로 계산합니다.
+
+        반환:
+            ret (Series): 종목코드 인덱스의 기간 수익률입니다.
+        """
+        if periods is not None and periods < 0:
+            raise ValueError(f'periods must be non-negative: {periods}')
+        # 음수 위치가 끝에서부터 인덱싱되지 않도록 패널 첫날로 제한
+        first = 0 if periods is None else max(len(self.dates) - 1 - periods, 0)
+        ret = self.values[-1].astype(np.float64) / self.values[first].astype(np.float64) - 1
+        return pd.Series(ret, index=self.codes)
+
+    def rolling_sum(self, window, values=None):
+        """
+        종목별 이동 합계 배열을 반환합니다. 구간 내에 결측이 있으면 NaN입니다. (pandas rolling(window).sum()과 같음)
+
+        매개변수:
+            window (int): 이동 구간 길이입니다.
+            values (ndarray): 계산할 배열입니다. None일 경우 가격 배열을 사용합니다.
+        """
+        values = self.values if values is None else values
+        out = np.full(values.shape, np.nan, dtype=self.dtype)
+        for cols in self._chunks():
+            block = values[:, cols].astype(np.float64)
+            missing = np.isnan(block)
+            csum = np.cumsum(np.where(missing, 0, block), axis=0)
+            cmiss = np.cumsum(missing, axis=0)
+            total = csum[window - 1:].copy()
+            total[1:] -= csum[:-window]
+            n_miss = cmiss[window - 1:].copy()
+            n_miss[1:] -= cmiss[:-window]
+            out[window - 1:, cols] = np.where(n_miss == 0, total, np.nan)
+        return out
+
+    def rolling_mean(self, window, values=None):
+        """
+        종목별 이동 평균 배열을 반환합니다. 구간 내에 결측이 있으면 NaN입니다.
+        """
+        return self.rolling_sum(window, values) / window
+
+    def tail(self, periods):
+        """
+        마지막 periods 거래일만 담은 새 패널을 반환합니다.
+        """
+        return PricePanel(self.values[-periods:], self.dates[-periods:], self.codes,
+                          dtype=self.dtype, chunk_size=self.chunk_size)
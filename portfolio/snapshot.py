@@ -0,0 +1,141 @@
+import os
+import json
+import datetime
+import pandas as pd
+import numpy as np
+
+# 포트폴리오 스냅샷(리밸런싱일별 Parquet 파일)과 매니페스트를 저장하는 기본 폴더
+SNAPSHOT_DIR = 'portfolio_snapshots'
+MANIFEST_FILE = 'manifest.json'
+
+def _read_manifest(path):
+    """
+    매니페스트 파일을 읽어 스냅샷 목록(리밸런싱일 오름차순)을 반환하는 내부 함수입니다. 파일이 없으면 빈 리스트입니다.
+    """
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)['snapshots']
+
+def _write_manifest(path, snapshots):
+    """
+    스냅샷 목록을 임시 파일에 쓴 뒤 교체하여, 중간에 중단되어도 매니페스트가 깨지지 않도록 저장하는 내부 함수입니다.
+    """
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'snapshots': snapshots}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+def save_snapshot(final_df, rebalance_date=None, path=SNAPSHOT_DIR):
+    """
+    model_portfolio(및 optimize_portfolio)의 결과 전체를 리밸런싱일별 Parquet 파일로 저장하고 매니페스트를 갱신하는 함수입니다.
+    같은 리밸런싱일의 스냅샷이 이미 있으면 덮어씁니다.
+
+    매개변수:
+        final_df (DataFrame): 종목코드, 점수, 섹터, invest, weight 등이 담긴 데이터 프레임입니다.
+        rebalance_date (str): 'YYYYMMDD' 형식의 리밸런싱일입니다. None일 경우 오늘 날짜를 사용합니다.
+        path (str): 스냅샷 폴더 경로입니다. 기본값은 SNAPSHOT_DIR입니다.
+
+    반환:
+        file_path (str): 저장된 Parquet 파일 경로입니다.
+    """
+    if rebalance_date is None:
+        rebalance_date = datetime.date.today().strftime('%Y%m%d')
+    os.makedirs(path, exist_ok=True)
+
+    # 동일가중 등으로 weight가 없으면 선택 종목에 동일 비중 부여
+    final_df = final_df.copy()
+    if 'weight' not in final_df.columns:
+        invest = final_df['invest'] == 'Y'
+        final_df['weight'] = np.where(invest, 1 / max(invest.sum(), 1), 0.0)
+
+    file_name = f'{rebalance_date}.parquet'
+    tmp_path = os.path.join(path, file_name + '.tmp')
+    final_df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, os.path.join(path, file_name))
+
+    # 매니페스트 갱신 (리밸런싱일 기준 정렬)
+    snapshots = [s for s in _read_manifest(path) if s['date'] != rebalance_date]
+    snapshots.append({
+        'date': rebalance_date,
+        'file': file_name,
+        'rows': int(len(final_df)),
+        'invest': int((final_df['invest'] == 'Y').sum()),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+    })
+    snapshots.sort(key=lambda s: s['date'])
+    _write_manifest(path, snapshots)
+
+    return os.path.join(path, file_name)
+
+def list_snapshots(path=SNAPSHOT_DIR):
+    """
+    저장된 스냅샷 목록을 데이터 프레임으로 반환하는 함수입니다.
+
+    매개변수:
+        path (str): 스냅샷 폴더 경로입니다.
+
+    반환:
+        snapshot_df (DataFrame): date, file, rows, invest, created 컬럼을 가진 데이터 프레임입니다.
+    """
+    return pd.DataFrame(_read_manifest(path), columns=['date', 'file', 'rows', 'invest', 'created'])
+
+def load_snapshot(rebalance_date=None, path=SNAPSHOT_DIR, columns=None):
+    """
+    리밸런싱일의 스냅샷을 불러오는 함수입니다. 매니페스트만 읽고 바로 해당 파일을 열기 때문에 빠르게 불러올 수 있습니다.
+
+    매개변수:
+        rebalance_date (str): 'YYYYMMDD' 형식의 리밸런싱일입니다. None일 경우 가장 최근 스냅샷입니다.
+        path (str): 스냅샷 폴더 경로입니다.
+        columns (list): 불러올 컬럼 리스트입니다. None일 경우 전체 컬럼입니다.
+
+    반환:
+        snapshot (DataFrame): 저장된 포트폴리오 데이터 프레임입니다.
+    """
+    snapshots = _read_manifest(path)
+    if not snapshots:
+        raise FileNotFoundError(f'No portfolio snapshot in {path}')
+
+    if rebalance_date is None:
+        entry = snapshots[-1]
+    else:
+        entry = next((s for s in snapshots if s['date'] == rebalance_date), None)
+        if entry is None:
+            raise FileNotFoundError(f'No portfolio snapshot for {rebalance_date}')
+
+    return pd.read_parquet(os.path.join(path, entry['file']), columns=columns)
+
+def diff_snapshots(old_date=None, new_date=None, path=SNAPSHOT_DIR):
+    """
+    두 리밸런싱일 스냅샷의 목표 비중 차이를 계산하는 함수입니다.
+
+    매개변수:
+        old_date (str): 이전 리밸런싱일입니다. None일 경우 new_date 직전 스냅샷입니다.
+        new_date (str): 새 리밸런싱일입니다. None일 경우 가장 최근 스냅샷입니다.
+        path (str): 스냅샷 폴더 경로입니다.
+
+    반환:
+        diff_df (DataFrame): 종목코드, weight_old, weight_new, delta, action(편입/편출/증가/감소/유지) 컬럼을 가진 데이터 프레임입니다.
+    """
+    dates = [s['date'] for s in _read_manifest(path)]
+    if new_date is None:
+        new_date = dates[-1] if dates else None
+    if old_date is None:
+        prev = [d for d in dates if new_date is not None and d < new_date]
+        old_date = prev[-1] if prev else None
+
+    columns = ['종목코드', 'weight']
+    new = load_snapshot(new_date, path, columns)
+    old = load_snapshot(old_date, path, columns) if old_date is not None else pd.DataFrame(columns=columns)
+
+    diff_df = old.merge(new, on='종목코드', how='outer', suffixes=('_old', '_new'))
+    diff_df[['weight_old', 'weight_new']] = diff_df[['weight_old', 'weight_new']].astype(float).fillna(0.0)
+    diff_df = diff_df[(diff_df['weight_old'] > 0) | (diff_df['weight_new'] > 0)]
+    diff_df['delta'] = diff_df['weight_new'] - diff_df['weight_old']
+    diff_df['action'] = np.select(
+        [diff_df['weight_old'] == 0, diff_df['weight_new'] == 0, diff_df['delta'] > 0, diff_df['delta'] < 0],
+        ['편입', '편출', '증가', '감소'], default='유지')
+
+    return diff_df.sort_values('delta', ascending=False).reset_index(drop=True)
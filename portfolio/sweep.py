@@ -0,0 +1,167 @@
+import os
+import shutil
+import tempfile
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+from portfolio.backtest import calculate_period_growth, simulate_weights, summarize_backtest
+from portfolio.portfolio_management import FACTOR_GROUPS
+
+# 작업 프로세스별로 한 번만 여는 메모리 맵 패널
+_panel_cache = {}
+
+def make_weight_grid(step=0.1, n_factors=3):
+    """
+    합이 1이 되는 팩터 비중 조합을 step 간격으로 모두 생성하는 함수입니다.
+
+    매개변수:
+        step (float): 비중 간격입니다. 기본값은 0.1입니다.
+        n_factors (int): 팩터 개수입니다. 기본값은 3(quality, value, momentum)입니다.
+
+    반환:
+        wts_list (list): 비중 튜플의 리스트입니다.
+    """
+    n_step = int(round(1 / step))
+    wts_list = [tuple(np.round(np.array(c) * step, 10))
+                for c in itertools.product(range(n_step + 1), repeat=n_factors) if sum(c) == n_step]
+
+    return wts_list
+
+def save_sweep_panel(score_df, price_pivot, path):
+    """
+    정규화된 팩터 점수와 보유 기간 가격 변화율을 NumPy 파일로 저장하는 함수입니다.
+    작업 프로세스들은 이 파일을 메모리 맵으로 열어 데이터를 복사하지 않고 공유합니다.
+
+    매개변수:
+        score_df (DataFrame): normalize_factor_panel이 반환한 데이터 프레임입니다.
+        price_pivot (DataFrame): 날짜 × 종목코드 형태의 종가 데이터 프레임입니다.
+        path (str): 패널 파일을 저장할 폴더 경로입니다.
+
+    반환:
+        dates (DatetimeIndex): 보유 기간 시작일(리밸런싱일) 인덱스입니다.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    # 리밸런싱일 × 종목코드 형태의 팩터 그룹별 점수 (factor, date, ticker)
+    pivots = [score_df.pivot(index='날짜', columns='종목코드', values=name) for name in FACTOR_GROUPS]
+    dates, codes = pivots[0].index, pivots[0].columns
+    start, growth = calculate_period_growth(price_pivot, dates, codes)
+    scores = np.stack([p.loc[start].to_numpy(np.float64) for p in pivots])
+
+    # 종목별 섹터 코드
+    sector = score_df.drop_duplicates('종목코드').set_index('종목코드')['SEC_NM_KOR'].reindex(codes)
+    sector_id = pd.factorize(sector)[0]
+
+    np.save(os.path.join(path, 'scores.npy'), scores)
+    np.save(os.path.join(path, 'growth.npy'), growth)
+    np.save(os.path.join(path, 'sector.npy'), sector_id)
+
+    return start
+
+def _load_sweep_panel(path):
+    """
+    저장된 패널을 메모리 맵으로 열고 작업 프로세스 안에서 재사용하는 내부 함수입니다.
+    """
+    if path not in _panel_cache:
+        _panel_cache[path] = tuple(np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+                                   for name in ['scores', 'growth', 'sector'])
+
+    return _panel_cache[path]
+
+def select_weights(scores, sector_id, wts, top_n, max_per_sector=None):
+    """
+    팩터 점수에 비중을 곱해 합산하고, 날짜별로 합산 점수가 낮은(좋은) 순서대로 top_n 종목을 동일가중으로 선택하는 함수입니다.
+    select_portfolio와 같은 규칙이며, 섹터별 최대 종목 수 제약을 추가로 적용할 수 있습니다.
+
+    매개변수:
+        scores (ndarray): (팩터, 날짜, 종목) 형태의 팩터 그룹별 점수 배열입니다.
+        sector_id (ndarray): 종목별 섹터 코드 배열입니다.
+        wts (tuple): 팩터별 비중입니다.
+        top_n (int): 날짜별로 선택할 종목 수입니다.
+        max_per_sector (int): 섹터별 최대 종목 수입니다. None일 경우 제약이 없습니다.
+
+    반환:
+        w (ndarray): 날짜 × 종목 형태의 목표 비중 배열입니다.
+    """
+    qvm = np.tensordot(np.asarray(wts, dtype=np.float64), scores, axes=1)
+
+    # 날짜별 점수 오름차순 정렬 (NaN은 마지막)
+    order = np.argsort(qvm, axis=1, kind='stable')
+    valid = ~np.isnan(np.take_along_axis(qvm, order, axis=1))
+
+    # 섹터 제약: 정렬된 순서에서 섹터별 누적 개수가 max_per_sector 이하인 종목만 후보
+    if max_per_sector is not None:
+        sec_sorted = np.asarray(sector_id)[order]
+        sec_rank = np.zeros(order.shape, dtype=np.int64)
+        for sec in np.unique(sector_id):
+            is_sec = sec_sorted == sec
+            sec_rank += np.where(is_sec, np.cumsum(is_sec, axis=1), 0)
+        valid &= sec_rank <= max_per_sector
+
+    # 후보 중 앞에서부터 top_n개 선택
+    chosen = valid & (np.cumsum(valid, axis=1) <= top_n)
+    w = np.zeros(qvm.shape)
+    np.put_along_axis(w, order, chosen.astype(np.float64), axis=1)
+    n = w.sum(axis=1, keepdims=True)
+    w = np.divide(w, n, out=np.zeros_like(w), where=n > 0)
+
+    return w
+
+def _run_config(args):
+    """
+    하나의 파라미터 조합에 대해 백테스트를 수행하는 작업 프로세스용 내부 함수입니다.
+    """
+    path, config, cost_bps, periods_per_year = args
+    scores, growth, sector_id = _load_sweep_panel(path)
+
+    w = select_weights(scores, sector_id, config['wts'], config['top_n'], config['max_per_sector'])
+    result_df = pd.DataFrame(simulate_weights(w, growth, cost_bps))
+
+    return {**config, **summarize_backtest(result_df, periods_per_year)}
+
+def run_sweep(score_df, price_pivot, wts_list=None, top_n_list=(20,), max_per_sector_list=(None,),
+              cost_bps=30, periods_per_year=12, workers=None, path=None):
+    """
+    팩터 비중, 선택 종목 수, 섹터 제약의 조합별 백테스트를 프로세스 풀로 병렬 수행하는 함수입니다.
+    팩터 패널은 한 번만 계산해 메모리 맵 파일로 공유하므로, 조합마다 데이터베이스를 다시 읽지 않습니다.
+
+    매개변수:
+        score_df (DataFrame): normalize_factor_panel이 반환한 데이터 프레임입니다.
+        price_pivot (DataFrame): 날짜 × 종목코드 형태의 종가 데이터 프레임입니다.
+        wts_list (list): 팩터 비중 튜플의 리스트입니다. None일 경우 make_weight_grid()를 사용합니다.
+        top_n_list (list): 선택 종목 수 후보입니다. 기본값은 (20,)입니다.
+        max_per_sector_list (list): 섹터별 최대 종목 수 후보입니다. None은 제약 없음입니다.
+        cost_bps (float): 편도 거래비용(bp)입니다. 기본값은 30입니다.
+        periods_per_year (int): 연간 리밸런싱 횟수입니다. 기본값은 12입니다.
+        workers (int): 프로세스 수입니다. None일 경우 CPU 개수를 사용합니다.
+        path (str): 패널 파일을 저장할 폴더입니다. None일 경우 임시 폴더를 만들고 종료 후 삭제합니다.
+
+    반환:
+        sweep_df (DataFrame): 조합별 wts, top_n, max_per_sector와 성과 지표(cagr, vol, sharpe, mdd, turnover)를 담은 데이터 프레임입니다.
+    """
+    if wts_list is None:
+        wts_list = make_weight_grid()
+
+    tmp_path = path is None
+    if tmp_path:
+        path = tempfile.mkdtemp(prefix='sweep_')
+
+    try:
+        save_sweep_panel(score_df, price_pivot, path)
+
+        configs = [{'wts': tuple(wts), 'top_n': top_n, 'max_per_sector': cap}
+                   for wts, top_n, cap in itertools.product(wts_list, top_n_list, max_per_sector_list)]
+        tasks = [(path, config, cost_bps, periods_per_year) for config in configs]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_config, tasks, chunksize=max(1, len(tasks) // (8 * (workers or os.cpu_count() or 1)))))
+    finally:
+        if tmp_path:
+            shutil.rmtree(path, ignore_errors=True)
+
+    sweep_df = pd.DataFrame(results).sort_values('sharpe', ascending=False).reset_index(drop=True)
+
+    return sweep_df
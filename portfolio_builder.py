@@ -1,10 +1,23 @@
+import sys
 from portfolio.portfolio_management import model_portfolio
+from portfolio.optimizer import optimize_portfolio
+from portfolio.panel import PricePanel
+from portfolio.snapshot import save_snapshot
+from database.mysql_reader import create_db_engine, fetch_recent_year_price
 
-def main():
+def main(method=None):
     portfolio_df = model_portfolio()
-    my_portfolio = portfolio_df[portfolio_df['invest'] == 'Y']['종목코드']
-    my_portfolio.to_excel('my_portfolio.xlsx', index=False)
+
+    # 최적화 방법이 주어진 경우 공분산을 고려한 목표 비중 계산 (없으면 스냅샷 저장 시 동일가중)
+    if method is not None:
+        engine = create_db_engine(db='stock')
+        price_df = fetch_recent_year_price(engine)
+        engine.dispose()
+        portfolio_df = optimize_portfolio(portfolio_df, PricePanel.from_long(price_df), method)
+
+    # 점수, 섹터, 비중을 포함한 전체 결과를 리밸런싱일 스냅샷으로 저장
+    save_snapshot(portfolio_df)
     print("Portfolio update complete.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
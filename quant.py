@@ -0,0 +1,80 @@
+import sys
+import argparse
+
+# 무거운 라이브러리(pandas, scipy, sqlalchemy, bs4, requests 등)는 각 하위 명령을 실행할 때만 import합니다.
+# 따라서 --help나 잘못된 인자 확인은 인터프리터 시작 시간 수준으로 끝납니다.
+
+# data_builder.STAGES와 같은 순서 (목록 확인을 위해 data_builder를 import하지 않도록 여기에도 정의)
+DATA_STAGES = ['base', 'sector', 'code', 'universe', 'price', 'fs', 'value']
+
+def build_data(args):
+    from data_builder import main
+    main(args.stages)
+
+def build_portfolio(args):
+    from portfolio_builder import main
+    main(args.method)
+
+def build_plan(args):
+    from plan_builder import main
+    main(args.method, args.date)
+
+def trade(args):
+    from trading_bot import main
+    main()
+
+def collect_minutes(args):
+    from data.minute_store import MinuteBarStore
+    from trading.auth import load_app_keys
+    from trading.quotes import collect_minute_bars
+    from trading.trading import url_base
+
+    codes = args.codes
+    if codes is None:
+        # 최신 스냅샷의 투자 종목
+        from portfolio.snapshot import load_snapshot
+        mp = load_snapshot(columns=['종목코드', 'invest'])
+        codes = mp.loc[mp['invest'] == 'Y', '종목코드'].astype(str).tolist()
+
+    app_key, app_secret = load_app_keys()
+    counts = collect_minute_bars(MinuteBarStore(args.path), url_base, app_key, app_secret, codes)
+    print(f"Minute bars stored: {int(counts.sum())} bars for {counts.notna().sum()} / {len(codes)} tickers")
+
+def build_parser():
+    """
+    build-data, build-portfolio, build-plan, collect-minutes, trade 하위 명령을 가진 인자 파서를 생성합니다.
+    """
+    parser = argparse.ArgumentParser(prog='quant', description='데이터 수집, 모델 포트폴리오 생성, 실행 계획 생성, 분봉 수집, 자동매매를 실행합니다.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('build-data', help='시장 데이터를 수집하여 데이터베이스를 업데이트합니다.')
+    p.add_argument('--stages', nargs='+', choices=DATA_STAGES, default=None,
+                   help='실행할 단계입니다. 지정하지 않으면 모든 단계를 순서대로 실행합니다.')
+    p.set_defaults(func=build_data)
+
+    p = subparsers.add_parser('build-portfolio', help='모델 포트폴리오를 계산하여 스냅샷으로 저장합니다.')
+    p.add_argument('--method', choices=['min_variance', 'risk_parity', 'equal'], default=None,
+                   help='목표 비중 최적화 방법입니다. 지정하지 않으면 동일가중입니다.')
+    p.set_defaults(func=build_portfolio)
+
+    p = subparsers.add_parser('build-plan', help='최신 스냅샷으로 다음 거래일의 실행 계획을 미리 계산합니다. (build-portfolio 후 실행)')
+    p.add_argument('--method', choices=['twap', 'vwap'], default='twap', help='자식 주문 분할 방법입니다.')
+    p.add_argument('--date', default=None, help='거래일(YYYYMMDD)입니다. 지정하지 않으면 다음 거래일입니다.')
+    p.set_defaults(func=build_plan)
+
+    p = subparsers.add_parser('collect-minutes', help='당일 분봉을 조회하여 분봉 저장소에 추가합니다. (장 마감 후 실행)')
+    p.add_argument('--codes', nargs='+', default=None, help='조회할 종목코드입니다. 지정하지 않으면 최신 스냅샷의 투자 종목입니다.')
+    p.add_argument('--path', default='minute_bars', help='분봉 저장 폴더입니다.')
+    p.set_defaults(func=collect_minutes)
+
+    p = subparsers.add_parser('trade', help='최신 스냅샷을 기준으로 리밸런싱 주문을 실행합니다.')
+    p.set_defaults(func=trade)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
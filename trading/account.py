@@ -0,0 +1,158 @@
+import time
+import threading
+import pandas as pd
+
+from trading.auth import get_token_manager
+from trading.session import create_session, rate_limit_for, RateLimiter, get_paged
+
+# 주식잔고조회 tr_id (모의투자, 실전투자)
+MOCK_BALANCE_TR_ID = 'VTTC8434R'
+REAL_BALANCE_TR_ID = 'TTTC8434R'
+
+def fetch_balance(session, limiter, url_base, app_key, app_secret, cano="50102599", acnt_prdt_cd="01"):
+    """
+    계좌 잔고를 연속조회로 모든 페이지까지 조회하는 함수입니다. (모의투자는 한 번에 20종목, 실전은 50종목까지 조회)
+
+    매개변수:
+        session (Session): 요청에 사용할 세션입니다.
+        limiter (RateLimiter): 요청 한도 객체입니다.
+        url_base (str): API의 기본 URL입니다.
+        app_key (str): API 접근을 위한 애플리케이션 키입니다.
+        app_secret (str): API 접근을 위한 애플리케이션 비밀 키입니다.
+        cano (str): 계좌번호(앞 8자리)입니다.
+        acnt_prdt_cd (str): 계좌 상품 코드입니다.
+
+    반환:
+        positions (DataFrame): 종목코드, 보유수량 컬럼을 가진 데이터 프레임입니다.
+        summary (dict): 예수금, 총평가금액 등 잔고 요약 정보(output2)입니다.
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {get_token_manager(url_base, app_key, app_secret).get()}",
+        "appKey": app_key,
+        "appSecret": app_secret,
+        "tr_id": MOCK_BALANCE_TR_ID if 'openapivts' in url_base else REAL_BALANCE_TR_ID
+    }
+    params = {
+        "CANO": cano,
+        "ACNT_PRDT_CD": acnt_prdt_cd,
+        "AFHR_FLPR_YN": "N",
+        "OFL_YN": "",
+        "INQR_DVSN": "02",
+        "UNPR_DVSN": "01",
+        "FUND_STTL_ICLD_YN": "N",
+        "FNCG_AMT_AUTO_RDPT_YN": "N",
+        "PRCS_DVSN": "01",
+    }
+    records, last = get_paged(session, limiter, f"{url_base}/uapi/domestic-stock/v1/trading/inquire-balance", headers, params)
+
+    positions = pd.DataFrame.from_records(records, columns=['pdno', 'hldg_qty'])[['pdno', 'hldg_qty']]
+    positions.columns = ['종목코드', '보유수량']
+    positions['보유수량'] = positions['보유수량'].astype(int)
+    positions = positions[positions['보유수량'] > 0].reset_index(drop=True)
+
+    summary = (last.get('output2') or [{}])[0]
+
+    return positions, summary
+
+class AccountState:
+    """
+    계좌의 종목별 보유수량과 예수금을 메모리에 보관하고, 체결 이벤트로 즉시 갱신하는 객체입니다.
+    처음 한 번 전체 잔고를 불러온 뒤에는 OrderClient의 체결 이벤트만으로 상태를 유지하며,
+    reconcile_interval초가 지난 경우에만 브로커 잔고와 다시 맞춥니다. 따라서 주문 수량 계산 시 매번 잔고를 조회할 필요가 없습니다.
+
+    매개변수:
+        url_base (str): API의 기본 URL입니다.
+        app_key (str): API 접근을 위한 애플리케이션 키입니다.
+        app_secret (str): API 접근을 위한 애플리케이션 비밀 키입니다.
+        cano (str): 계좌번호(앞 8자리)입니다.
+        acnt_prdt_cd (str): 계좌 상품 코드입니다.
+        reconcile_interval (float): 브로커 잔고와 다시 맞추는 주기(초)입니다. 기본값은 600입니다.
+        session (Session): 공유할 세션입니다. None일 경우 새로 생성합니다.
+        limiter (RateLimiter): 공유할 요청 한도 객체입니다. None일 경우 url_base에 맞는 한도로 생성합니다.
+    """
+    def __init__(self, url_base, app_key, app_secret, cano="50102599", acnt_prdt_cd="01",
+                 reconcile_interval=600, session=None, limiter=None):
+        self.url_base = url_base
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.cano = cano
+        self.acnt_prdt_cd = acnt_prdt_cd
+        self.reconcile_interval = reconcile_interval
+        self.session = session if session is not None else create_session(2)
+        self.limiter = limiter if limiter is not None else RateLimiter(rate_limit_for(url_base))
+
+        self.positions = {}
+        self.cash = 0.0
+        self.total_value = 0.0
+        self.last_sync = None
+        self._lock = threading.Lock()
+
+    def sync(self, client=None):
+        """
+        브로커 잔고 전체를 다시 불러와 보유수량과 예수금을 덮어씁니다.
+        client가 주어지면 잔고를 불러오기 전에 체결 내역을 먼저 조회(체결 이벤트 반영)한 뒤 잔고로 덮어씁니다.
+        따라서 잔고에 포함된 체결은 주문별 체결수량에도 반영되어 다음 조회에서 다시 더해지지 않으며,
+        잔고를 불러온 뒤의 체결은 다음 체결 조회에서 정상적으로 반영됩니다.
+
+        매개변수:
+            client (OrderClient): 체결 이벤트로 이 객체를 갱신하는 주문 클라이언트입니다. None일 경우 잔고만 불러옵니다.
+
+        반환:
+            diff (dict): {종목코드: 브로커 수량 - 메모리 수량} 형태의 차이입니다. (차이가 있는 종목만)
+        """
+        if client is not None:
+            client.poll_fills()
+
+        positions, summary = fetch_balance(self.session, self.limiter, self.url_base, self.app_key,
+                                           self.app_secret, self.cano, self.acnt_prdt_cd)
+        broker = dict(zip(positions['종목코드'], positions['보유수량']))
+
+        with self._lock:
+            codes = set(broker) | set(self.positions)
+            diff = {code: broker.get(code, 0) - self.positions.get(code, 0) for code in codes
+                    if broker.get(code, 0) != self.positions.get(code, 0)}
+            self.positions = broker
+            self.cash = float(summary.get('dnca_tot_amt', 0) or 0)
+            self.total_value = float(summary.get('tot_evlu_amt', 0) or 0)
+            self.last_sync = time.monotonic()
+
+        return diff
+
+    def maybe_reconcile(self, client=None):
+        """
+        마지막 동기화 후 reconcile_interval초가 지났을 때만 브로커 잔고와 다시 맞춥니다.
+
+        매개변수:
+            client (OrderClient): sync()에 전달할 주문 클라이언트입니다.
+
+        반환:
+            diff (dict): sync()의 반환값입니다. 동기화하지 않은 경우 None입니다.
+        """
+        if self.last_sync is not None and time.monotonic() - self.last_sync < self.reconcile_interval:
+            return None
+        return self.sync(client)
+
+    def on_fill(self, fill):
+        """
+        체결 이벤트로 보유수량과 예수금을 갱신합니다. OrderClient.listeners에 등록하여 사용합니다.
+
+        매개변수:
+            fill (dict): OrderClient.poll_fills가 반환하는 체결 이벤트입니다. (종목코드, tr_id, 체결수량, 체결단가)
+        """
+        # 매수 tr_id는 모의/실전 모두 0802U로 끝남
+        sign = 1 if fill['tr_id'].endswith('0802U') else -1
+        with self._lock:
+            qty = self.positions.get(fill['종목코드'], 0) + sign * fill['체결수량']
+            if qty > 0:
+                self.positions[fill['종목코드']] = qty
+            else:
+                self.positions.pop(fill['종목코드'], None)
+            self.cash -= sign * fill['체결수량'] * fill['체결단가']
+
+    def holdings(self):
+        """
+        현재 보유수량을 check_account의 res1과 같은 형태(종목코드, 보유수량)의 데이터 프레임으로 반환합니다.
+        """
+        with self._lock:
+            return pd.DataFrame(list(self.positions.items()), columns=['종목코드', '보유수량'])
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+
+from trading.metrics import METRICS
+
+# 액세스 토큰을 프로세스 재시작 후에도 재사용하기 위해 저장하는 파일
+TOKEN_FILE = '.kis_token.json'
+
+# 만료 몇 초 전에 미리 새 토큰을 발급받을지 (초)
+REFRESH_MARGIN = 600
+
+class TokenManager:
+    """
+    한국투자증권 API 액세스 토큰을 만료 시각과 함께 보관하고, 만료 직전에만 새로 발급받는 객체입니다.
+    여러 스레드에서 동시에 요청해도 잠금(lock)으로 한 번만 발급하며, path를 지정하면 토큰을 파일에 저장해
+    프로세스를 다시 시작해도 유효한 토큰을 그대로 사용합니다.
+
+    매개변수:
+        url_base (str): API의 기본 URL입니다.
+        app_key (str): API 사용자의 app key입니다.
+        app_secret (str): API 사용자의 app secret입니다.
+        path (str): 토큰 저장 파일 경로입니다. None일 경우 메모리에만 보관합니다. 기본값은 TOKEN_FILE입니다.
+        margin (float): 만료 전 갱신 여유 시간(초)입니다. 기본값은 REFRESH_MARGIN입니다.
+    """
+    def __init__(self, url_base, app_key, app_secret, path=TOKEN_FILE, margin=REFRESH_MARGIN):
+        self.url_base = url_base
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.path = path
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+
+        # 저장 파일에서 토큰을 찾을 키 (app key 원문은 파일에 남기지 않음)
+        self._key = hashlib.sha256(f'{url_base}|{app_key}'.encode()).hexdigest()
+
+    def _valid(self):
+        return self._token is not None and time.time() < self._expires_at - self.margin
+
+    def _issue(self):
+        # oauth2/tokenP로 새 토큰 발급
+        headers = {"content-type": "application/json"}
+        body = {
+            "grant_type": "client_credentials",
+            "appkey": self.app_key,
+            "appsecret": self.app_secret
+        }
+        start = time.perf_counter()
+        res = requests.post(f"{self.url_base}/oauth2/tokenP", headers=headers, data=json.dumps(body))
+        METRICS.observe('tokenP', time.perf_counter() - start, None if res.ok else str(res.status_code), error=not res.ok)
+        res.raise_for_status()
+        data = res.json()
+
+        self._token = data['access_token']
+        self._expires_at = time.time() + float(data.get('expires_in', 86400))
+
+    def _read_file(self):
+        if self.path is None or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self):
+        # 저장 파일에 같은 계정의 토큰이 있으면 불러오기
+        entry = self._read_file().get(self._key)
+        if entry is not None:
+            self._token, self._expires_at = entry['access_token'], entry['expires_at']
+
+    def _save(self):
+        # 현재 토큰을 저장 파일에 기록
+        if self.path is None:
+            return
+        tokens = self._read_file()
+        tokens[self._key] = {'access_token': self._token, 'expires_at': self._expires_at}
+        self._write_file(tokens)
+
+    def _write_file(self, tokens):
+        # 임시 파일에 쓴 뒤 교체, 소유자만 읽을 수 있도록 권한 설정
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(tokens, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.path)
+
+    def get(self):
+        """
+        유효한 액세스 토큰을 반환합니다. 메모리, 저장 파일 순으로 확인하고 없거나 만료가 가까우면 새로 발급합니다.
+        """
+        if self._valid():
+            return self._token
+
+        with self._lock:
+            # 잠금을 기다리는 동안 다른 스레드가 이미 갱신했을 수 있으므로 다시 확인
+            if not self._valid():
+                self._load()
+            if not self._valid():
+                self._issue()
+                self._save()
+            return self._token
+
+    def invalidate(self):
+        """
+        토큰이 거부된 경우(예: 만료 응답) 보관 중인 토큰을 버려 다음 호출에서 새로 발급받도록 합니다.
+        """
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+
+            # 저장 파일의 토큰도 함께 삭제하여 다시 불러오지 않도록 함
+            tokens = self._read_file()
+            if tokens.pop(self._key, None) is not None:
+                self._write_file(tokens)
+
+# (url_base, app_key)별로 하나만 만드는 토큰 관리자
+_managers = {}
+_managers_lock = threading.Lock()
+
+def get_token_manager(url_base, app_key, app_secret, path=TOKEN_FILE):
+    """
+    (url_base, app_key) 조합별 TokenManager를 반환합니다. 처음 호출될 때만 생성하고 이후에는 같은 객체를 재사용합니다.
+    """
+    with _managers_lock:
+        key = (url_base, app_key)
+        if key not in _managers:
+            _managers[key] = TokenManager(url_base, app_key, app_secret, path)
+        return _managers[key]
+
+def load_app_keys(service='mock', user='stanfm'):
+    """
+    API 앱키와 앱비밀번호를 필요한 시점에 읽어오는 함수입니다. (모듈 import 시에는 keyring을 호출하지 않음)
+    환경변수 KIS_APP_KEY, KIS_APP_SECRET이 있으면 우선 사용하고, 없으면 keyring에 저장된 값을 사용합니다.
+
+    매개변수:
+        service (str): keyring 항목 접두어입니다. 'mock'이면 'mock_app_key', 'mock_app_secret'을 읽습니다.
+        user (str): keyring 사용자 이름입니다.
+
+    반환:
+        app_key (str): API 사용자의 app key입니다.
+        app_secret (str): API 사용자의 app secret입니다.
+    """
+    app_key, app_secret = os.environ.get('KIS_APP_KEY'), os.environ.get('KIS_APP_SECRET')
+    if app_key and app_secret:
+        return app_key, app_secret
+
+    import keyring
+    return keyring.get_password(f'{service}_app_key', user), keyring.get_password(f'{service}_app_secret', user)
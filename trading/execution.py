@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+# 장중 30분 구간별 거래량 비중 (장 시작/마감에 거래가 몰리는 U자 형태)
+# 구간 시작 시각(HH:MM) → 비중, 합계 1
+DEFAULT_VOLUME_PROFILE = pd.Series(
+    [0.14, 0.09, 0.07, 0.06, 0.055, 0.05, 0.045, 0.045, 0.05, 0.055, 0.065, 0.085, 0.14],
+    index=['09:00', '09:30', '10:00', '10:30', '11:00', '11:30', '12:00',
+           '12:30', '13:00', '13:30', '14:00', '14:30', '15:00'])
+
+# 매수/매도 주문 tr_id (모의투자)
+BUY_TR_ID = 'VTTC0802U'
+SELL_TR_ID = 'VTTC0801U'
+
+def split_quantity(qty, weights):
+    """
+    정수 수량을 비중대로 나누는 함수입니다. 소수점 이하는 최대 잔여 방식으로 배분하여 합계가 qty와 정확히 같습니다.
+
+    매개변수:
+        qty (int): 나눌 전체 수량입니다.
+        weights (array): 조각별 비중입니다.
+
+    반환:
+        qty_list (ndarray): 조각별 정수 수량 배열입니다.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    raw = qty * weights / weights.sum()
+    qty_list = np.floor(raw).astype(np.int64)
+
+    # 남은 수량은 소수점 이하가 큰 조각부터 1주씩 배분
+    remain = qty - qty_list.sum()
+    qty_list[np.argsort(-(raw - qty_list), kind='stable')[:remain]] += 1
+
+    return qty_list
+
+def slice_times(start_dt, end_dt, n_slices):
+    """
+    시작~종료 시각 구간을 n_slices개로 나눈 각 구간의 시작 시각을 반환합니다. (종료 시각 직전에 몰리지 않도록 구간 시작에 주문)
+    """
+    return pd.date_range(start_dt, end_dt, periods=n_slices + 1)[:-1].round('s')
+
+def profile_weights(times, profile=None):
+    """
+    각 주문 시각이 속한 장중 구간의 거래량 비중을 반환합니다.
+
+    매개변수:
+        times (DatetimeIndex): 주문 시각입니다.
+        profile (Series): 'HH:MM' 구간 시작 시각을 인덱스로 하는 거래량 비중입니다. None일 경우 DEFAULT_VOLUME_PROFILE입니다.
+
+    반환:
+        weights (ndarray): 주문 시각별 거래량 비중 배열입니다.
+    """
+    profile = DEFAULT_VOLUME_PROFILE if profile is None else profile
+    bucket_start = pd.to_timedelta(profile.index + ':00')
+    time_of_day = times - times.normalize()
+
+    # 각 시각이 속한 구간 (구간 시작 시각 이하 중 가장 늦은 구간)
+    idx = np.clip(bucket_start.searchsorted(time_of_day, side='right') - 1, 0, len(profile) - 1)
+
+    return profile.to_numpy(np.float64)[idx]
+
+def plan_child_orders(code, qty, start_dt, end_dt, method='twap', n_slices=10, profile=None):
+    """
+    하나의 부모 주문(목표 수량)을 시간대별 자식 주문으로 나누는 함수입니다.
+    TWAP은 같은 간격, 같은 수량으로, VWAP은 같은 간격에 장중 거래량 비중만큼 수량을 배분합니다.
+
+    매개변수:
+        code (str): 종목코드입니다.
+        qty (int): 부모 주문 수량입니다. 양수는 매수, 음수는 매도입니다.
+        start_dt (datetime): 주문 시작 시각입니다.
+        end_dt (datetime): 주문 종료 시각입니다.
+        method (str): 'twap' 혹은 'vwap'입니다. 기본값은 'twap'입니다.
+        n_slices (int): 최대 자식 주문 수입니다. 수량이 이보다 적으면 1주씩 수량만큼 나눕니다. 기본값은 10입니다.
+        profile (Series): VWAP에 사용할 장중 거래량 비중입니다. None일 경우 DEFAULT_VOLUME_PROFILE입니다.
+
+    반환:
+        child_df (DataFrame): 종목코드, 주문시각, 주문수량, tr_id 컬럼을 가진 자식 주문 데이터 프레임입니다. (수량이 0인 조각은 제외)
+    """
+    n = min(abs(int(qty)), n_slices)
+    if n == 0:
+        return pd.DataFrame(columns=['종목코드', '주문시각', '주문수량', 'tr_id'])
+
+    times = slice_times(start_dt, end_dt, n)
+    weights = profile_weights(times, profile) if method == 'vwap' else np.ones(n)
+    qty_list = split_quantity(abs(int(qty)), weights)
+
+    child_df = pd.DataFrame({
+        '종목코드': code,
+        '주문시각': times,
+        '주문수량': qty_list,
+        'tr_id': BUY_TR_ID if qty > 0 else SELL_TR_ID,
+    })
+
+    return child_df[child_df['주문수량'] > 0].reset_index(drop=True)
+
+def plan_orders(target, start_dt, end_dt, method='twap', n_slices=10, profile=None):
+    """
+    target의 종목별 투자수량을 자식 주문으로 나눈 전체 주문 계획을 만드는 함수입니다.
+    매도 주문을 같은 시각의 매수 주문보다 먼저 배치하여 매도 대금으로 매수할 수 있도록 합니다.
+
+    매개변수:
+        target (DataFrame): 종목코드, 투자수량 컬럼을 가진 데이터 프레임입니다.
+        start_dt (datetime): 주문 시작 시각입니다.
+        end_dt (datetime): 주문 종료 시각입니다.
+        method (str): 'twap' 혹은 'vwap'입니다.
+        n_slices (int): 종목별 최대 자식 주문 수입니다.
+        profile (Series): VWAP에 사용할 장중 거래량 비중입니다.
+
+    반환:
+        plan_df (DataFrame): 종목코드, 주문시각, 주문수량, tr_id 컬럼을 가진 주문 계획 데이터 프레임입니다. (주문시각 순)
+    """
+    children = [plan_child_orders(code, qty, start_dt, end_dt, method, n_slices, profile)
+                for code, qty in zip(target['종목코드'], target['투자수량']) if qty != 0]
+    if not children:
+        return pd.DataFrame(columns=['종목코드', '주문시각', '주문수량', 'tr_id'])
+
+    plan_df = pd.concat(children, ignore_index=True)
+    plan_df['매도'] = plan_df['tr_id'] == SELL_TR_ID
+    plan_df = plan_df.sort_values(['주문시각', '매도'], ascending=[True, False], kind='stable')
+
+    return plan_df.drop(columns='매도').reset_index(drop=True)
@@ -0,0 +1,121 @@
+import sys
+import time
+import datetime
+import numpy as np
+import pandas as pd
+
+from trading.auth import get_token_manager
+from trading.mock_server import MockKISServer
+from trading.quotes import fetch_prices
+from trading.orders import OrderClient
+from trading.session import RateLimiter
+from trading.scheduler import OrderScheduler
+from trading.execution import plan_orders
+from trading.metrics import METRICS
+
+def _percentiles(values):
+    # 지연 시간(ms) 요약
+    if not values:
+        return {}
+    values = np.array(values) * 1000
+    return {'p50': round(float(np.percentile(values, 50)), 1), 'p99': round(float(np.percentile(values, 99)), 1),
+            'max': round(float(values.max()), 1)}
+
+def run_harness(n_tickers=40, duration=10, method='twap', n_slices=10, latency=0.02, rate_limit=20,
+                workers=4, invest_amount=1_000_000_000, seed=0):
+    """
+    로컬 모의 서버(MockKISServer)를 상대로 리밸런싱 세션 전체(현재가 조회 → 수량 계산 → 자식 주문 실행 → 체결 조회)를
+    duration초로 압축하여 실행하고 처리량과 지연 시간을 측정하는 함수입니다.
+
+    매개변수:
+        n_tickers (int): 목표 포트폴리오 종목 수입니다. 기본값은 40입니다.
+        duration (float): 장 시간을 압축한 세션 길이(초)입니다. 기본값은 10입니다.
+        method (str): 'twap' 혹은 'vwap'입니다.
+        n_slices (int): 종목별 최대 자식 주문 수입니다.
+        latency (float): 모의 서버의 평균 응답 지연(초)입니다.
+        rate_limit (float): 모의 서버와 클라이언트의 초당 요청 한도입니다. None일 경우 제한하지 않습니다.
+        workers (int): 동시에 제출할 주문 수입니다.
+        invest_amount (int): 투자 금액입니다.
+        seed (int): 난수 시드입니다.
+
+    반환:
+        report (dict): 주문 수, 초당 주문 수, 종단간 지연(예약 시각 → 주문 응답), 시세 조회 시간, 엔드포인트별 호출 수,
+                       클라이언트에서 측정한 엔드포인트별 지연 시간과 응답 코드(api_metrics) 등입니다.
+    """
+    rng = np.random.default_rng(seed)
+    codes = [f'{i:06d}' for i in range(10, 10 * (n_tickers * 2) + 10, 10)]
+    prices = dict(zip(codes, rng.integers(1, 200, len(codes)) * 500))
+
+    # 절반은 기존 보유 종목(매도 대상 포함), 목표는 앞쪽 n_tickers 종목 동일가중
+    holdings = {code: int(rng.integers(1, 500)) for code in codes[n_tickers // 2: n_tickers // 2 + n_tickers]}
+    server = MockKISServer(prices, holdings, latency=latency, rate_limit=rate_limit).start()
+    url_base, app_key, app_secret = server.url, 'mock-key', 'mock-secret'
+    get_token_manager(url_base, app_key, app_secret, path=None)
+    limiter = RateLimiter(rate_limit) if rate_limit is not None else RateLimiter(1e6)
+    METRICS.reset()
+
+    try:
+        # 현재가 조회 및 투자수량 계산
+        target = pd.DataFrame({'종목코드': codes[:n_tickers], 'weight': 1 / n_tickers})
+        target = target.merge(pd.DataFrame(list(holdings.items()), columns=['종목코드', '보유수량']), on='종목코드', how='outer')
+        target['weight'] = target['weight'].fillna(0)
+        target['보유수량'] = target['보유수량'].fillna(0).astype(int)
+
+        quote_start = time.perf_counter()
+        target['현재가'] = fetch_prices(url_base, app_key, app_secret, target['종목코드'], limiter=limiter)
+        quote_time = time.perf_counter() - quote_start
+        target = target.dropna(subset=['현재가'])
+        target['투자수량'] = (np.round(invest_amount * target['weight'] / target['현재가']) - target['보유수량']).astype(int)
+
+        # 자식 주문 계획 및 실행
+        start = datetime.datetime.now() + datetime.timedelta(seconds=0.2)
+        end = start + datetime.timedelta(seconds=duration)
+        plan_df = plan_orders(target, start, end, method, n_slices)
+
+        scheduler = OrderScheduler(workers=workers, metrics=METRICS)
+        client = OrderClient(url_base, app_key, app_secret, workers=workers, limiter=limiter)
+        e2e = []
+
+        def send(code, tr_id, qty, planned):
+            future = client.submit(code, tr_id, qty)
+            future.add_done_callback(lambda f: e2e.append(time.time() - planned))
+
+        for code, order_time, qty, tr_id in plan_df[['종목코드', '주문시각', '주문수량', 'tr_id']].itertuples(index=False):
+            planned = order_time.to_pydatetime()
+            scheduler.add(planned, send, code, tr_id, qty, planned.timestamp())
+
+        session_start = time.perf_counter()
+        scheduler.run(end + datetime.timedelta(seconds=1))
+        client.drain()
+        session_time = time.perf_counter() - session_start
+
+        # 체결 대기 후 일괄 조회
+        time.sleep(server.fill_delay)
+        fills = client.poll_fills()
+        client.close()
+    finally:
+        server.stop()
+
+    report = {
+        'tickers': int((target['투자수량'] != 0).sum()),
+        'orders': len(plan_df),
+        'accepted': len(client.orders),
+        'rejected': len(client.rejects),
+        'filled_shares': int(sum(f['체결수량'] for f in fills)),
+        'ordered_shares': int(plan_df['주문수량'].sum()),
+        'session_sec': round(session_time, 2),
+        'orders_per_sec': round(len(client.orders) / session_time, 1),
+        'quote_sec': round(quote_time, 2),
+        'e2e_latency_ms': _percentiles(e2e),
+        'scheduler_lag_ms': {k: round(float(v), 1) for k, v in scheduler.lag_summary().items()},
+        'api_calls': dict(server.calls),
+        'throttled': dict(server.throttled),
+        'api_metrics': METRICS.report().to_dict('index'),
+    }
+
+    return report
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for key, value in run_harness(duration=duration).items():
+        print(f"{key}: {value}")
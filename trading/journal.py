@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import datetime
+import threading
+import pandas as pd
+
+# 세션별 주문 저널을 저장하는 기본 폴더
+JOURNAL_DIR = 'order_journal'
+
+def journal_path(date=None, path=JOURNAL_DIR):
+    """
+    거래일별 저널 파일 경로를 반환합니다. date가 None이면 오늘입니다.
+    """
+    date = date or datetime.date.today().strftime('%Y%m%d')
+    return os.path.join(path, f'{date}.jsonl')
+
+class OrderJournal:
+    """
+    주문 의도(intent), 제출(submit), 응답(ack), 체결(fill) 이벤트를 한 줄씩 추가하는 선기록(write-ahead) 저널입니다.
+    새 세션은 intent 이벤트로 주문 계획 전체를 기록한 뒤 planned 이벤트를 durable로 기록합니다.
+    이벤트는 메모리에 모았다가 flush_interval초마다 한 번에 쓰고 fsync하며(그룹 커밋),
+    durable=True인 이벤트는 디스크에 기록될 때까지 호출한 스레드가 기다립니다.
+    주문 제출 전에 submit을 durable로 기록하므로, 중단 후 재시작해도 이미 보낸 주문을 다시 보내지 않습니다.
+
+    매개변수:
+        path (str): 저널 파일 경로입니다.
+        flush_interval (float): 모아둔 이벤트를 쓰는 주기(초)입니다. 기본값은 0.05입니다.
+    """
+    def __init__(self, path, flush_interval=0.05):
+        self.path = path
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._file = open(path, 'a', encoding='utf-8')
+        self._buffer = []
+        self._written = 0
+        self._appended = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def append(self, event, durable=False, **fields):
+        """
+        이벤트를 저널에 추가합니다.
+
+        매개변수:
+            event (str): 'intent', 'planned', 'submit', 'ack', 'fill' 중 하나입니다.
+            durable (bool): True일 경우 디스크에 fsync될 때까지 기다립니다.
+            **fields: 이벤트 내용입니다. (cid, 종목코드, 수량 등)
+        """
+        line = json.dumps({'e': event, 't': round(time.time(), 3), **fields}, ensure_ascii=False, separators=(',', ':'))
+        with self._cond:
+            self._buffer.append(line)
+            self._appended += 1
+            seq = self._appended
+            if durable:
+                self._cond.notify_all()
+                while self._written < seq and not self._closed:
+                    self._cond.wait()
+
+    def _flush(self):
+        # 모아둔 줄을 한 번에 쓰고 fsync (잠금 밖에서 디스크 작업)
+        with self._cond:
+            lines, self._buffer = self._buffer, []
+            seq = self._appended
+        if lines:
+            self._file.write('\n'.join(lines) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        with self._cond:
+            self._written = seq
+            self._cond.notify_all()
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                if not self._buffer and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            self._flush()
+            if closed:
+                break
+
+    def close(self):
+        """
+        남은 이벤트를 모두 기록하고 파일을 닫습니다.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._file.close()
+
+def replay_journal(path):
+    """
+    저널을 처음부터 읽어 세션 상태를 복원하는 함수입니다. 마지막 줄이 중단으로 잘린 경우 무시합니다.
+
+    매개변수:
+        path (str): 저널 파일 경로입니다.
+
+    반환:
+        state (dict): 다음 항목을 담은 딕셔너리입니다.
+            planned (bool): 주문 계획 전체가 기록되었는지(planned 이벤트) 여부입니다. False이면 계획 기록 중 중단된 것이므로 새로 계획해야 합니다.
+            pending (DataFrame): 아직 제출하지 않은 자식 주문 계획입니다. (cid, 종목코드, 주문시각, 주문수량, tr_id)
+            in_flight (list): 제출을 기록했지만 응답이 없는 주문의 cid 리스트입니다. (브로커 잔고로 확인, 다시 제출하지 않음)
+            orders (dict): 응답을 받은 주문의 {주문번호: 주문 기록} 딕셔너리입니다. (OrderClient.restore에 사용)
+            rejects (list): 거부된 주문 응답 리스트입니다.
+    """
+    intents, submitted, acks, fills = {}, set(), {}, {}
+    planned = False
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                event = rec.pop('e')
+                rec.pop('t', None)
+                if event == 'intent':
+                    intents[rec['cid']] = rec
+                elif event == 'planned':
+                    planned = True
+                elif event == 'submit':
+                    submitted.add(rec['cid'])
+                elif event == 'ack':
+                    acks[rec['cid']] = rec
+                elif event == 'fill':
+                    fills[rec['odno']] = rec
+
+    pending = pd.DataFrame([rec for cid, rec in intents.items() if cid not in submitted],
+                           columns=['cid', '종목코드', '주문시각', '주문수량', 'tr_id'])
+    pending['주문시각'] = pd.to_datetime(pending['주문시각'])
+
+    orders, rejects = {}, []
+    for cid, ack in acks.items():
+        if ack['ok']:
+            fill = fills.get(ack['odno'], {})
+            orders[ack['odno']] = {**ack, '체결수량': fill.get('누적체결수량', 0), '체결단가': fill.get('체결단가', 0.0)}
+        else:
+            rejects.append(ack)
+
+    state = {
+        'planned': planned,
+        'pending': pending.sort_values('주문시각', kind='stable').reset_index(drop=True),
+        'in_flight': sorted(submitted - set(acks)),
+        'orders': orders,
+        'rejects': rejects,
+    }
+
+    return state
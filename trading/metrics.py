@@ -0,0 +1,137 @@
+import os
+import threading
+from collections import Counter, defaultdict
+import numpy as np
+import pandas as pd
+
+# 지연 시간 히스토그램 구간 상한 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf'))
+
+# 실시간 지표를 기록할 텍스트 파일 (Prometheus textfile 형식)
+METRICS_FILE = 'trading_metrics.prom'
+
+class Metrics:
+    """
+    API 요청의 엔드포인트별 지연 시간, 요청 수, 응답 코드(초당 한도 초과 포함), 요청 한도 대기 시간과
+    주문 스케줄러의 지연(예약 시각 대비 실제 실행 시각)을 모으는 객체입니다. 여러 스레드에서 동시에 기록할 수 있습니다.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        모든 기록을 지웁니다.
+        """
+        with self._lock:
+            self.latency = defaultdict(list)
+            self.requests = Counter()
+            self.codes = defaultdict(Counter)
+            self.throttle_wait = Counter()
+            self.lags = []
+
+    def observe(self, endpoint, seconds, msg_cd=None, error=False):
+        """
+        요청 한 건의 결과를 기록합니다.
+
+        매개변수:
+            endpoint (str): 엔드포인트 이름입니다. (예: 'inquire-price')
+            seconds (float): 응답까지 걸린 시간(초)입니다.
+            msg_cd (str): 응답 메시지 코드입니다. (예: 'EGW00201')
+            error (bool): 실패한 요청인지 여부입니다.
+        """
+        with self._lock:
+            self.latency[endpoint].append(seconds)
+            self.requests[endpoint] += 1
+            if msg_cd or error:
+                self.codes[endpoint][msg_cd or 'error'] += 1
+
+    def observe_wait(self, endpoint, seconds):
+        """
+        요청 한도 때문에 기다린 시간을 기록합니다.
+        """
+        if seconds > 0:
+            with self._lock:
+                self.throttle_wait[endpoint] += seconds
+
+    def observe_lag(self, seconds):
+        """
+        예약된 주문의 실행 지연(초)을 기록합니다.
+        """
+        with self._lock:
+            self.lags.append(seconds)
+
+    def report(self):
+        """
+        엔드포인트별 요약 통계를 데이터 프레임으로 반환합니다.
+
+        반환:
+            report_df (DataFrame): 엔드포인트를 인덱스로 requests, p50_ms, p90_ms, p99_ms, max_ms, wait_sec,
+                                   그리고 응답 코드별 건수 컬럼을 가진 데이터 프레임입니다.
+        """
+        with self._lock:
+            rows = {}
+            for endpoint, values in self.latency.items():
+                ms = np.array(values) * 1000
+                rows[endpoint] = {
+                    'requests': self.requests[endpoint],
+                    'p50_ms': np.percentile(ms, 50),
+                    'p90_ms': np.percentile(ms, 90),
+                    'p99_ms': np.percentile(ms, 99),
+                    'max_ms': ms.max(),
+                    'wait_sec': self.throttle_wait[endpoint],
+                    **dict(self.codes[endpoint]),
+                }
+            lags = np.array(self.lags) * 1000
+
+        report_df = pd.DataFrame.from_dict(rows, orient='index').fillna(0).round(1)
+        if len(lags):
+            report_df.attrs['scheduler_lag_ms'] = {'count': len(lags), 'p50': np.percentile(lags, 50),
+                                                   'p99': np.percentile(lags, 99), 'max': lags.max()}
+
+        return report_df
+
+    def to_text(self):
+        """
+        현재 지표를 Prometheus textfile 형식의 문자열로 반환합니다.
+        """
+        lines = [
+            '# TYPE kis_request_seconds histogram',
+        ]
+        with self._lock:
+            for endpoint, values in sorted(self.latency.items()):
+                counts = np.searchsorted(np.sort(values), LATENCY_BUCKETS, side='right')
+                for le, count in zip(LATENCY_BUCKETS, counts):
+                    le = '+Inf' if le == float('inf') else f'{le:g}'
+                    lines.append(f'kis_request_seconds_bucket{{endpoint="{endpoint}",le="{le}"}} {count}')
+                lines.append(f'kis_request_seconds_sum{{endpoint="{endpoint}"}} {sum(values):.6f}')
+                lines.append(f'kis_request_seconds_count{{endpoint="{endpoint}"}} {len(values)}')
+
+            lines.append('# TYPE kis_response_code_total counter')
+            for endpoint, codes in sorted(self.codes.items()):
+                for code, count in sorted(codes.items()):
+                    lines.append(f'kis_response_code_total{{endpoint="{endpoint}",code="{code}"}} {count}')
+
+            lines.append('# TYPE kis_ratelimit_wait_seconds_total counter')
+            for endpoint, seconds in sorted(self.throttle_wait.items()):
+                lines.append(f'kis_ratelimit_wait_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}')
+
+            lines.append('# TYPE scheduler_lag_seconds summary')
+            if self.lags:
+                for q in (0.5, 0.99):
+                    lines.append(f'scheduler_lag_seconds{{quantile="{q}"}} {np.quantile(self.lags, q):.6f}')
+            lines.append(f'scheduler_lag_seconds_count {len(self.lags)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path=METRICS_FILE):
+        """
+        현재 지표를 텍스트 파일에 씁니다. 임시 파일에 쓴 뒤 교체하므로 수집기가 중간 상태를 읽지 않습니다.
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_text())
+        os.replace(tmp_path, path)
+
+# 프로세스 전체에서 공유하는 기본 지표 객체
+METRICS = Metrics()
@@ -0,0 +1,237 @@
+import json
+import time
+import random
+import threading
+import itertools
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# 초당 거래건수 초과 응답 (실제 API와 같은 형식)
+RATE_LIMIT_BODY = {"rt_cd": "1", "msg_cd": "EGW00201", "msg1": "초당 거래건수를 초과하였습니다."}
+
+class MockKISServer:
+    """
+    한국투자증권 API를 대신하는 로컬 모의 서버입니다. trading 패키지가 사용하는 엔드포인트
+    (oauth2/tokenP, uapi/hashkey, inquire-price, inquire-time-itemchartprice, order-cash, inquire-balance, inquire-daily-ccld)를 구현하며,
+    응답 지연, 초당 요청 한도 초과 응답, 주문 후 일정 시간이 지나면 체결되는 동작을 흉내 냅니다.
+    잔고와 체결 조회는 page_size 건씩 나누어 응답하고, 응답 헤더 tr_cont와 ctx_area_fk100/nk100으로 연속조회를 지원합니다.
+
+    매개변수:
+        prices (dict): {종목코드: 현재가} 딕셔너리입니다. 없는 종목은 10,000원으로 응답합니다.
+        holdings (dict): {종목코드: 보유수량} 형태의 초기 잔고입니다.
+        cash (int): 초기 예수금입니다. 기본값은 1억 원입니다.
+        latency (float): 요청별 평균 응답 지연(초)입니다. 기본값은 0.02입니다.
+        rate_limit (float): 초당 허용 요청 수입니다. None일 경우 제한하지 않습니다. 기본값은 20입니다.
+        fill_delay (float): 주문 후 체결까지 걸리는 시간(초)입니다. 기본값은 0.5입니다.
+        page_size (int): 연속조회 한 페이지의 건수입니다. 기본값은 20(모의투자 잔고조회 한도)입니다.
+        port (int): 포트 번호입니다. 0일 경우 빈 포트를 자동으로 사용합니다.
+    """
+    def __init__(self, prices=None, holdings=None, cash=100_000_000, latency=0.02, rate_limit=20,
+                 fill_delay=0.5, page_size=20, port=0):
+        self.prices = dict(prices or {})
+        self.holdings = Counter(holdings or {})
+        self.cash = cash
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.fill_delay = fill_delay
+        self.page_size = page_size
+
+        # 엔드포인트별 요청 수, 한도 초과 응답 수, 주문 기록
+        self.calls = Counter()
+        self.throttled = Counter()
+        self.orders = []
+        self._order_no = itertools.count(1)
+        self._window = []
+        self._minute_bars = {}
+        self._lock = threading.Lock()
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        백그라운드 스레드에서 서버를 시작하고 자기 자신을 반환합니다.
+        """
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        서버를 종료합니다.
+        """
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _throttle(self):
+        # 최근 1초 요청 수가 한도를 넘으면 True
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            self._window = [t for t in self._window if now - t < 1]
+            if len(self._window) >= self.rate_limit:
+                return True
+            self._window.append(now)
+        return False
+
+    def _settle(self):
+        # fill_delay가 지난 주문을 체결하고 잔고와 예수금에 반영
+        now = time.monotonic()
+        with self._lock:
+            for order in self.orders:
+                if order['tot_ccld_qty'] == 0 and now - order['_time'] >= self.fill_delay:
+                    qty = order['ord_qty']
+                    sign = 1 if order['sll_buy_dvsn_cd'] == '02' else -1
+                    if sign < 0:
+                        qty = min(qty, self.holdings[order['pdno']])
+                    order['tot_ccld_qty'] = qty
+                    order['rmn_qty'] = order['ord_qty'] - qty
+                    self.holdings[order['pdno']] += sign * qty
+                    self.cash -= sign * qty * order['avg_prvs']
+
+    def _page(self, records, ctx):
+        # ctx(다음 시작 위치)부터 page_size 건과 다음 페이지 존재 여부
+        start = int(ctx) if ctx else 0
+        end = start + self.page_size
+        return records[start:end], (str(end) if end < len(records) else '')
+
+    # 엔드포인트별 응답
+    def token(self, query, body):
+        return {"access_token": f"mock-{random.getrandbits(64):x}", "token_type": "Bearer", "expires_in": 86400}, {}
+
+    def hashkey(self, query, body):
+        return {"HASH": f"{hash(json.dumps(body, sort_keys=True)) & 0xffffffff:08x}"}, {}
+
+    def inquire_price(self, query, body):
+        price = self.prices.get(query.get('fid_input_iscd'), 10000)
+        return {"rt_cd": "0", "msg_cd": "MCA00000", "output": {"stck_prpr": str(price)}}, {}
+
+    def _day_bars(self, code):
+        # 종목별 당일 분봉 (09:00~15:30, 현재가에서 시작하는 랜덤워크와 장 시작/마감에 몰리는 거래량)
+        with self._lock:
+            if code not in self._minute_bars:
+                rng = random.Random(code)
+                price, bars = self.prices.get(code, 10000), []
+                for minute in range(9 * 60, 15 * 60 + 31):
+                    tick = 5 if price < 5000 else 10 if price < 20000 else 50
+                    close = max(tick, price + tick * rng.randint(-3, 3))
+                    u_shape = 1 + 4 * ((minute - 750) / 390) ** 2
+                    bars.append({'stck_bsop_date': time.strftime('%Y%m%d'), 'stck_cntg_hour': f'{minute // 60:02d}{minute % 60:02d}00',
+                                 'stck_oprc': str(price), 'stck_hgpr': str(max(price, close) + tick * rng.randint(0, 1)),
+                                 'stck_lwpr': str(max(tick, min(price, close) - tick * rng.randint(0, 1))),
+                                 'stck_prpr': str(close), 'cntg_vol': str(int(rng.expovariate(1 / 1000) * u_shape))})
+                    price = close
+                self._minute_bars[code] = bars
+            return self._minute_bars[code]
+
+    def inquire_time_itemchartprice(self, query, body):
+        # 기준 시각 이하의 최근 30개 분봉을 최신순으로 응답
+        bars = [bar for bar in self._day_bars(query.get('FID_INPUT_ISCD')) if bar['stck_cntg_hour'] <= query.get('FID_INPUT_HOUR_1', '153000')]
+        return {"rt_cd": "0", "msg_cd": "MCA00000", "output1": {}, "output2": bars[::-1][:30]}, {}
+
+    def order_cash(self, query, body, tr_id):
+        qty = int(body.get('ORD_QTY', 0))
+        if qty <= 0:
+            return {"rt_cd": "1", "msg_cd": "APBK0918", "msg1": "주문수량을 확인하세요.", "output": {}}, {}
+
+        with self._lock:
+            odno = f"{next(self._order_no):010d}"
+            self.orders.append({
+                'odno': odno,
+                'pdno': body['PDNO'],
+                'sll_buy_dvsn_cd': '02' if tr_id.endswith('0802U') else '01',
+                'ord_qty': qty,
+                'tot_ccld_qty': 0,
+                'rmn_qty': qty,
+                'avg_prvs': self.prices.get(body['PDNO'], 10000),
+                '_time': time.monotonic(),
+            })
+        output = {"KRX_FWDG_ORD_ORGNO": "00950", "ODNO": odno, "ORD_TMD": time.strftime('%H%M%S')}
+        return {"rt_cd": "0", "msg_cd": "APBK0013", "msg1": "주문 전송 완료 되었습니다.", "output": output}, {}
+
+    def inquire_balance(self, query, body):
+        self._settle()
+        with self._lock:
+            records = [{'pdno': code, 'hldg_qty': str(qty), 'prpr': str(self.prices.get(code, 10000))}
+                       for code, qty in sorted(self.holdings.items()) if qty > 0]
+            stock_value = sum(int(r['hldg_qty']) * int(r['prpr']) for r in records)
+            cash = self.cash
+        page, next_ctx = self._page(records, query.get('CTX_AREA_NK100'))
+        data = {"rt_cd": "0", "msg_cd": "20310000", "output1": page,
+                "output2": [{"dnca_tot_amt": str(int(cash)), "tot_evlu_amt": str(int(cash + stock_value))}],
+                "ctx_area_fk100": next_ctx, "ctx_area_nk100": next_ctx}
+        return data, {'tr_cont': 'M' if next_ctx else 'D'}
+
+    def inquire_daily_ccld(self, query, body):
+        self._settle()
+        with self._lock:
+            records = [{k: str(v) for k, v in order.items() if not k.startswith('_')} for order in self.orders]
+        page, next_ctx = self._page(records, query.get('CTX_AREA_NK100'))
+        data = {"rt_cd": "0", "msg_cd": "20310000", "output1": page, "output2": {},
+                "ctx_area_fk100": next_ctx, "ctx_area_nk100": next_ctx}
+        return data, {'tr_cont': 'M' if next_ctx else 'D'}
+
+    def dispatch(self, path, query, body, tr_id):
+        """
+        요청 경로에 맞는 응답 본문과 응답 헤더를 반환합니다.
+        """
+        routes = {
+            'oauth2/tokenP': self.token,
+            'uapi/hashkey': self.hashkey,
+            'quotations/inquire-price': self.inquire_price,
+            'quotations/inquire-time-itemchartprice': self.inquire_time_itemchartprice,
+            'trading/order-cash': lambda q, b: self.order_cash(q, b, tr_id),
+            'trading/inquire-balance': self.inquire_balance,
+            'trading/inquire-daily-ccld': self.inquire_daily_ccld,
+        }
+        for suffix, handler in routes.items():
+            if path.endswith(suffix):
+                self.calls[suffix] += 1
+                if self._throttle():
+                    self.throttled[suffix] += 1
+                    return 500, RATE_LIMIT_BODY, {}
+                if self.latency:
+                    time.sleep(random.expovariate(1 / self.latency))
+                data, headers = handler(query, body)
+                return 200, data, headers
+        return 404, {"rt_cd": "1", "msg_cd": "NOTFOUND", "msg1": path}, {}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _respond(self, body):
+                parsed = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(parsed.query, keep_blank_values=True).items()}
+                status, data, headers = server.dispatch(parsed.path.strip('/'), query, body, self.headers.get('tr_id', ''))
+                payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._respond({})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                raw = self.rfile.read(length) if length else b''
+                self._respond(json.loads(raw) if raw else {})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
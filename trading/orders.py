@@ -0,0 +1,212 @@
+import json
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from trading.auth import get_token_manager
+from trading.session import create_session, rate_limit_for, RateLimiter, request_json, get_paged
+
+# 주식일별주문체결조회 tr_id (모의투자, 실전투자)
+MOCK_CCLD_TR_ID = 'VTTC8001R'
+REAL_CCLD_TR_ID = 'TTTC8001R'
+
+class OrderClient:
+    """
+    연결 풀 세션 하나로 주문을 비동기(스레드 풀)로 제출하고, 주문 응답과 체결 내역을 추적하는 주문 클라이언트입니다.
+    주문마다 토큰을 새로 받거나 새로 연결하지 않으며, 동시 주문 수는 workers로, 초당 요청 수는 limiter로 제한합니다.
+    제출된 주문은 orders에 주문번호(ODNO)별로 기록되고, poll_fills()로 당일 체결 내역을 한 번에 조회하여 갱신합니다.
+
+    매개변수:
+        url_base (str): API의 기본 URL입니다.
+        app_key (str): API 접근을 위한 애플리케이션 키입니다.
+        app_secret (str): API 접근을 위한 애플리케이션 비밀 키입니다.
+        cano (str): 계좌번호(앞 8자리)입니다.
+        acnt_prdt_cd (str): 계좌 상품 코드입니다.
+        workers (int): 동시에 제출할 주문 수입니다. 기본값은 4입니다.
+        session (Session): 공유할 세션입니다. None일 경우 새로 생성합니다.
+        limiter (RateLimiter): 공유할 요청 한도 객체입니다. None일 경우 url_base에 맞는 한도로 생성합니다.
+        journal (OrderJournal): 제출/응답/체결을 기록할 저널입니다. None일 경우 기록하지 않습니다.
+    """
+    def __init__(self, url_base, app_key, app_secret, cano="50102599", acnt_prdt_cd="01",
+                 workers=4, session=None, limiter=None, journal=None):
+        self.url_base = url_base
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.cano = cano
+        self.acnt_prdt_cd = acnt_prdt_cd
+        self.session = session if session is not None else create_session(workers + 1)
+        self.limiter = limiter if limiter is not None else RateLimiter(rate_limit_for(url_base))
+        self.ccld_tr_id = MOCK_CCLD_TR_ID if 'openapivts' in url_base else REAL_CCLD_TR_ID
+        self.journal = journal
+
+        # 주문번호 → 주문 기록, 거부된 주문 목록, 체결 이벤트 구독 함수
+        self.orders = {}
+        self.rejects = []
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def _headers(self, tr_id):
+        return {
+            "Content-Type": "application/json",
+            "authorization": f"Bearer {get_token_manager(self.url_base, self.app_key, self.app_secret).get()}",
+            "appKey": self.app_key,
+            "appSecret": self.app_secret,
+            "tr_id": tr_id,
+            "custtype": "P",
+        }
+
+    def _hashkey(self, data):
+        # 주문 본문의 해시키 (같은 세션 사용)
+        headers = {'content-Type': 'application/json', 'appKey': self.app_key, 'appSecret': self.app_secret}
+        _, body = request_json(self.session, self.limiter, 'POST', f"{self.url_base}/uapi/hashkey",
+                               headers=headers, data=json.dumps(data), timeout=5)
+        return body["HASH"]
+
+    def place_order(self, code, tr_id, qty, cid=None):
+        """
+        주문 한 건을 제출하고 응답을 해석하여 반환합니다. (현재 스레드에서 실행)
+        저널이 있으면 요청을 보내기 전에 제출 사실을 디스크에 기록하고, 응답을 받은 뒤 응답을 기록합니다.
+
+        매개변수:
+            code (str): 종목코드입니다.
+            tr_id (str): 매수/매도 tr_id입니다.
+            qty (int): 주문 수량입니다.
+            cid (str): 주문 계획상의 자식 주문 ID입니다. (저널 기록용)
+
+        반환:
+            result (dict): 종목코드, tr_id, 주문수량, 주문번호(odno), 주문시각, 성공여부(ok), 응답코드(msg_cd), 메시지(msg)입니다.
+        """
+        data = {
+            "CANO": self.cano,
+            "ACNT_PRDT_CD": self.acnt_prdt_cd,
+            "PDNO": code,
+            "ORD_DVSN": "03",  # 최유리지정가
+            "ORD_QTY": str(int(qty)),
+            "ORD_UNPR": "0",
+        }
+        headers = {**self._headers(tr_id), "hashkey": self._hashkey(data)}
+
+        if self.journal is not None:
+            self.journal.append('submit', durable=True, cid=cid)
+        _, body = request_json(self.session, self.limiter, 'POST', f"{self.url_base}/uapi/domestic-stock/v1/trading/order-cash",
+                               headers=headers, data=json.dumps(data), timeout=5)
+        output = body.get('output') or {}
+
+        result = {
+            '종목코드': code,
+            'tr_id': tr_id,
+            '주문수량': int(qty),
+            'odno': output.get('ODNO'),
+            '주문시각': output.get('ORD_TMD'),
+            'ok': body.get('rt_cd') == '0',
+            'msg_cd': body.get('msg_cd'),
+            'msg': body.get('msg1'),
+        }
+
+        if self.journal is not None:
+            self.journal.append('ack', cid=cid, **result)
+
+        with self._lock:
+            if result['ok']:
+                self.orders[result['odno']] = {**result, '체결수량': 0, '체결단가': 0.0}
+            else:
+                self.rejects.append(result)
+
+        return result
+
+    def submit(self, code, tr_id, qty, cid=None):
+        """
+        주문을 스레드 풀에 제출하고 바로 반환합니다. 결과는 반환된 Future의 result()로 확인할 수 있습니다.
+        """
+        return self._executor.submit(self._safe_place_order, code, tr_id, qty, cid)
+
+    def _safe_place_order(self, code, tr_id, qty, cid=None):
+        # 네트워크 오류 등도 거부 내역으로 기록
+        try:
+            return self.place_order(code, tr_id, qty, cid)
+        except Exception as e:
+            result = {'종목코드': code, 'tr_id': tr_id, '주문수량': int(qty), 'odno': None, '주문시각': None,
+                      'ok': False, 'msg_cd': type(e).__name__, 'msg': str(e)}
+            with self._lock:
+                self.rejects.append(result)
+            return result
+
+    def poll_fills(self, date=None):
+        """
+        당일 주문체결 내역을 연속조회로 한 번에 가져와 주문별 체결수량을 갱신하고, 새로 체결된 수량을 이벤트로 반환합니다.
+
+        매개변수:
+            date (str): 'YYYYMMDD' 형식의 조회일입니다. None일 경우 오늘입니다.
+
+        반환:
+            fills (list): {'odno', '종목코드', 'tr_id', '체결수량', '체결단가'} 형태의 새 체결 이벤트 리스트입니다.
+        """
+        date = date or datetime.date.today().strftime('%Y%m%d')
+        params = {
+            "CANO": self.cano,
+            "ACNT_PRDT_CD": self.acnt_prdt_cd,
+            "INQR_STRT_DT": date,
+            "INQR_END_DT": date,
+            "SLL_BUY_DVSN_CD": "00",
+            "INQR_DVSN": "00",
+            "PDNO": "",
+            "CCLD_DVSN": "00",
+            "ORD_GNO_BRNO": "",
+            "ODNO": "",
+            "INQR_DVSN_3": "00",
+            "INQR_DVSN_1": "",
+        }
+        records, _ = get_paged(self.session, self.limiter,
+                               f"{self.url_base}/uapi/domestic-stock/v1/trading/inquire-daily-ccld",
+                               self._headers(self.ccld_tr_id), params)
+
+        fills = []
+        with self._lock:
+            for rec in records:
+                order = self.orders.get(rec.get('odno'))
+                if order is None:
+                    continue
+                filled = int(rec.get('tot_ccld_qty') or 0)
+                if filled > order['체결수량']:
+                    fills.append({'odno': order['odno'], '종목코드': order['종목코드'], 'tr_id': order['tr_id'],
+                                  '체결수량': filled - order['체결수량'], '체결단가': float(rec.get('avg_prvs') or 0)})
+                    order['체결수량'] = filled
+                    order['체결단가'] = float(rec.get('avg_prvs') or 0)
+                    if self.journal is not None:
+                        self.journal.append('fill', odno=order['odno'], 누적체결수량=filled, 체결단가=order['체결단가'])
+
+        # 체결 이벤트 구독 함수 호출 (계좌 상태 갱신 등)
+        for listener in self.listeners:
+            for fill in fills:
+                listener(fill)
+
+        return fills
+
+    def restore(self, state):
+        """
+        replay_journal로 복원한 주문(응답을 받은 주문과 거부 내역)을 다시 추적 대상으로 등록합니다.
+        """
+        with self._lock:
+            self.orders.update(state['orders'])
+            self.rejects += state['rejects']
+
+    def open_orders(self):
+        """
+        아직 전량 체결되지 않은 주문 목록을 반환합니다.
+        """
+        with self._lock:
+            return [o for o in self.orders.values() if o['체결수량'] < o['주문수량']]
+
+    def drain(self):
+        """
+        제출된 주문이 모두 끝날 때까지 기다립니다. 이후에는 새 주문을 제출할 수 없습니다.
+        """
+        self._executor.shutdown(wait=True)
+
+    def close(self):
+        """
+        제출된 주문이 모두 끝날 때까지 기다린 뒤 스레드 풀과 세션을 닫습니다.
+        """
+        self.drain()
+        self.session.close()
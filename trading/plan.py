@@ -0,0 +1,238 @@
+import os
+import json
+import datetime
+import numpy as np
+import pandas as pd
+
+from trading.execution import SELL_TR_ID, plan_orders, slice_times
+
+# 야간에 미리 계산한 실행 계획 파일
+PLAN_FILE = 'execution_plan.json'
+
+# 투자 금액으로 사용할 총평가금액 비율 (수수료, 가격 변동 여유분 제외)
+INVEST_RATIO = 0.98
+
+# 장 시작 시 투자수량 변화가 계획 수량의 이 비율 이하이면 재계획하지 않고 마지막 자식 주문에 반영
+REPLAN_TOLERANCE = 0.1
+
+def size_orders(mp, holdings, prices, invest_amount):
+    """
+    목표 비중, 보유수량, 가격으로 종목별 목표수량과 투자수량(목표수량 - 보유수량)을 계산하는 함수입니다.
+    목표에 없는 보유 종목은 전량 매도하며, 가격을 모르는 종목은 이번 세션에서 매매하지 않습니다.
+
+    매개변수:
+        mp (DataFrame): 종목코드, weight 컬럼을 가진 목표 비중입니다.
+        holdings (DataFrame): 종목코드, 보유수량 컬럼을 가진 현재 보유수량입니다.
+        prices (Series): 종목코드를 인덱스로 하는 가격입니다.
+        invest_amount (float): 투자 금액입니다.
+
+    반환:
+        target (DataFrame): 종목코드, weight, 보유수량, 현재가, 목표수량, 투자수량 컬럼을 가진 데이터 프레임입니다.
+    """
+    target = mp[['종목코드', 'weight']].merge(holdings[['종목코드', '보유수량']], on='종목코드', how='outer')
+    target['보유수량'] = target['보유수량'].fillna(0).astype(int)
+    target['weight'] = target['weight'].fillna(0)
+    target['현재가'] = target['종목코드'].map(prices).astype(float)
+
+    target['목표수량'] = np.where(target['종목코드'].isin(mp['종목코드']), np.round(invest_amount * target['weight'] / target['현재가']), 0)
+    target['투자수량'] = target['목표수량'] - target['보유수량']
+
+    # 현재가를 조회하지 못한 종목은 이번 세션에서 매매하지 않음
+    target = target.dropna(subset=['현재가']).reset_index(drop=True)
+    target[['목표수량', '투자수량']] = target[['목표수량', '투자수량']].astype(int)
+
+    return target
+
+def _sort_orders(plan_df):
+    # 주문시각 순, 같은 시각에는 매도 주문을 먼저 배치
+    plan_df = plan_df.assign(매도=plan_df['tr_id'] == SELL_TR_ID)
+    plan_df = plan_df.sort_values(['주문시각', '매도'], ascending=[True, False], kind='stable')
+    return plan_df.drop(columns='매도').reset_index(drop=True)
+
+def _assign_cid(plan_df):
+    # 저널과 주문 추적에 사용하는 자식 주문 ID (종목코드-순번)
+    plan_df = plan_df.reset_index(drop=True)
+    plan_df['cid'] = plan_df['종목코드'] + '-' + plan_df.index.astype(str)
+    return plan_df
+
+def build_plan(target, start_dt, end_dt, method='twap', n_slices=10, profile=None, invest_amount=None):
+    """
+    종목별 투자수량을 자식 주문 계획으로 나누어 실행 계획을 만드는 함수입니다.
+
+    매개변수:
+        target (DataFrame): size_orders가 반환한 데이터 프레임입니다.
+        start_dt (datetime): 주문 시작 시각입니다.
+        end_dt (datetime): 주문 종료 시각입니다.
+        method (str): 'twap' 혹은 'vwap'입니다.
+        n_slices (int): 종목별 최대 자식 주문 수입니다.
+        profile (Series): VWAP에 사용할 장중 거래량 비중입니다.
+        invest_amount (float): 계획에 사용한 투자 금액입니다. (기록용)
+
+    반환:
+        plan (dict): 실행 계획입니다. (trade_date, start, end, method, n_slices, profile, invest_amount, target, orders)
+    """
+    plan = {
+        'trade_date': pd.Timestamp(start_dt).strftime('%Y%m%d'),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'start': pd.Timestamp(start_dt).isoformat(),
+        'end': pd.Timestamp(end_dt).isoformat(),
+        'method': method,
+        'n_slices': n_slices,
+        'profile': None if profile is None else profile.to_dict(),
+        'invest_amount': invest_amount,
+        'target': target,
+        'orders': _assign_cid(plan_orders(target, start_dt, end_dt, method, n_slices, profile)),
+    }
+
+    return plan
+
+def save_plan(plan, path=PLAN_FILE):
+    """
+    실행 계획을 JSON 파일로 저장합니다. 표는 컬럼 목록과 행 배열(split 형식)로 저장하며,
+    임시 파일에 쓴 뒤 교체하므로 저장 중 중단되어도 기존 계획이 깨지지 않습니다.
+    """
+    data = dict(plan)
+    for key in ['target', 'orders']:
+        df = plan[key].copy()
+        if '주문시각' in df:
+            df['주문시각'] = df['주문시각'].astype(str)
+        data[key] = {'columns': list(df.columns), 'data': df.astype(object).values.tolist()}
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'), default=float)
+    os.replace(tmp_path, path)
+
+def load_plan(path=PLAN_FILE, trade_date=None):
+    """
+    저장된 실행 계획을 불러옵니다.
+
+    매개변수:
+        path (str): 계획 파일 경로입니다.
+        trade_date (str): 'YYYYMMDD' 형식의 거래일입니다. 주어진 경우 계획의 거래일이 다르면 None을 반환합니다.
+
+    반환:
+        plan (dict): build_plan과 같은 형태의 실행 계획입니다. 파일이 없으면 None입니다.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        plan = json.load(f)
+    if trade_date is not None and plan['trade_date'] != trade_date:
+        return None
+
+    for key in ['target', 'orders']:
+        plan[key] = pd.DataFrame(plan[key]['data'], columns=plan[key]['columns'])
+    plan['orders']['주문시각'] = pd.to_datetime(plan['orders']['주문시각'])
+    if plan['profile'] is not None:
+        plan['profile'] = pd.Series(plan['profile'])
+
+    return plan
+
+def fold_delta(child_df, delta):
+    """
+    한 종목의 자식 주문 계획에 수량 변화를 반영하는 함수입니다. 늘어난 수량은 마지막 자식 주문에 더하고,
+    줄어든 수량은 마지막 자식 주문부터 거꾸로 빼며 수량이 0이 된 주문은 제외합니다.
+
+    매개변수:
+        child_df (DataFrame): 한 종목의 자식 주문 계획입니다. (주문시각 순)
+        delta (int): 주문 방향 기준의 수량 변화입니다. 양수는 더 많이, 음수는 더 적게 주문합니다.
+
+    반환:
+        child_df (DataFrame): 수량을 조정한 자식 주문 계획입니다.
+    """
+    qty = child_df['주문수량'].to_numpy(np.int64).copy()
+    if delta > 0:
+        qty[-1] += delta
+    else:
+        # 뒤에서부터 누적한 수량이 줄일 수량을 넘지 않는 만큼 빼기
+        remaining = -delta
+        for i in range(len(qty) - 1, -1, -1):
+            cut = min(qty[i], remaining)
+            qty[i] -= cut
+            remaining -= cut
+            if remaining == 0:
+                break
+
+    child_df = child_df.assign(주문수량=qty)
+    return child_df[child_df['주문수량'] > 0]
+
+def refresh_plan(plan, holdings, prices, invest_amount, start_dt=None, tolerance=REPLAN_TOLERANCE):
+    """
+    장 시작 직전에 새로 조회한 보유수량과 가격으로 실행 계획을 갱신하는 함수입니다.
+    투자수량이 그대로인 종목은 미리 계산한 자식 주문을 그대로 사용하고, 변화가 계획 수량의 tolerance 이하인 종목은
+    차이만 마지막 자식 주문에 반영(fold_delta)하며, 그보다 크게 바뀌거나 매매 방향이 바뀐 종목만 자식 주문을 다시 계산합니다.
+    start_dt가 계획의 시작 시각보다 늦으면(늦게 실행된 경우) 남은 시간에 맞추어 전체 주문을 다시 나눕니다.
+
+    매개변수:
+        plan (dict): load_plan이 반환한 실행 계획입니다.
+        holdings (DataFrame): 종목코드, 보유수량 컬럼을 가진 현재 보유수량입니다.
+        prices (Series): 종목코드를 인덱스로 하는 현재가입니다.
+        invest_amount (float): 투자 금액입니다.
+        start_dt (datetime): 주문을 시작할 수 있는 가장 이른 시각입니다. None일 경우 계획의 시작 시각입니다.
+        tolerance (float): 재계획 없이 반영할 최대 수량 변화 비율입니다. 기본값은 REPLAN_TOLERANCE입니다.
+
+    반환:
+        target (DataFrame): 갱신된 종목별 투자수량입니다.
+        plan_df (DataFrame): 갱신된 자식 주문 계획입니다. (cid 포함)
+        changed (list): 자식 주문을 다시 계산한 종목코드 리스트입니다.
+    """
+    plan_start, plan_end = pd.Timestamp(plan['start']), pd.Timestamp(plan['end'])
+    start = plan_start if start_dt is None else max(plan_start, pd.Timestamp(start_dt))
+
+    mp = plan['target'].loc[plan['target']['weight'] > 0, ['종목코드', 'weight']]
+    target = size_orders(mp, holdings, prices, invest_amount)
+
+    planned = plan['target'].set_index('종목코드')['투자수량']
+    current = target.set_index('종목코드')['투자수량']
+    codes = planned.index.union(current.index)
+    planned, current = planned.reindex(codes, fill_value=0), current.reindex(codes, fill_value=0)
+    orders = plan['orders'].drop(columns='cid')
+
+    if start == plan_start:
+        # 같은 방향으로 tolerance 이내에서 바뀐 종목은 차이만 반영, 그 외에 바뀐 종목은 재계획
+        delta = (current - planned) * np.sign(planned)
+        small = (np.sign(current) == np.sign(planned)) & (delta.abs() <= tolerance * planned.abs())
+        folded = list(codes[(current != planned) & small & (planned != 0)])
+        changed = list(codes[(current != planned) & ~(small & (planned != 0))])
+
+        kept = orders[~orders['종목코드'].isin(changed + folded)]
+        adjusted = [fold_delta(orders[orders['종목코드'] == code], int(delta[code])) for code in folded]
+        kept = pd.concat([kept] + adjusted, ignore_index=True) if adjusted else kept
+    else:
+        # 시작이 늦어진 경우 매매할 종목 전체를 남은 시간에 맞추어 다시 나눔
+        changed = list(codes[current != 0])
+        kept = orders.iloc[:0]
+
+    replanned = plan_orders(target[target['종목코드'].isin(changed)], start, plan_end, plan['method'],
+                            plan['n_slices'], plan['profile'])
+
+    plan_df = pd.concat([df for df in [kept, replanned] if len(df)] or [replanned], ignore_index=True)
+
+    return target, _assign_cid(_sort_orders(plan_df)), changed
+
+def respread_orders(plan_df, start_dt, end_dt):
+    """
+    재시작 시 예정 시각이 지난 자식 주문이 한꺼번에 실행되지 않도록 남은 시간에 다시 나누는 함수입니다.
+    예정 시각이 지난 주문이 있는 종목은 그 종목의 남은 주문 전체를 start_dt ~ end_dt 구간에 같은 간격으로 다시 배치합니다.
+    저널에 기록된 자식 주문 ID(cid)와 수량은 그대로 두고 주문시각만 바꾸므로, 다시 중단되더라도 같은 주문을 두 번 제출하지 않습니다.
+
+    매개변수:
+        plan_df (DataFrame): 아직 제출하지 않은 자식 주문 계획입니다. (replay_journal의 pending)
+        start_dt (datetime): 주문을 다시 시작할 시각입니다.
+        end_dt (datetime): 주문 종료 시각입니다.
+
+    반환:
+        plan_df (DataFrame): 주문시각을 조정한 자식 주문 계획입니다. (주문시각 순)
+    """
+    start = pd.Timestamp(start_dt)
+    overdue = plan_df.loc[plan_df['주문시각'] < start, '종목코드'].unique()
+    if not len(overdue):
+        return plan_df
+
+    plan_df = plan_df.copy()
+    for code, idx in plan_df[plan_df['종목코드'].isin(overdue)].groupby('종목코드').groups.items():
+        idx = plan_df.loc[idx].sort_values('주문시각', kind='stable').index
+        plan_df.loc[idx, '주문시각'] = slice_times(start, end_dt, len(idx))
+
+    return _sort_orders(plan_df)
@@ -0,0 +1,159 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+from trading.auth import get_token_manager
+from trading.session import create_session, rate_limit_for, RateLimiter, request_json
+
+def _fetch_price(session, limiter, url_base, app_key, app_secret, code):
+    """
+    한 종목의 현재가를 조회하는 내부 함수입니다. (한도 초과 응답은 request_json이 다시 요청)
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {get_token_manager(url_base, app_key, app_secret).get()}",
+        "appKey": app_key,
+        "appSecret": app_secret,
+        "tr_id": "FHKST01010100"
+    }
+    params = {"fid_cond_mrkt_div_code": "J", "fid_input_iscd": code}
+    _, data = request_json(session, limiter, 'GET', f"{url_base}/uapi/domestic-stock/v1/quotations/inquire-price",
+                           headers=headers, params=params, timeout=5)
+
+    return int(data['output']['stck_prpr'])
+
+def fetch_prices(url_base, app_key, app_secret, codes, session=None, limiter=None, workers=8):
+    """
+    여러 종목의 현재가를 초당 요청 한도 안에서 동시에 조회하는 함수입니다.
+    하나의 연결 풀 세션과 캐시된 액세스 토큰을 공유하므로 종목마다 연결이나 토큰 발급을 반복하지 않습니다.
+
+    매개변수:
+        url_base (str): API의 기본 URL입니다.
+        app_key (str): API 접근을 위한 애플리케이션 키입니다.
+        app_secret (str): API 접근을 위한 애플리케이션 비밀 키입니다.
+        codes (Series): 조회할 종목코드 시리즈입니다.
+        session (Session): 재사용할 세션입니다. None일 경우 새로 생성합니다.
+        limiter (RateLimiter): 공유할 요청 한도 객체입니다. None일 경우 url_base에 맞는 한도로 생성합니다.
+        workers (int): 동시에 요청할 스레드 수입니다. 기본값은 8입니다.
+
+    반환:
+        price (Series): codes와 같은 인덱스를 가진 현재가 시리즈입니다. 조회에 실패한 종목은 NaN입니다.
+    """
+    codes = pd.Series(codes)
+    session = session if session is not None else create_session(workers)
+    limiter = limiter if limiter is not None else RateLimiter(rate_limit_for(url_base))
+
+    def fetch(code):
+        try:
+            return _fetch_price(session, limiter, url_base, app_key, app_secret, code)
+        except Exception as e:
+            print(f"Error with {code}: {e}")
+            return None
+
+    # 같은 종목은 한 번만 조회
+    unique_codes = codes.unique()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        prices = dict(zip(unique_codes, executor.map(fetch, unique_codes)))
+
+    price = codes.map(prices).astype(float)
+    price.name = '현재가'
+
+    return price
+
+# 주식당일분봉조회 tr_id
+MINUTE_CHART_TR_ID = 'FHKST03010200'
+
+def fetch_minute_bars(session, limiter, url_base, app_key, app_secret, code, end_time='153000', max_pages=14):
+    """
+    한 종목의 당일 분봉을 장 마감(end_time)부터 장 시작까지 거꾸로 연속 조회하는 함수입니다.
+    한 번에 30개 분봉을 주므로, 가장 이른 분봉의 1분 전 시각을 다음 요청의 FID_INPUT_HOUR_1로 사용합니다.
+
+    매개변수:
+        session (Session): 요청에 사용할 세션입니다.
+        limiter (RateLimiter): 요청 한도 객체입니다.
+        url_base (str): API의 기본 URL입니다.
+        app_key (str): API 접근을 위한 애플리케이션 키입니다.
+        app_secret (str): API 접근을 위한 애플리케이션 비밀 키입니다.
+        code (str): 종목코드입니다.
+        end_time (str): 'HHMMSS' 형식의 조회 기준 시각입니다. 기본값은 장 마감 '153000'입니다.
+        max_pages (int): 최대 요청 수입니다. 기본값은 14(390분 / 30)입니다.
+
+    반환:
+        bars (DataFrame): 시각, 시가, 고가, 저가, 종가, 거래량 컬럼을 가진 분봉 데이터 프레임입니다. (시각 오름차순)
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {get_token_manager(url_base, app_key, app_secret).get()}",
+        "appKey": app_key,
+        "appSecret": app_secret,
+        "tr_id": MINUTE_CHART_TR_ID
+    }
+    params = {"FID_ETC_CLS_CODE": "", "FID_COND_MRKT_DIV_CODE": "J", "FID_INPUT_ISCD": code,
+              "FID_INPUT_HOUR_1": end_time, "FID_PW_DATA_INCU_YN": "N"}
+
+    records = []
+    for _ in range(max_pages):
+        _, data = request_json(session, limiter, 'GET',
+                               f"{url_base}/uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice",
+                               headers=headers, params=params)
+        if data.get('rt_cd', '0') != '0':
+            raise RuntimeError(f"{data.get('msg_cd')}: {data.get('msg1')}")
+        page = [row for row in data.get('output2') or [] if row.get('stck_cntg_hour')]
+        if not page:
+            break
+        records += page
+
+        # 가장 이른 분봉의 1분 전부터 다시 조회 (장 시작 이전이면 종료)
+        earliest = min(row['stck_cntg_hour'] for row in page)
+        if earliest <= '090000':
+            break
+        prev = datetime.datetime.strptime(earliest, '%H%M%S') - datetime.timedelta(minutes=1)
+        params['FID_INPUT_HOUR_1'] = prev.strftime('%H%M%S')
+
+    bars = pd.DataFrame.from_records(records, columns=['stck_bsop_date', 'stck_cntg_hour', 'stck_oprc', 'stck_hgpr',
+                                                       'stck_lwpr', 'stck_prpr', 'cntg_vol'])
+    bars = pd.DataFrame({
+        '시각': pd.to_datetime(bars['stck_bsop_date'] + bars['stck_cntg_hour'], format='%Y%m%d%H%M%S'),
+        '시가': bars['stck_oprc'].astype(np.int64),
+        '고가': bars['stck_hgpr'].astype(np.int64),
+        '저가': bars['stck_lwpr'].astype(np.int64),
+        '종가': bars['stck_prpr'].astype(np.int64),
+        '거래량': bars['cntg_vol'].astype(np.int64),
+    })
+
+    return bars.drop_duplicates('시각').sort_values('시각').reset_index(drop=True)
+
+def collect_minute_bars(store, url_base, app_key, app_secret, codes, session=None, limiter=None, workers=8):
+    """
+    여러 종목의 당일 분봉을 요청 한도 안에서 동시에 조회하여 분봉 저장소(MinuteBarStore)에 추가하는 함수입니다.
+    장 마감 후 한 번 실행하면 거래일별 파일에 하루치가 저장됩니다.
+
+    매개변수:
+        store (MinuteBarStore): 분봉 저장소입니다.
+        url_base (str): API의 기본 URL입니다.
+        app_key (str): API 접근을 위한 애플리케이션 키입니다.
+        app_secret (str): API 접근을 위한 애플리케이션 비밀 키입니다.
+        codes (list): 조회할 종목코드 리스트입니다.
+        session (Session): 재사용할 세션입니다. None일 경우 새로 생성합니다.
+        limiter (RateLimiter): 공유할 요청 한도 객체입니다. None일 경우 url_base에 맞는 한도로 생성합니다.
+        workers (int): 동시에 요청할 스레드 수입니다. 기본값은 8입니다.
+
+    반환:
+        counts (Series): 종목코드별 저장된 분봉 수입니다. 실패한 종목은 NaN입니다.
+    """
+    session = session if session is not None else create_session(workers)
+    limiter = limiter if limiter is not None else RateLimiter(rate_limit_for(url_base))
+
+    def collect(code):
+        try:
+            return store.append(code, fetch_minute_bars(session, limiter, url_base, app_key, app_secret, code))
+        except Exception as e:
+            print(f"Error with {code}: {e}")
+            return None
+
+    codes = list(dict.fromkeys(codes))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        counts = pd.Series(list(executor.map(collect, codes)), index=codes, dtype=float, name='분봉수')
+
+    return counts
@@ -0,0 +1,122 @@
+import heapq
+import itertools
+import threading
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+class OrderScheduler:
+    """
+    예약된 주문을 실행 시각 순서의 힙(heap)에 보관하고, 다음 주문 시각까지 잠들었다가 도래한 주문을 스레드 풀로 동시에 실행하는 스케줄러입니다.
+    바쁜 대기(busy-wait) 없이 Event.wait로 잠들기 때문에 대기 중 CPU를 거의 사용하지 않으며,
+    예약 시각 대비 실제 실행 시각의 지연(lag)을 기록하여 타이밍 오차를 확인할 수 있습니다.
+
+    매개변수:
+        workers (int): 동시에 실행할 주문 수입니다. 기본값은 4입니다.
+        metrics (Metrics): 실행 지연을 함께 기록할 지표 객체입니다. None일 경우 lags에만 기록합니다.
+    """
+    def __init__(self, workers=4, metrics=None):
+        self.workers = workers
+        self.metrics = metrics
+        self.lags = []
+        self._queue = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._active = 0
+
+    def add(self, when, func, *args):
+        """
+        when 시각에 func(*args)를 실행하도록 예약합니다. 실행 중에도 예약할 수 있습니다.
+
+        매개변수:
+            when (datetime): 실행 시각입니다.
+            func (callable): 실행할 함수입니다.
+            *args: func에 전달할 인자입니다.
+        """
+        with self._lock:
+            heapq.heappush(self._queue, (when.timestamp(), next(self._seq), func, args))
+        self._wakeup.set()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def _pop_due(self, now):
+        # 실행 시각이 도래한 항목을 모두 꺼냄
+        due = []
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now:
+                due.append(heapq.heappop(self._queue))
+        return due
+
+    def _next_time(self):
+        with self._lock:
+            return self._queue[0][0] if self._queue else None
+
+    def run(self, end_dt):
+        """
+        end_dt까지 예약된 주문을 실행합니다. 남은 예약과 실행 중인 주문이 모두 없거나 end_dt가 되거나 stop()이 호출되면 종료하며,
+        이미 시작된 주문은 끝날 때까지 기다립니다. end_dt 이후로 예약된 주문은 실행하지 않습니다.
+        실행 중인 작업이 스스로 다음 실행을 예약할 수 있으므로 잠시 예약이 비어도 실행 중인 작업이 있으면 종료하지 않습니다.
+
+        매개변수:
+            end_dt (datetime): 종료 시각입니다.
+        """
+        end = end_dt.timestamp()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while not self._stopped:
+                now = datetime.datetime.now().timestamp()
+                if now >= end:
+                    break
+
+                for when, _, func, args in self._pop_due(now):
+                    self.lags.append(now - when)
+                    if self.metrics is not None:
+                        self.metrics.observe_lag(now - when)
+                    with self._lock:
+                        self._active += 1
+                    executor.submit(self._execute, func, args)
+
+                # 다음 주문 시각(혹은 종료 시각)까지 대기, 새 예약이 들어오거나 실행 중인 작업이 끝나면 깨어남
+                self._wakeup.clear()
+                next_time = self._next_time()
+                if next_time is None:
+                    with self._lock:
+                        if self._active == 0 and not self._queue:
+                            break
+                    next_time = end
+                timeout = min(next_time, end) - datetime.datetime.now().timestamp()
+                if timeout > 0:
+                    self._wakeup.wait(timeout)
+
+    def _execute(self, func, args):
+        # 개별 주문의 오류가 다른 주문 실행을 막지 않도록 처리
+        try:
+            func(*args)
+        except Exception as e:
+            print(f"Error with scheduled order {args}: {e}")
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._wakeup.set()
+
+    def stop(self):
+        """
+        실행 중인 run()을 종료합니다. (다른 스레드에서 호출)
+        """
+        self._stopped = True
+        self._wakeup.set()
+
+    def lag_summary(self):
+        """
+        예약 시각 대비 실제 실행 지연(ms)의 요약 통계를 반환합니다.
+
+        반환:
+            summary (dict): count, mean, p50, p99, max (ms) 값입니다.
+        """
+        if not self.lags:
+            return {'count': 0}
+        lags = np.array(self.lags) * 1000
+        return {'count': len(lags), 'mean': lags.mean(), 'p50': np.percentile(lags, 50),
+                'p99': np.percentile(lags, 99), 'max': lags.max()}
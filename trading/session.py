@@ -0,0 +1,147 @@
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+from trading.metrics import METRICS
+
+# 초당 거래건수 초과 시 응답 메시지 코드
+RATE_LIMIT_MSG_CD = 'EGW00201'
+
+# 초당 요청 한도 (실전투자, 모의투자)
+REAL_RATE_LIMIT = 20
+MOCK_RATE_LIMIT = 5
+
+def rate_limit_for(url_base):
+    """
+    API 주소에 맞는 초당 요청 한도를 반환합니다. 모의투자 도메인(openapivts)은 실전보다 한도가 낮습니다.
+    """
+    return MOCK_RATE_LIMIT if 'openapivts' in url_base else REAL_RATE_LIMIT
+
+def create_session(pool_size=20):
+    """
+    연결을 재사용하는 requests 세션을 생성합니다. 동시에 요청하는 스레드 수만큼 연결 풀을 잡아 매 요청마다 새로 연결하지 않습니다.
+
+    매개변수:
+        pool_size (int): 호스트별 최대 연결 수입니다. 기본값은 20입니다.
+
+    반환:
+        session (Session): 연결 풀이 설정된 세션입니다.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+class RateLimiter:
+    """
+    초당 요청 수를 제한하는 토큰 버킷입니다. 여러 스레드가 같은 객체를 공유하며, acquire()는 요청 가능할 때까지 대기합니다.
+
+    매개변수:
+        rate (float): 초당 허용 요청 수입니다.
+        burst (int): 한 번에 몰아서 보낼 수 있는 최대 요청 수입니다. 기본값은 1(요청 간격을 1/rate초로 고르게 유지)입니다.
+    """
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        요청 한 건을 보낼 수 있을 때까지 대기합니다.
+
+        반환:
+            wait (float): 대기한 시간(초)입니다.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+def request_json(session, limiter, method, url, retries=3, **kwargs):
+    """
+    요청 한도를 지키며 요청을 보내고 응답 본문(JSON)을 반환하는 함수입니다.
+    초당 거래건수 초과 응답(EGW00201)을 받으면 잠시 기다린 뒤 retries번까지 다시 요청합니다.
+    요청마다 응답 시간, 오류 응답 코드, 요청 한도 대기 시간을 엔드포인트(URL 마지막 경로)별로 METRICS에 기록합니다.
+
+    매개변수:
+        session (Session): 요청에 사용할 세션입니다.
+        limiter (RateLimiter): 요청 한도 객체입니다.
+        method (str): 'GET' 혹은 'POST'입니다.
+        url (str): 요청 URL입니다.
+        retries (int): 한도 초과 시 재요청 횟수입니다. 기본값은 3입니다.
+        **kwargs: session.request에 전달할 인자(headers, params, data 등)입니다.
+
+    반환:
+        res (Response): 응답 객체입니다.
+        data (dict): 응답 본문입니다.
+    """
+    kwargs.setdefault('timeout', 10)
+    endpoint = url.rstrip('/').rsplit('/', 1)[-1]
+    for attempt in range(retries + 1):
+        METRICS.observe_wait(endpoint, limiter.acquire())
+        start = time.perf_counter()
+        try:
+            res = session.request(method, url, **kwargs)
+            data = res.json()
+        except Exception:
+            METRICS.observe(endpoint, time.perf_counter() - start, error=True)
+            raise
+
+        # 정상 응답(rt_cd '0')이 아닌 경우만 응답 코드를 기록
+        failed = data.get('rt_cd', '0') != '0' or not res.ok
+        METRICS.observe(endpoint, time.perf_counter() - start, data.get('msg_cd') if failed else None,
+                        error=failed)
+        if data.get('msg_cd') != RATE_LIMIT_MSG_CD or attempt == retries:
+            return res, data
+        time.sleep(0.2 * (attempt + 1))
+
+def get_paged(session, limiter, url, headers, params, output='output1', max_pages=100):
+    """
+    한국투자증권 연속조회 API의 모든 페이지를 가져오는 함수입니다.
+    응답 헤더 tr_cont가 'F' 혹은 'M'이면 다음 페이지가 있으므로, 응답의 ctx_area_fk100/ctx_area_nk100을
+    다음 요청의 CTX_AREA_FK100/CTX_AREA_NK100으로 돌려주고 요청 헤더 tr_cont를 'N'으로 설정하여 이어서 조회합니다.
+
+    매개변수:
+        session (Session): 요청에 사용할 세션입니다.
+        limiter (RateLimiter): 요청 한도 객체입니다.
+        url (str): 조회 URL입니다.
+        headers (dict): 요청 헤더입니다.
+        params (dict): 요청 파라미터입니다. CTX_AREA 값은 이 함수가 채웁니다.
+        output (str): 페이지별로 이어 붙일 목록 항목 이름입니다. 기본값은 'output1'입니다.
+        max_pages (int): 최대 페이지 수입니다. (잘못된 응답으로 무한 반복하지 않도록 제한)
+
+    반환:
+        records (list): 모든 페이지의 output 목록을 이어 붙인 리스트입니다.
+        last (dict): 마지막 페이지의 응답 본문입니다. (output2 등 요약 정보 확인용)
+    """
+    headers = {**headers, 'tr_cont': ''}
+    params = {**params, 'CTX_AREA_FK100': '', 'CTX_AREA_NK100': ''}
+    records = []
+
+    for _ in range(max_pages):
+        res, data = request_json(session, limiter, 'GET', url, headers=headers, params=params)
+        if data.get('rt_cd', '0') != '0':
+            raise RuntimeError(f"{data.get('msg_cd')}: {data.get('msg1')}")
+        records += data.get(output) or []
+
+        # 다음 페이지가 없으면 종료
+        if res.headers.get('tr_cont', '') not in ('F', 'M'):
+            break
+        headers['tr_cont'] = 'N'
+        params['CTX_AREA_FK100'] = data.get('ctx_area_fk100', '').strip()
+        params['CTX_AREA_NK100'] = data.get('ctx_area_nk100', '').strip()
+
+    return records, data
@@ -1,21 +1,18 @@
 import requests
 import json
-import keyring
-import pandas as pd
 import time
 from datetime import timedelta
-import pandas as pd
+from trading.auth import get_token_manager
+from trading.session import create_session, rate_limit_for, RateLimiter
+from trading.account import fetch_balance
 
 
-# key
-app_key = keyring.get_password('mock_app_key', 'stanfm')
-app_secret = keyring.get_password('mock_app_secret', 'stanfm')
-
 url_base = "https://openapivts.koreainvestment.com:29443" # 모의투자
 
 def get_access_token(url_base, app_key, app_secret):
     """
     API 액세스 토큰을 얻기 위한 함수입니다.
+    토큰은 TokenManager에 만료 시각과 함께 캐시되므로, 만료가 가까울 때만 oauth2/tokenP로 새로 발급받습니다.
 
     매개변수:
         app_key (str): API 사용자의 app key입니다.
@@ -24,26 +21,7 @@ def get_access_token(url_base, app_key, app_secret):
     반환:
         access_token (str): API 호출에 사용될 액세스 토큰입니다.
     """
-    headers = {"content-type": "application/json"}
-    path = "oauth2/tokenP"
-    
-    # 요청 본문에 필요한 정보를 담습니다.
-    body = {
-        "grant_type": "client_credentials",
-        "appkey": app_key,
-        "appsecret": app_secret
-    }
-    
-    # 전체 URL을 구성합니다.
-    url = f"{url_base}/{path}"
-    
-    # POST 요청을 보내고 응답을 받습니다.
-    res = requests.post(url, headers=headers, data=json.dumps(body))
-    
-    # 응답으로부터 액세스 토큰을 추출합니다.
-    access_token = res.json()['access_token']
-    
-    return access_token
+    return get_token_manager(url_base, app_key, app_secret).get()
 
 def hashkey(url_base, app_key, app_secret, datas):
     """
@@ -127,7 +105,7 @@ def get_price(url_base, app_key, app_secret, code):
     return price
 
 # 주문
-def trading(url_base, app_key, app_secret, code, tr_id):
+def trading(url_base, app_key, app_secret, code, tr_id, qty=1):
     """
     주식을 매수하거나 매도하는 주문을 실행하는 함수입니다.
 
@@ -137,6 +115,7 @@ def trading(url_base, app_key, app_secret, code, tr_id):
         app_secret (str): API 접근을 위한 애플리케이션 비밀 키입니다.
         code (str): 주문할 주식의 종목 코드입니다.
         tr_id (str): 매수 또는 매도 방법에 대한 코드입니다. 이 코드는 거래의 유형(매수, 매도 등)을 결정합니다.
+        qty (int): 주문 수량입니다. 기본값은 1입니다.
 
     반환:
         없음. 결과는 직접 확인해야 합니다. 함수는 API로 주문 요청을 보내고, 그 응답을 처리하지만 반환 값은 제공하지 않습니다.
@@ -156,7 +135,7 @@ def trading(url_base, app_key, app_secret, code, tr_id):
         "ACNT_PRDT_CD": "01",  # 계좌 상품 코드
         "PDNO": code,  # 상품 번호(종목 코드)
         "ORD_DVSN": "03",  # 주문 구분 (예: 지정가, 시장가 등)
-        "ORD_QTY": "1",  # 주문 수량
+        "ORD_QTY": str(int(qty)),  # 주문 수량
         "ORD_UNPR": "0",  # 주문 단가
     }
     
@@ -176,67 +155,21 @@ def trading(url_base, app_key, app_secret, code, tr_id):
 
 
 # 계좌 잔고 조회
-def check_account(url_base, app_key, app_secret, access_token):
+def check_account(url_base, app_key, app_secret, access_token=None):
     """
-    계좌 잔고를 조회하는 함수입니다.
+    계좌 잔고를 조회하는 함수입니다. 연속조회 키(CTX_AREA_FK100/NK100)를 다음 요청에 돌려주어 모든 페이지를 조회합니다.
 
     매개변수:
         url_base (str): API의 기본 URL입니다.
         app_key (str): API 접근을 위한 애플리케이션 키입니다.
         app_secret (str): API 접근을 위한 애플리케이션 비밀 키입니다.
-        access_token (str): API 접근을 위한 액세스 토큰입니다.
+        access_token (str): 사용하지 않습니다. (토큰은 TokenManager가 관리, 이전 호출 방식과의 호환용)
 
     반환:
-        [res1, res2] (list): 조회된 계좌 잔고 정보를 담은 데이터 프레임 리스트입니다. res1은 종목별 보유수량, res2는 추가 잔고 정보입니다. (FYI: 잔고조회 API는 모의투자에서는 한번에 20종목까지, 실제계좌에서는 50종목까지 조회가 가능)
+        [res1, res2] (list): 조회된 계좌 잔고 정보입니다. res1은 종목별 보유수량 데이터 프레임, res2는 추가 잔고 정보입니다. (FYI: 잔고조회 API는 모의투자에서는 한번에 20종목까지, 실제계좌에서는 50종목까지 조회가 가능)
     """
-    output1 = []
-    output2 = []
-    CTX_AREA_NK100 = ''
-
-    # 액세스 토큰 새로 가져오기 (필요한 경우)
-    access_token = get_access_token(url_base, app_key, app_secret)
-
-    while True:
-        # API 경로 설정
-        path = "/uapi/domestic-stock/v1/trading/inquire-balance"
-        url = f"{url_base}/{path}"
-
-        # 요청 헤더 구성
-        headers = {
-            "Content-Type": "application/json",
-            "authorization": f"Bearer {access_token}",
-            "appKey": app_key,
-            "appSecret": app_secret,
-            "tr_id": "VTTC8434R"
-        }
-
-        # 요청 파라미터 설정
-        params = {
-            "CANO": "50102599",  # 계좌번호(앞 8자리)
-            "ACNT_PRDT_CD": "01",  # 계좌 상품 코드
-            # 추가 파라미터 설정
-        }
-
-        # GET 요청 보내기 및 응답 받기
-        res = requests.get(url, headers=headers, params=params)
-        
-        # 응답 데이터 추가
-        output1.append(pd.DataFrame.from_records(res.json()['output1']))
-
-        # 다음 페이지 정보 업데이트
-        CTX_AREA_NK100 = res.json()['ctx_area_nk100'].strip()
-
-        # 마지막 페이지인 경우 반복 중지
-        if CTX_AREA_NK100 == '':
-            output2.append(res.json()['output2'][0])
-            break
-
-    # 결과 데이터 프레임 처리
-    if not output1[0].empty:
-        res1 = pd.concat(output1)[['pdno', 'hldg_qty']].rename(columns={'pdno': '종목코드', 'hldg_qty': '보유수량'}).reset_index(drop=True)
-    else:
-        res1 = pd.DataFrame(columns=['종목코드', '보유수량'])
-
-    res2 = output2[0]
+    session = create_session(1)
+    res1, res2 = fetch_balance(session, RateLimiter(rate_limit_for(url_base)), url_base, app_key, app_secret)
+    session.close()
 
     return [res1, res2]
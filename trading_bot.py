@@ -1,46 +1,148 @@
+import os
 import datetime
-import keyring
-import schedule
-import numpy as np
 import pandas as pd
 from datetime import timedelta
 import warnings
-from trading.trading import get_access_token, check_account, get_price, trading
+from concurrent.futures import ThreadPoolExecutor
+from trading.auth import load_app_keys
+from trading.session import create_session, rate_limit_for, RateLimiter
+from trading.account import AccountState
+from trading.orders import OrderClient
+from trading.quotes import fetch_prices
+from trading.scheduler import OrderScheduler
+from trading.execution import plan_orders
+from trading.plan import INVEST_RATIO, size_orders, load_plan, refresh_plan, respread_orders
+from trading.journal import OrderJournal, journal_path, replay_journal
+from trading.metrics import METRICS
+from portfolio.snapshot import load_snapshot, diff_snapshots
 
 # 스크립트의 메인 실행 함수
 def main():
     warnings.filterwarnings(action='ignore')
 
-    app_key = keyring.get_password('mock_app_key', 'stanfm')
-    app_secret = keyring.get_password('mock_app_secret', 'stanfm')
+    app_key, app_secret = load_app_keys()
     url_base = "https://openapivts.koreainvestment.com:29443"
 
-    access_token = get_access_token(url_base, app_key, app_secret)
-    mp = pd.read_excel('my_portfolio.xlsx', dtype=str)
-    ap, account = check_account(url_base, app_key, app_secret, access_token)
-    invest_per_stock = int(account['tot_evlu_amt']) * 0.98 / len(mp)
+    # 잔고, 시세, 주문 요청이 초당 요청 한도 하나를 나누어 쓰도록 세션과 한도 객체를 공유
+    session = create_session()
+    limiter = RateLimiter(rate_limit_for(url_base))
 
-    target = mp.merge(ap, on='종목코드', how='outer')
-    target['보유수량'] = target['보유수량'].fillna(0).astype(int)
-    target['현재가'] = target.apply(lambda x: get_price(url_base, app_key, app_secret, x['종목코드']), axis=1)
-    target['목표수량'] = np.where(target['종목코드'].isin(mp['종목코드']), round(invest_per_stock / target['현재가']), 0)
-    target['투자수량'] = target['목표수량'] - target['보유수량']
+    # 전체 잔고를 한 번 불러온 뒤 장중에는 체결 이벤트로 갱신
+    account = AccountState(url_base, app_key, app_secret, session=session, limiter=limiter)
 
-    schedule_trading(target, url_base, app_key, app_secret, access_token)
+    startDt, endDt = get_trading_hours()
+
+    # 오늘 세션의 저널이 있으면 중단된 세션을 이어서 실행 (이미 제출한 주문은 다시 보내지 않음)
+    journal_file = journal_path()
+    state = replay_journal(journal_file)
+    if state['planned']:
+        print(f"Recovered session: {len(state['pending'])} pending, {len(state['in_flight'])} in flight, "
+              f"{len(state['orders'])} acknowledged orders")
+        # 중단된 동안 예정 시각이 지난 주문은 한꺼번에 내지 않고 남은 시간에 다시 나누어 실행
+        pending = respread_orders(state['pending'], startDt, endDt)
+        schedule_trading(pending, account, url_base, app_key, app_secret, journal_file, limiter, state)
+        return
+    if os.path.exists(journal_file):
+        # 계획 기록 중 중단된 저널 (제출된 주문 없음)은 지우고 새로 계획
+        os.remove(journal_file)
+
+    # 전날 밤 plan_builder가 만든 오늘의 실행 계획이 있으면 잔고와 현재가만 다시 조회하여 바뀐 종목만 재계획
+    plan = load_plan(trade_date=startDt.strftime('%Y%m%d'))
+    if plan is not None:
+        plan_df = launch_from_plan(plan, account, url_base, app_key, app_secret, startDt, session, limiter)
+    else:
+        plan_df = launch_without_plan(account, url_base, app_key, app_secret, startDt, endDt, session, limiter)
+
+    schedule_trading(plan_df, account, url_base, app_key, app_secret, journal_file, limiter)
+
+# 미리 계산한 실행 계획으로 시작 (잔고 조회와 계획 종목의 현재가 조회를 동시에 실행)
+def launch_from_plan(plan, account, url_base, app_key, app_secret, startDt, session=None, limiter=None):
+    codes = plan['target']['종목코드']
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        synced = executor.submit(account.sync)
+        prices = executor.submit(fetch_prices, url_base, app_key, app_secret, codes, session, limiter)
+        synced.result()
+        prices = pd.Series(prices.result().to_numpy(), index=codes.to_numpy())
+
+    # 계획 이후 새로 생긴 보유 종목만 추가로 조회
+    ap = account.holdings()
+    extra = ap.loc[~ap['종목코드'].isin(codes), '종목코드']
+    if len(extra):
+        prices = pd.concat([prices, pd.Series(fetch_prices(url_base, app_key, app_secret, extra, session, limiter).to_numpy(), index=extra.to_numpy())])
+
+    target, plan_df, changed = refresh_plan(plan, ap, prices, account.total_value * INVEST_RATIO, startDt)
+    print(f"{len(plan_df)} child orders from plan {plan['created']} for {(target['투자수량'] != 0).sum()} tickers "
+          f"({len(changed)} replanned)")
+
+    return plan_df
+
+# 실행 계획이 없으면 시작 시점에 스냅샷, 잔고, 현재가로 계획
+def launch_without_plan(account, url_base, app_key, app_secret, startDt, endDt, session=None, limiter=None):
+    account.sync()
+
+    # 최신 포트폴리오 스냅샷에서 투자 종목과 목표 비중 불러오기
+    mp = load_snapshot(columns=['종목코드', 'invest', 'weight'])
+    mp = mp[mp['invest'] == 'Y'][['종목코드', 'weight']]
+
+    # 직전 리밸런싱 대비 변경 내역 출력
+    print(diff_snapshots()['action'].value_counts().to_dict())
+
+    ap = account.holdings()
+    codes = pd.concat([mp['종목코드'], ap['종목코드']]).drop_duplicates()
+    # 전 종목 현재가를 요청 한도 안에서 동시에 조회
+    prices = pd.Series(fetch_prices(url_base, app_key, app_secret, codes, session, limiter).to_numpy(), index=codes.to_numpy())
+    target = size_orders(mp, ap, prices, account.total_value * INVEST_RATIO)
+
+    # 종목별 투자수량을 n_slices개 이하의 자식 주문으로 나누어 계획
+    plan_df = plan_orders(target, startDt, endDt, method='twap', n_slices=10)
+    plan_df['cid'] = plan_df['종목코드'] + '-' + plan_df.index.astype(str)
+    print(f"{len(plan_df)} child orders planned for {(target['투자수량'] != 0).sum()} tickers")
+
+    return plan_df
 
 # 매매를 위한 스케쥴 설정 및 매매 로직을 실행
-def schedule_trading(target, url_base, app_key, app_secret, access_token):
+def schedule_trading(plan_df, account, url_base, app_key, app_secret, journal_file, limiter=None, state=None,
+                     poll_interval=60, metrics_interval=15):
     startDt, endDt = get_trading_hours()
-    schedule.clear()
-    
-    for t in range(target.shape[0]):
-        schedule_orders(target, t, url_base, app_key, app_secret, access_token, startDt, endDt)
-        
-    while datetime.datetime.now() < endDt:
-        schedule.run_pending()
+    scheduler = OrderScheduler(metrics=METRICS)
+    journal = OrderJournal(journal_file)
+    client = OrderClient(url_base, app_key, app_secret, limiter=limiter, journal=journal)
+    client.listeners.append(account.on_fill)
+
+    # 새 세션이면 주문 계획 전체를 저널에 먼저 기록, 재시작이면 응답받은 주문을 다시 추적
+    if state is None:
+        for rec in plan_df.assign(주문시각=plan_df['주문시각'].astype(str)).to_dict('records'):
+            journal.append('intent', **rec)
+        journal.append('planned', durable=True, n=len(plan_df))
+    else:
+        # 저널의 체결수량은 브로커보다 늦을 수 있으므로 주문을 복원한 뒤 잔고와 체결수량을 함께 맞춤
+        client.restore(state)
+        account.sync(client)
+
+    schedule_orders(scheduler, client, plan_df)
+
+    # 체결 내역은 poll_interval초마다 한 번에 조회 (잔고는 주기적으로만 브로커와 대조)
+    schedule_fill_polling(scheduler, client, account, startDt, endDt, poll_interval)
+
+    # 요청 지연 시간, 응답 코드, 스케줄러 지연을 metrics_interval초마다 텍스트 파일로 내보냄
+    schedule_metrics_export(scheduler, startDt, endDt, metrics_interval)
 
+    # 다음 주문 시각까지 잠들었다가 실행 (장 마감 시각에 종료)
+    scheduler.run(endDt)
+
+    # 남은 주문 제출을 마친 뒤 마지막으로 체결 내역 확인 및 잔고 대조 (저널을 닫기 전에 체결 기록)
+    client.drain()
+    diff = account.sync(client)
+    client.close()
+    journal.close()
+
+    filled = sum(o['체결수량'] for o in client.orders.values())
     print('Trading session finished.')
-    schedule.clear()
+    print(f"Orders: {len(client.orders)} accepted, {len(client.rejects)} rejected, {filled} shares filled")
+    print(f"Reconciled with broker: {diff or 'no difference'}")
+    print(f"Scheduler lag (ms): {scheduler.lag_summary()}")
+    print(METRICS.report())
+    METRICS.write_textfile()
 
 # 매매 가능 시간을 정의
 def get_trading_hours():
@@ -51,15 +153,38 @@ def get_trading_hours():
     return startDt, endDt
 
 # 주문을 시간별로 스케줄링
-def schedule_orders(target, t, url_base, app_key, app_secret, startDt, endDt):
-    n = target.loc[t, '투자수량']
-    position = 'VTTC0802U' if n > 0 else 'VTTC0801U'
-    code = target.loc[t, '종목코드']
-    time_list = pd.date_range(startDt, endDt, periods=abs(n)).round('s')
-    
-    for schedule_time in time_list:
-        schedule_time_str = schedule_time.strftime('%H:%M:%S')
-        schedule.every().day.at(schedule_time_str).do(trading, url_base, app_key, app_secret, code, position)
+def schedule_orders(scheduler, client, plan_df):
+    for cid, code, order_time, qty, tr_id in plan_df[['cid', '종목코드', '주문시각', '주문수량', 'tr_id']].itertuples(index=False):
+        scheduler.add(order_time.to_pydatetime(), client.submit, code, tr_id, qty, cid)
+
+# 체결 조회를 주기적으로 스케줄링 (실행될 때마다 다음 조회를 다시 예약)
+def schedule_fill_polling(scheduler, client, account, startDt, endDt, interval):
+    def poll(when):
+        # 조회나 대조가 실패(타임아웃, 오류 응답)해도 다음 조회는 반드시 예약
+        try:
+            client.poll_fills()
+            diff = account.maybe_reconcile(client)
+            if diff:
+                print(f"Position mismatch corrected: {diff}")
+        finally:
+            next_time = when + timedelta(seconds=interval)
+            if next_time < endDt:
+                scheduler.add(next_time, poll, next_time)
+
+    first = startDt + timedelta(seconds=interval)
+    scheduler.add(first, poll, first)
+
+# 지표 파일을 주기적으로 갱신하도록 스케줄링
+def schedule_metrics_export(scheduler, startDt, endDt, interval):
+    def export(when):
+        try:
+            METRICS.write_textfile()
+        finally:
+            next_time = when + timedelta(seconds=interval)
+            if next_time < endDt:
+                scheduler.add(next_time, export, next_time)
+
+    scheduler.add(startDt, export, startDt)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
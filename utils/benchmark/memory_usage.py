@@ -0,0 +1,86 @@
+import os
+import sys
+import resource
+import subprocess
+import numpy as np
+import pandas as pd
+
+# 저장소 최상위 폴더를 import 경로에 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from data.schema import concat_typed, to_db_rows
+from data.cleanser import calculate_value_indicators
+from portfolio.factors import FACTORS, compute_factors
+
+# 전체 종목 규모의 합성 데이터 크기
+N_TICKERS = 2500
+N_DAYS = 250
+N_QUARTERS = 20
+ACCOUNTS = ['당기순이익', '매출총이익', '매출액', '영업활동으로인한현금흐름', '자산', '자본', '부채', '영업이익',
+            '유동자산', '유동부채', '현금및현금성자산', '이익잉여금']
+
+def synthetic_chunks(name, chunk_tickers=250, seed=0):
+    """
+    데이터베이스에서 읽은 것과 같은 형태(문자열은 object, 날짜는 datetime.date)의 전체 종목 규모 합성 테이블을
+    chunk_tickers 종목씩 나누어 생성합니다. (read_sql_typed가 나누어 읽는 조각에 해당)
+    """
+    codes = np.array([f'{i:05d}0' for i in range(N_TICKERS)], dtype=object)
+    dates = pd.bdate_range(end='2024-12-31', periods=N_DAYS).date
+    quarters = pd.date_range(end='2024-12-31', periods=N_QUARTERS, freq='QE').date
+    accounts = np.array(ACCOUNTS, dtype=object)
+    indicators = np.array(['PBR', 'PCR', 'PER', 'PSR', 'DY'], dtype=object)
+
+    for start in range(0, N_TICKERS, chunk_tickers):
+        rng = np.random.default_rng([seed, start])
+        block = codes[start:start + chunk_tickers]
+        n = len(block)
+        close = np.round(np.exp(np.cumsum(rng.normal(0, 0.02, (N_DAYS, n)), axis=0)) * 10000)
+
+        if name == 'base':
+            yield pd.DataFrame({'종목코드': block, '종목명': [f'종목{c}' for c in block], '시장구분': 'KOSPI',
+                                '종가': close[-1], '시가총액': close[-1] * 1e7, '기준일': dates[-1], 'EPS': 1000.0,
+                                '선행EPS': None, 'BPS': 20000.0, '주당배당금': 500.0, '종목구분': '보통주'})
+        elif name == 'price':
+            yield pd.DataFrame({'날짜': np.repeat(dates, n), '종가': close.ravel(), '종목코드': np.tile(block, N_DAYS)})
+        elif name == 'fs':
+            yield pd.DataFrame({'계정': np.tile(np.repeat(accounts, N_QUARTERS), n),
+                                '기준일': np.tile(quarters, n * len(accounts)),
+                                '값': rng.normal(100, 50, n * len(accounts) * N_QUARTERS),
+                                '종목코드': np.repeat(block, len(accounts) * N_QUARTERS),
+                                '공시구분': 'q'})
+        elif name == 'value':
+            yield pd.DataFrame({'종목코드': np.repeat(block, len(indicators)), '기준일': quarters[-1],
+                                '지표': np.tile(indicators, n), '값': rng.normal(5, 3, n * len(indicators))})
+
+def run(mode):
+    """
+    팩터 계산, 가치지표 계산, 저장용 변환까지 수행한 뒤 프로세스의 최대 메모리 사용량(MB)을 반환합니다.
+    mode가 'raw'이면 이전처럼 전체 결과를 object 형태로 읽어 그대로 사용하고,
+    'typed'이면 read_sql_typed처럼 조각마다 스키마 타입으로 변환하며 읽습니다.
+    """
+    tables = {}
+    for name in ['base', 'price', 'fs', 'value']:
+        if mode == 'typed':
+            tables[name] = concat_typed(synthetic_chunks(name), f'kr_{name}')
+        else:
+            tables[name] = pd.concat(list(synthetic_chunks(name)), ignore_index=True)
+
+    frame_mb = sum(df.memory_usage(deep=True).sum() for df in tables.values()) / 1e6
+    compute_factors(list(FACTORS), {name: tables[name] for name in ('price', 'fs', 'value')})
+    to_db_rows(calculate_value_indicators(tables['fs'], tables['base']))
+
+    # Linux의 ru_maxrss 단위는 KB
+    return frame_mb, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        frame_mb, peak_mb = run(sys.argv[1])
+        print(f"{frame_mb:.1f} {peak_mb:.1f}")
+    else:
+        # 모드별로 새 프로세스에서 실행하여 최대 메모리 사용량을 비교 (import만 한 상태의 사용량도 함께 출력)
+        print(f"baseline: peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+        for mode in ['raw', 'typed']:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), mode], capture_output=True, text=True, check=True)
+            frame_mb, peak_mb = out.stdout.split()
+            print(f"{mode}: input frames {frame_mb} MB, peak RSS {peak_mb} MB")
@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+import subprocess
+
+# 저장소 최상위 폴더 (quant.py 위치)
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 하위 명령별로 실제 실행 시 import되는 모듈
+COMMAND_MODULES = {
+    'build-data': 'data_builder',
+    'build-portfolio': 'portfolio_builder',
+    'build-plan': 'plan_builder',
+    'collect-minutes': 'trading.quotes',
+    'trade': 'trading_bot',
+}
+
+def measure(args, repeat=5):
+    """
+    새 파이썬 프로세스로 명령을 repeat번 실행하여 가장 짧은 실행 시간(초)을 반환합니다.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+if __name__ == "__main__":
+    # cron 실행이나 --help 확인은 인터프리터 시작 시간과 비슷해야 함
+    print(f"python -c pass: {measure(['-c', 'pass']):.3f}s")
+    print(f"quant.py --help: {measure(['quant.py', '--help']):.3f}s")
+    for command in COMMAND_MODULES:
+        print(f"quant.py {command} --help: {measure(['quant.py', command, '--help']):.3f}s")
+
+    # 하위 명령을 실행할 때 부담하는 import 시간 (설치되지 않은 라이브러리가 있으면 실패로 표시)
+    for command, module in COMMAND_MODULES.items():
+        res = subprocess.run([sys.executable, '-c', f'import {module}'], cwd=ROOT, capture_output=True)
+        status = 'ok' if res.returncode == 0 else 'import failed'
+        print(f"import {module} ({command}): {measure(['-c', f'import {module}'], repeat=1):.3f}s [{status}]")